@@ -1,7 +1,10 @@
 # admin.py for a Django Budget Management Application
 
 from django.contrib import admin
-from .models import Month, BudgetItem, BudgetItemVersion, TabItem, TabRepayment, NurserySettings
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import Month, BudgetItem, BudgetItemVersion, TabItem, TabRepayment, NurserySettings, SlowQuery, RequestProfile, Change
 
 class BudgetItemVersionInline(admin.TabularInline):
     """
@@ -86,3 +89,87 @@ class TabRepaymentAdmin(admin.ModelAdmin):
 class NurserySettingsAdmin(admin.ModelAdmin):
     list_display = ('user', 'updated_at')
     readonly_fields = ('updated_at',)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Read-only view of the slow-query ring buffer; rows are written by budget/slowlog.py."""
+    list_display = ('recorded_at', 'duration_ms', 'endpoint', 'short_sql')
+    list_filter = ('endpoint',)
+    search_fields = ('sql', 'endpoint')
+    readonly_fields = ('recorded_at', 'endpoint', 'duration_ms', 'sql', 'params', 'plan')
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Change)
+class ChangeAdmin(admin.ModelAdmin):
+    """Read-only view of the delta sync change log (budget/changelog.py)."""
+    list_display = ('seq', 'changed_at', 'model', 'key', 'op', 'user')
+    list_filter = ('model', 'op')
+    search_fields = ('key',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Profiles captured with `?profile=1` / `?profile=sample` (budget/profiling.py).
+
+    Open a .prof with `snakeviz` or `python -m pstats`; feed a .collapsed file to
+    flamegraph.pl or speedscope.
+    """
+    list_display = ('created_at', 'method', 'path', 'endpoint', 'mode', 'status_code', 'duration_ms', 'queries', 'download')
+    list_filter = ('endpoint', 'mode')
+    search_fields = ('path', 'endpoint')
+    readonly_fields = (
+        'created_at', 'user', 'method', 'path', 'endpoint', 'mode', 'status_code',
+        'duration_ms', 'queries', 'filename', 'download',
+    )
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:profile_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='budget_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, profile_id):
+        profile = self.get_object(request, str(profile_id))
+        if profile is None or not self.has_view_permission(request, profile):
+            raise Http404
+        try:
+            handle = open(profile.file_path, 'rb')
+        except FileNotFoundError:
+            raise Http404('Profile file is missing.')
+        return FileResponse(handle, as_attachment=True, filename=profile.filename)
+
+    @admin.display(description='File')
+    def download(self, obj):
+        url = reverse('admin:budget_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.filename)
+
+    def delete_queryset(self, request, queryset):
+        # Row by row, so RequestProfile.delete() removes each file too.
+        for profile in queryset:
+            profile.delete()
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
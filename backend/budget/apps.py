@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class BudgetConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'budget'
+
+    def ready(self):
+        from . import auto_extra, changelog
+        changelog.connect_signals()
+        auto_extra.connect_signals()
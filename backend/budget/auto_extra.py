@@ -0,0 +1,85 @@
+"""The auto-balance Extra singleton (BudgetItem.is_auto_extra).
+
+Whether it exists, and its id, is asked whenever months are created
+(create_month, months.provision) and almost never changes, so each worker caches it under the `auto_extra`
+stamp (budget/stamps.py). Saves and deletes that could change the answer
+bump the stamp via the signal handlers below — the API's create and edit,
+the admin, cascades.
+
+At most one row may have is_auto_extra set: a partial unique index enforces
+it, so two workers creating the singleton at once cannot both succeed.
+`ensure` creates it; months.provision calls it, so a database provisioned
+at boot has one before anyone opens a month.
+"""
+
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import stamps
+from .models import BudgetItem, BudgetItemVersion
+
+STAMP = 'auto_extra'
+DEFAULT_TARGET = 500
+
+_cache = stamps.StampedCache(STAMP)
+
+
+def current_id():
+    """The singleton's budget_item_id, or None if there isn't one."""
+    return _cache.get(None, lambda: (
+        BudgetItem.objects.filter(is_auto_extra=True).values_list('budget_item_id', flat=True).first()
+    ))
+
+
+def ensure(month_obj):
+    """Create the singleton auto-balance Extra item on first encounter of a current/future month.
+
+    Skipped for past months so we don't backdate the buffer onto historical budgets.
+    """
+    if current_id() is not None:
+        return
+    today = datetime.date.today()
+    current_month_start = datetime.date(today.year, today.month, 1)
+    if month_obj.start_date < current_month_start:
+        return
+    try:
+        with transaction.atomic():
+            item = BudgetItem.objects.create(
+                item_name='Extra',
+                item_type='expense',
+                owner='shared',
+                expense_pot='',
+                is_extra=True,
+                is_auto_extra=True,
+                calculation_type='fixed',
+            )
+            BudgetItemVersion.objects.create(
+                budget_item=item,
+                month=month_obj,
+                effective_from_month=month_obj,
+                value=DEFAULT_TARGET,
+                is_one_off=False,
+            )
+    except IntegrityError:
+        # Another worker created it first; the single_auto_extra index
+        # rejected this one along with its version row.
+        pass
+
+
+def _on_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.is_auto_extra if created else (update_fields is None or 'is_auto_extra' in update_fields):
+        stamps.bump(STAMP)
+
+
+def _on_delete(sender, instance, **kwargs):
+    if instance.is_auto_extra:
+        stamps.bump(STAMP)
+
+
+def connect_signals():
+    post_save.connect(_on_save, sender=BudgetItem, dispatch_uid='auto-extra-save')
+    post_delete.connect(_on_delete, sender=BudgetItem, dispatch_uid='auto-extra-delete')
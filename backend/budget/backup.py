@@ -0,0 +1,181 @@
+"""Online SQLite backups via the sqlite3 backup API.
+
+Copying db.sqlite3 while gunicorn is writing can capture a torn file.
+Connection.backup() copies page by page instead, releasing the source lock
+between steps, and a write mid-backup just restarts the copy from a
+consistent state. Its own `sleep` only applies when a step hits BUSY or
+LOCKED, so the progress callback pauses between steps as well: that pause
+is the gap a waiting writer gets in through.
+"""
+
+import datetime
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+BACKUP_PREFIX = 'budgeter-'
+# Small steps keep each hold on the source lock to a few milliseconds, and
+# the pause after each one leaves writers a window before the next.
+DEFAULT_PAGES_PER_STEP = 64
+DEFAULT_STEP_SLEEP = 0.005
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+METRICS_FILENAME = 'last_backup.json'
+
+
+class BackupError(Exception):
+    pass
+
+
+def default_backup_dir():
+    return Path(os.environ.get('BACKUP_DIR') or '/data/backups')
+
+
+def read_last_backup_metrics(dest_dir=None):
+    """The metrics dict the last successful backup wrote, or None."""
+    path = Path(dest_dir or default_backup_dir()) / METRICS_FILENAME
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _zstd():
+    """zstd support is optional: stdlib from Python 3.14, else the
+    `zstandard` package if it happens to be installed."""
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise BackupError("zstd compression needs Python 3.14+ or the 'zstandard' package.")
+    return zstandard
+
+
+def _open_compressed(path, mode, compression):
+    if compression == 'gzip':
+        return gzip.open(path, mode)
+    if compression == 'zstd':
+        return _zstd().open(path, mode)
+    return open(path, mode)
+
+
+def _table_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        return {t: conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in tables}
+    finally:
+        conn.close()
+
+
+def verify_backup(backup_path, compression, expected_counts=None):
+    """Restore `backup_path` into a scratch file and check it opens, passes
+    `PRAGMA integrity_check`, and (when given) holds the expected row counts."""
+    with tempfile.TemporaryDirectory() as scratch:
+        restored = Path(scratch) / 'restored.sqlite3'
+        with _open_compressed(backup_path, 'rb', compression) as src, open(restored, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        conn = sqlite3.connect(restored)
+        try:
+            result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        finally:
+            conn.close()
+        if result != 'ok':
+            raise BackupError(f'Restored backup failed integrity_check: {result}')
+        if expected_counts is not None and _table_counts(restored) != expected_counts:
+            raise BackupError('Restored backup row counts do not match the snapshot.')
+
+
+def prune_backups(dest_dir, keep):
+    """Delete all but the newest `keep` backups in `dest_dir`. Returns the removed paths."""
+    backups = sorted(Path(dest_dir).glob(f'{BACKUP_PREFIX}*.sqlite3*'), reverse=True)
+    removed = backups[keep:]
+    for path in removed:
+        path.unlink()
+    return removed
+
+
+def backup_database(source_path, dest_dir, compression=None, keep=None, verify=True,
+                    pages=DEFAULT_PAGES_PER_STEP, sleep=DEFAULT_STEP_SLEEP):
+    """Back up the SQLite database at `source_path` into `dest_dir`.
+
+    Returns a metrics dict (path, size, pages copied, step count, timings),
+    which is also written to `dest_dir/last_backup.json` so something other
+    than this process can report on the last run.
+    """
+    if compression not in COMPRESSION_SUFFIXES:
+        raise BackupError(f'Unknown compression {compression!r}.')
+    if compression == 'zstd':
+        _zstd()  # fail before copying anything
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    final_path = dest_dir / f'{BACKUP_PREFIX}{stamp}.sqlite3{COMPRESSION_SUFFIXES[compression]}'
+    snapshot = dest_dir / f'.{BACKUP_PREFIX}{stamp}.sqlite3.partial'
+
+    progress = {'steps': 0, 'pages': 0}
+
+    def on_step(status, remaining, total):
+        progress['steps'] += 1
+        progress['pages'] = total
+        if remaining:
+            time.sleep(sleep)
+
+    started = time.monotonic()
+    # Read-only URI: the backup must never be able to write to the live file.
+    source = sqlite3.connect(f'{Path(source_path).resolve().as_uri()}?mode=ro', uri=True)
+    target = sqlite3.connect(snapshot)
+    try:
+        source.backup(target, pages=pages, progress=on_step, sleep=sleep)
+    finally:
+        target.close()
+        source.close()
+    copy_seconds = time.monotonic() - started
+
+    try:
+        counts = _table_counts(snapshot) if verify else None
+        if compression:
+            with open(snapshot, 'rb') as src, _open_compressed(final_path, 'wb', compression) as dst:
+                shutil.copyfileobj(src, dst)
+        else:
+            snapshot.replace(final_path)
+    finally:
+        snapshot.unlink(missing_ok=True)
+
+    verify_seconds = None
+    if verify:
+        verify_started = time.monotonic()
+        try:
+            verify_backup(final_path, compression, counts)
+        except Exception:
+            final_path.unlink()
+            raise
+        verify_seconds = time.monotonic() - verify_started
+
+    pruned = prune_backups(dest_dir, keep) if keep else []
+
+    metrics = {
+        'path': str(final_path),
+        'finished_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'bytes': final_path.stat().st_size,
+        'compression': compression or 'none',
+        'pages_copied': progress['pages'],
+        'steps': progress['steps'],
+        'copy_seconds': round(copy_seconds, 4),
+        'verify_seconds': round(verify_seconds, 4) if verify_seconds is not None else None,
+        'total_seconds': round(time.monotonic() - started, 4),
+        'pruned': len(pruned),
+    }
+    (dest_dir / METRICS_FILENAME).write_text(json.dumps(metrics, indent=2))
+    return metrics
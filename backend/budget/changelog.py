@@ -0,0 +1,130 @@
+"""Monotonically numbered change log for delta sync (GET /api/changes/).
+
+Every create, update and delete of a tracked model appends a Change row in
+the same transaction as the write. Instance saves and deletes — the API's
+create() and save() calls, the admin, cascades — are caught by the signal
+handlers below. Bulk writes (bulk_create upserts, QuerySet.update) send no
+signals, so the code doing them calls `record()` itself.
+
+A client remembers the last `seq` it saw and asks for everything after it.
+`compact()` drops entries older than the retention window; a client whose
+`since` falls in the dropped range is told to reset (refetch everything)
+rather than silently missing changes. The newest entry is never dropped, so
+the log always knows how far it has got.
+
+Because every budget write passes through `record()`, it is also where the
+per-worker month listing cache (`totals.MONTH_ITEMS_STAMP`) and the closed
+months' snapshots (budget/snapshots.py) are invalidated.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from . import snapshots, stamps
+from .models import BudgetItem, BudgetItemVersion, Change, NurserySettings, TabItem, TabRepayment
+from .totals import MONTH_ITEMS_STAMP
+
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_PAGE_SIZE = 500
+
+MODEL_NAMES = {
+    BudgetItem: 'budget_item',
+    BudgetItemVersion: 'budget_item_version',
+    TabItem: 'tab_item',
+    TabRepayment: 'tab_repayment',
+    NurserySettings: 'nursery_settings',
+}
+
+
+def version_key(budget_item_id, month_id):
+    # Versions are addressed by (item, month), their unique pair: an upsert
+    # keeps the original row's id, so the id a caller built is not reliable.
+    return f'{budget_item_id}:{month_id}'
+
+
+def key_for(instance):
+    if isinstance(instance, BudgetItemVersion):
+        return version_key(instance.budget_item_id, instance.month_id)
+    if isinstance(instance, NurserySettings):
+        return str(instance.user_id)
+    return str(instance.pk)
+
+
+def record(model, keys, op='upsert', user_id=None):
+    """Append one change per key. `model` is a tracked model class; call this
+    inside the transaction that made the change."""
+    name = MODEL_NAMES[model]
+    Change.objects.bulk_create([Change(model=name, key=key, op=op, user_id=user_id) for key in keys])
+    if model in (BudgetItem, BudgetItemVersion):
+        stamps.bump(MONTH_ITEMS_STAMP)
+        if model is BudgetItem:
+            snapshots.invalidate(item_ids=keys)
+        else:
+            snapshots.invalidate(month_ids=[key.rpartition(':')[2] for key in keys])
+
+
+def _owner(instance):
+    return instance.user_id if isinstance(instance, NurserySettings) else None
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if raw:  # loaddata
+        return
+    record(sender, [key_for(instance)], 'upsert', user_id=_owner(instance))
+
+
+def _on_delete(sender, instance, **kwargs):
+    record(sender, [key_for(instance)], 'delete', user_id=_owner(instance))
+
+
+def connect_signals():
+    for model in MODEL_NAMES:
+        post_save.connect(_on_save, sender=model, dispatch_uid=f'changelog-save-{model.__name__}')
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f'changelog-delete-{model.__name__}')
+
+
+def latest_seq():
+    return Change.objects.order_by('-seq').values_list('seq', flat=True).first() or 0
+
+
+def changes_since(since, user, limit=None):
+    """(changes, seq, reset, more) for a client that has seen up to `since`.
+
+    `changes` holds the newest Change per (model, key) in the page, oldest
+    first; `seq` is where the client should resume. `reset` means the log
+    no longer reaches back to `since` (compacted, or a restored database)
+    and the client must refetch in full.
+    """
+    limit = limit or getattr(settings, 'CHANGE_LOG_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    first = Change.objects.order_by('seq').values_list('seq', flat=True).first()
+    latest = latest_seq()
+    if since > latest or (first is not None and since < first - 1):
+        return [], latest, True, False
+
+    rows = list(
+        Change.objects
+        .filter(Q(user__isnull=True) | Q(user_id=user.pk), seq__gt=since)
+        .order_by('seq')[:limit + 1]
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+    newest = {}
+    for change in rows:
+        newest.pop((change.model, change.key), None)
+        newest[(change.model, change.key)] = change
+    seq = rows[-1].seq if rows else since
+    return list(newest.values()), seq, False, more
+
+
+def compact(retention_days=None, now=None):
+    """Delete entries older than the retention window, keeping the newest.
+    Returns the number deleted."""
+    days = retention_days if retention_days is not None else getattr(
+        settings, 'CHANGE_LOG_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    cutoff = (now or timezone.now()) - datetime.timedelta(days=days)
+    deleted, _ = Change.objects.filter(changed_at__lt=cutoff, seq__lt=latest_seq()).delete()
+    return deleted
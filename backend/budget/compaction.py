@@ -0,0 +1,66 @@
+"""Dropping BudgetItemVersion rows that change nothing.
+
+Saving an item's value for a month writes a version even when the value
+already in effect is the same, and every month's resolution scans the rows
+that pile up. A rolling version is redundant when the rolling version
+before it (by effective month) has the same value: without it, its months
+fall back to that one and resolve exactly as before. One-offs are kept, as
+is each item's earliest rolling version. Rows whose month and effective
+month differ, or that share an effective month with another rolling row
+(neither comes from the API), are never dropped.
+
+Compacting does change what a later edit reaches. With January and March
+both at 100, editing January's value to 120 stops at March; once March is
+compacted away it carries on. So compaction is something to run on purpose
+(`./manage.py compact_versions`), and on every write only when
+COMPACT_VERSIONS_ON_WRITE is set.
+"""
+
+from itertools import groupby
+
+from django.conf import settings
+
+from .models import BudgetItemVersion
+
+
+def redundant_versions(item_ids=None):
+    """Primary keys of the versions that can go, for `item_ids` (default:
+    every item)."""
+    versions = BudgetItemVersion.objects.filter(is_one_off=False)
+    if item_ids is not None:
+        versions = versions.filter(budget_item_id__in=item_ids)
+    rows = versions.order_by('budget_item_id', 'effective_from_month_id').values_list(
+        'budget_item_id', 'effective_from_month_id', 'month_id', 'value', 'pk')
+
+    redundant = []
+    for _, item_rows in groupby(rows, key=lambda row: row[0]):
+        in_effect = None
+        for _, same_start in groupby(item_rows, key=lambda row: row[1]):
+            same_start = list(same_start)
+            _, effective_from, month_id, value, pk = same_start[0]
+            plain = len(same_start) == 1 and month_id == effective_from
+            if plain and in_effect is not None and value == in_effect:
+                redundant.append(pk)
+                continue
+            # Several rows starting together: which one wins is up to the
+            # database, so nothing after them can be judged against them.
+            in_effect = value if len(same_start) == 1 else None
+    return redundant
+
+
+def compact(item_ids=None, dry_run=False):
+    """Delete the redundant versions of `item_ids` (default: every item).
+    Returns how many there were."""
+    redundant = redundant_versions(item_ids)
+    if redundant and not dry_run:
+        # Through the model, so the change log and the month listing cache
+        # hear about each row.
+        BudgetItemVersion.objects.filter(pk__in=redundant).delete()
+    return len(redundant)
+
+
+def compact_on_write(item_ids):
+    """After a write to `item_ids`' versions: compact them if
+    COMPACT_VERSIONS_ON_WRITE is set. Call inside the write's transaction."""
+    if getattr(settings, 'COMPACT_VERSIONS_ON_WRITE', False):
+        compact(item_ids)
@@ -0,0 +1,206 @@
+"""Streaming dump and load of the budget dataset as NDJSON.
+
+`dump` writes a header line and then one line per row. Rows are grouped by
+model in foreign-key order: months, budget items, item versions, tab items,
+tab repayments and nursery settings. Each model is read with a chunked
+`values()` iterator, so memory stays flat however long the history is.
+`load` reads the lines back and writes them with batched bulk_create calls
+in the same order. That is far quicker than dumpdata/loaddata, which build
+and save one model instance at a time.
+
+What the format leaves out:
+
+* Users are not dumped. Nursery settings carry their owner's username and
+  are skipped on load when no such user exists.
+* The change log, idempotency keys, slow queries and profiles stay behind.
+  A load replaces the change log with a single entry past both databases'
+  newest, so every client resets (see changelog.changes_since).
+* Timestamps are kept as dumped, not stamped with the time of the load.
+
+FORMAT_VERSION is bumped whenever the row layout changes, and `load`
+refuses a version it does not know.
+"""
+
+import decimal
+import itertools
+from contextlib import contextmanager
+
+import orjson
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+
+from . import auto_extra, changelog, snapshots, stamps
+from .models import BudgetItem, BudgetItemVersion, Change, Month, NurserySettings, TabItem, TabRepayment
+from .totals import MONTH_ITEMS_STAMP
+
+FORMAT = 'budgeter-dataset'
+FORMAT_VERSION = 1
+CHUNK_SIZE = 2000
+BATCH_SIZE = 2000
+
+# Foreign-key order: each model only points at models before it.
+MODELS = (
+    ('month', Month),
+    ('budget_item', BudgetItem),
+    ('budget_item_version', BudgetItemVersion),
+    ('tab_item', TabItem),
+    ('tab_repayment', TabRepayment),
+    ('nursery_settings', NurserySettings),
+)
+_MODEL_INDEX = {name: i for i, (name, _) in enumerate(MODELS)}
+
+
+class DatasetError(Exception):
+    pass
+
+
+def _columns(model):
+    if model is NurserySettings:
+        return ['user__username', 'data', 'updated_at']
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _default(obj):
+    # Decimal as a string, so money never picks up float noise.
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    raise TypeError(f'{type(obj).__name__} is not JSON serializable')
+
+
+def _line(obj):
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_APPEND_NEWLINE)
+
+
+def dump(out):
+    """Write the dataset to the binary file `out`. Returns {model: rows}."""
+    counts = {}
+    # One read transaction, so the rows form a consistent snapshot.
+    with transaction.atomic():
+        out.write(_line({'format': FORMAT, 'version': FORMAT_VERSION, 'change_seq': changelog.latest_seq()}))
+        for name, model in MODELS:
+            counts[name] = 0
+            rows = model.objects.order_by('pk').values(*_columns(model)).iterator(chunk_size=CHUNK_SIZE)
+            for row in rows:
+                if model is NurserySettings:
+                    row['user'] = row.pop('user__username')
+                out.write(_line({'model': name, 'row': row}))
+                counts[name] += 1
+    return counts
+
+
+@contextmanager
+def _stored_timestamps():
+    """Let bulk_create keep the dumped created_at/updated_at values instead
+    of stamping the time of the load."""
+    fields = [
+        field for _, model in MODELS for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _has_data():
+    return any(model.objects.exists() for _, model in MODELS)
+
+
+def _delete_all():
+    # Straight DELETEs, newest model first: going through the ORM would
+    # send a signal, and write a change log entry, for every row.
+    with connection.cursor() as cursor:
+        for _, model in reversed(MODELS):
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+
+
+def _reset_change_log(source_seq):
+    """Start the change log over past both databases' newest entry, so every
+    client, from this host or the dumped one, is told to reset."""
+    seq = max(source_seq, changelog.latest_seq()) + 2
+    Change.objects.all().delete()
+    Change.objects.create(seq=seq, model='budget_item', key='', op='delete')
+
+
+def _parse(lines):
+    """(line number, record) pairs: the header first, then rows, each checked
+    for the shape `load` relies on."""
+    header = True
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            raise DatasetError(f'Line {number} is not JSON: {e}')
+        if not isinstance(record, dict):
+            raise DatasetError(f'Line {number} is not a JSON object.')
+        if not header and not (isinstance(record.get('model'), str) and isinstance(record.get('row'), dict)):
+            raise DatasetError(f'Line {number} needs a "model" name and a "row" object.')
+        header = False
+        yield number, record
+
+
+def load(lines, replace=False):
+    """Load a dump from an iterable of NDJSON lines, in one transaction.
+    Returns ({model: rows loaded}, nursery settings skipped for a missing
+    user). Refuses to load over existing budget data unless `replace`."""
+    records = _parse(lines)
+    _, header = next(records, (0, None))
+    if not isinstance(header, dict) or header.get('format') != FORMAT:
+        raise DatasetError('Not a budgeter dataset dump (no header line).')
+    if header.get('version') != FORMAT_VERSION:
+        raise DatasetError(f"Dump format version {header.get('version')} is not supported "
+                           f"(this code reads version {FORMAT_VERSION}).")
+
+    counts = {name: 0 for name, _ in MODELS}
+    skipped = 0
+    users = dict(get_user_model().objects.values_list('username', 'pk'))
+    with transaction.atomic(), _stored_timestamps():
+        if _has_data():
+            if not replace:
+                raise DatasetError('The database already holds budget data; use --replace to overwrite it.')
+            _delete_all()
+
+        position = 0
+        grouped = itertools.groupby(records, key=lambda record: record[1].get('model'))
+        for name, group in grouped:
+            if _MODEL_INDEX.get(name, -1) < position:
+                raise DatasetError(f'Unexpected {name!r} rows: models must come in the order {[n for n, _ in MODELS]}.')
+            position = _MODEL_INDEX[name]
+            model = MODELS[position][1]
+            while batch := list(itertools.islice(group, BATCH_SIZE)):
+                objs = []
+                for number, record in batch:
+                    row = record['row']
+                    if model is NurserySettings:
+                        user_id = users.get(row.pop('user'))
+                        if user_id is None:
+                            skipped += 1
+                            continue
+                        row['user_id'] = user_id
+                    try:
+                        objs.append(model(**row))
+                    except TypeError as e:
+                        raise DatasetError(f'Line {number}: {e}')
+                try:
+                    model.objects.bulk_create(objs)
+                    # SQLite defers foreign key checks to the commit, where
+                    # no line could be blamed: check each batch as it lands.
+                    connection.check_constraints(table_names=[model._meta.db_table])
+                except (IntegrityError, ValidationError, ValueError) as e:
+                    raise DatasetError(f'Lines {batch[0][0]}-{batch[-1][0]} ({name}): {e}')
+                counts[name] += len(objs)
+
+        _reset_change_log(header.get('change_seq') or 0)
+        # bulk_create sends no signals: invalidate what they would have.
+        stamps.bump(MONTH_ITEMS_STAMP)
+        stamps.bump(auto_extra.STAMP)
+        if snapshots.enabled():
+            transaction.on_commit(snapshots.clear)
+    return counts, skipped
@@ -0,0 +1,161 @@
+"""Server-Sent Events stream of live household updates (GET /api/events/).
+
+The stream tails the delta sync change log (budget/changelog.py), so it sees
+writes from every gunicorn worker without a broker: each poll is one indexed
+read of the newest seq, and only when that moves are the changes turned into
+compact notifications:
+
+    {"type": "value", "month_id": ..., "budget_item_id": ..., "effective_value": ...}
+    {"type": "auto_extra", "month_id": ..., "budget_item_id": ..., "balanced_value": ...}
+    {"type": "item", "budget_item_id": ..., "op": "upsert" | "delete"}
+    {"type": "tab", "net_balance": ...}
+    {"type": "nursery"}
+
+A value change to a shared item moves the joint Remaining, so it is followed
+by that month's auto-balance Extra with its new `balanced_value`.
+
+Each batch is one `changes` event whose id is the log seq, so a reconnecting
+EventSource resumes from Last-Event-ID. A `reset` event means the log was
+compacted past that point and the client should refetch in full.
+
+The view is async and is served by the uvicorn process run.sh starts next to
+gunicorn (nginx routes only this path there), so an open stream holds an
+asyncio task rather than one of gunicorn's threads. Streams end after
+EVENTS_MAX_SECONDS and the browser reconnects, which bounds how long any one
+request lives.
+"""
+
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+
+from . import changelog
+from .models import BudgetItem, Month
+from .resolution import month_item_rows
+from .totals import balance_auto_extra
+
+DEFAULT_POLL_SECONDS = 1.0
+DEFAULT_KEEPALIVE_SECONDS = 15.0
+DEFAULT_MAX_SECONDS = 300.0
+RETRY_MS = 3000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _month_rows(month_ids):
+    """{month_id: {budget_item_id: listing row}} for the months that exist,
+    with the auto-balance Extra balanced.
+
+    Built with resolution.month_item_rows, so a value is exactly what the
+    month listing shows (an ended item is absent). Not the cached
+    month_listing: a change can be read here a moment before its writer's
+    commit hook bumps the listing stamp."""
+    out = {}
+    for month in Month.objects.filter(month_id__in=month_ids):
+        rows = month_item_rows(month)
+        balance_auto_extra(rows)
+        out[month.month_id] = {str(row['budget_item_id']): row for row in rows}
+    return out
+
+
+def notifications(changes):
+    """Compact notifications for a page of changes (see the module docstring)."""
+    from .api import _tab_summary
+
+    month_ids = {c.key.split(':')[1] for c in changes if c.model == 'budget_item_version'}
+    rows = _month_rows(month_ids) if month_ids else {}
+    out = []
+    tabs_touched = False
+    rebalanced = set()
+    for change in changes:
+        if change.model == 'budget_item_version':
+            item_id, month_id = change.key.split(':')
+            row = rows.get(month_id, {}).get(item_id)
+            out.append({
+                'type': 'value', 'month_id': month_id, 'budget_item_id': item_id,
+                'effective_value': row['effective_value'] if row else None,
+            })
+            if row and row['owner'] == 'shared':
+                rebalanced.add(month_id)
+        elif change.model == 'budget_item':
+            out.append({'type': 'item', 'budget_item_id': change.key, 'op': change.op})
+        elif change.model == 'nursery_settings':
+            out.append({'type': 'nursery'})
+        else:
+            tabs_touched = True
+    for month_id in sorted(rebalanced):
+        for item_id, row in rows[month_id].items():
+            if row['balanced_value'] is not None:
+                out.append({
+                    'type': 'auto_extra', 'month_id': month_id, 'budget_item_id': item_id,
+                    'balanced_value': row['balanced_value'],
+                })
+    # Budget items flagged is_tab_repayment feed the balance as auto-repayments.
+    item_ids = {n['budget_item_id'] for n in out if 'budget_item_id' in n}
+    if tabs_touched or (item_ids and BudgetItem.objects.filter(pk__in=item_ids, is_tab_repayment=True).exists()):
+        out.append({'type': 'tab', 'net_balance': _tab_summary()['net_balance']})
+    return out
+
+
+def _message(event, seq, data):
+    return f'id: {seq}\nevent: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+def poll(since, user):
+    """(seq, message or None): the next SSE message for a client at `since`."""
+    if changelog.latest_seq() == since:
+        return since, None
+    changes, seq, reset, more = changelog.changes_since(since, user)
+    if reset:
+        return seq, _message('reset', seq, {})
+    if not changes:  # only other users' rows
+        return seq, None
+    return seq, _message('changes', seq, notifications(changes))
+
+
+async def _stream(user, since):
+    poll_seconds = _setting('EVENTS_POLL_SECONDS', DEFAULT_POLL_SECONDS)
+    keepalive = _setting('EVENTS_KEEPALIVE_SECONDS', DEFAULT_KEEPALIVE_SECONDS)
+    lifetime = _setting('EVENTS_MAX_SECONDS', DEFAULT_MAX_SECONDS)
+    yield f'retry: {RETRY_MS}\n\n'
+    started = last_sent = time.monotonic()
+    while time.monotonic() - started < lifetime:
+        since, message = await sync_to_async(poll)(since, user)
+        now = time.monotonic()
+        if message:
+            yield message
+            last_sent = now
+        elif now - last_sent >= keepalive:
+            # A comment line: keeps nginx and any NAT from timing the idle
+            # connection out, and is ignored by EventSource.
+            yield ': keepalive\n\n'
+            last_sent = now
+        await asyncio.sleep(poll_seconds)
+
+
+def _start_seq(request):
+    raw = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+async def stream(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Unauthorized'}, status=401)
+    since = _start_seq(request)
+    if since is None:
+        since = await sync_to_async(changelog.latest_seq)()
+    response = StreamingHttpResponse(_stream(user, since), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Belt and braces with nginx.conf's proxy_buffering off.
+    response['X-Accel-Buffering'] = 'no'
+    return response
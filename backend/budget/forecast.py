@@ -0,0 +1,57 @@
+"""Cash-flow forecast: where each account will be, month by month.
+
+Each month of the horizon is resolved once from the version history
+(scenarios.History, the same resolution and totals the dashboard uses); the
+running balances are then prefix sums over those monthly figures, one
+`itertools.accumulate` per series, seeded with the opening balances. A
+three-year forecast is the two history queries plus arithmetic.
+"""
+
+from itertools import accumulate
+
+DEFAULT_MONTHS = 18
+ACCOUNTS = ('shared', 'keith', 'tild')
+
+# The monthly totals each account's series is built from.
+_REMAINING = {'shared': 'shared_remaining', 'keith': 'keith_remaining', 'tild': 'tild_remaining'}
+_SAVINGS = {'shared': 'shared_savings', 'keith': 'keith_savings', 'tild': 'tild_savings'}
+
+
+def _running(opening, monthly):
+    return list(accumulate(monthly, initial=opening))[1:]
+
+
+def project(history, year, month_num, count, opening=None, opening_savings=None):
+    """[{month_id, month_name, shared/keith/tild: {remaining, balance,
+    savings, savings_balance}}] for `count` months from year-month_num.
+
+    `remaining` and `savings` are the month's own figures; `balance` and
+    `savings_balance` add up everything since the opening balances (per
+    account, default 0) at the start of the first month.
+    """
+    opening = opening or {}
+    opening_savings = opening_savings or {}
+    simulated = history.simulate(year, month_num, count)
+    series = {}
+    for account in ACCOUNTS:
+        remaining = [totals[_REMAINING[account]] for _, totals, _ in simulated]
+        savings = [totals[_SAVINGS[account]] for _, totals, _ in simulated]
+        series[account] = (
+            remaining,
+            _running(opening.get(account, 0.0), remaining),
+            savings,
+            _running(opening_savings.get(account, 0.0), savings),
+        )
+
+    out = []
+    for i, (month_obj, _, _) in enumerate(simulated):
+        month = {'month_id': month_obj.month_id, 'month_name': month_obj.month_name}
+        for account, (remaining, balance, savings, savings_balance) in series.items():
+            month[account] = {
+                'remaining': round(remaining[i], 2),
+                'balance': round(balance[i], 2),
+                'savings': round(savings[i], 2),
+                'savings_balance': round(savings_balance[i], 2),
+            }
+        out.append(month)
+    return out
@@ -0,0 +1,175 @@
+"""Probes behind GET /api/health, cached and rate-limited per process.
+
+The shallow probe is one schema-checking SELECT; its result is reused for
+HEALTH_CACHE_SECONDS, so an uptime checker or the deploy loop polling every
+couple of seconds costs at most one query per worker per window. `?deep=1`
+adds the checks worth running before trusting a release — migrations
+applied, the database writable, SQLite's quick_check and the WAL size — and
+is cached for HEALTH_DEEP_CACHE_SECONDS. Those take the write lock, so the
+view only runs them for a session or the metrics token.
+
+Unauthenticated callers get HEALTH_RATE_LIMIT requests a minute per client
+address. The address is the peer nginx saw, unless that peer is listed in
+HEALTH_TRUSTED_PROXIES: then it is the nearest untrusted address in
+X-Forwarded-For. Behind an untrusted proxy every caller shares the proxy's
+allowance. Like the cache, the counters live in each gunicorn worker, so the
+effective ceiling is that times the worker count: enough to stop a runaway
+poller, not meant as an exact quota.
+"""
+
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from . import metrics
+from .models import BudgetItem
+
+DEFAULT_CACHE_SECONDS = 5
+DEFAULT_DEEP_CACHE_SECONDS = 30
+DEFAULT_RATE_LIMIT = 60
+RATE_WINDOW_SECONDS = 60
+# Forget idle clients once this many addresses are being tracked.
+MAX_TRACKED_CLIENTS = 1024
+
+_lock = threading.Lock()
+_results = {}  # deep -> (expires_at, ok, body)
+_windows = {}  # client -> (window_started, count)
+
+
+def clear():
+    with _lock:
+        _results.clear()
+        _windows.clear()
+
+
+def client_address(request):
+    # nginx overwrites X-Real-IP with the peer address, and gunicorn is only
+    # reachable through nginx's unix socket, so it cannot be spoofed.
+    peer = request.headers.get('X-Real-IP') or request.META.get('REMOTE_ADDR', '')
+    trusted = getattr(settings, 'HEALTH_TRUSTED_PROXIES', ())
+    if peer not in trusted:
+        return peer
+    # Only the entries our own proxies appended can be believed: walk back
+    # from the right and stop at the first address they did not vouch for.
+    forwarded = [a.strip() for a in request.headers.get('X-Forwarded-For', '').split(',') if a.strip()]
+    for address in reversed(forwarded):
+        if address not in trusted:
+            return address
+    return peer
+
+
+def rate_limit(client, now=None):
+    """(allowed, seconds until the client's window resets)."""
+    limit = getattr(settings, 'HEALTH_RATE_LIMIT', DEFAULT_RATE_LIMIT)
+    now = time.monotonic() if now is None else now
+    with _lock:
+        started, count = _windows.get(client, (now, 0))
+        if now - started >= RATE_WINDOW_SECONDS:
+            started, count = now, 0
+        _windows[client] = (started, count + 1)
+        if len(_windows) > MAX_TRACKED_CLIENTS:
+            for key in [k for k, (s, _) in _windows.items() if now - s >= RATE_WINDOW_SECONDS]:
+                del _windows[key]
+    return count < limit, RATE_WINDOW_SECONDS - (now - started)
+
+
+def _timed(check):
+    """Run one check: its fields plus `ok` and `ms`. A check fails by raising;
+    only the exception class name is reported (this is unauthenticated)."""
+    started = time.perf_counter()
+    try:
+        result = {'ok': True, **(check() or {})}
+    except Exception as e:  # report, never raise
+        result = {'ok': False, 'error': type(e).__name__}
+    result['ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def _schema():
+    # BudgetItem.objects.first() is the probe, deliberately not .exists():
+    # .exists() compiles to `SELECT 1`, which is satisfied by any schema at
+    # all, while .first() SELECTs every column the model declares — a
+    # removed/renamed column (see ee4ce43's bare RemoveField) raises here
+    # instead of only on a real user request.
+    BudgetItem.objects.first()
+
+
+def _migrations():
+    from .management.commands.boot import pending_migrations
+
+    pending = len(pending_migrations())
+    if pending:
+        # Not an exception anyone raised; name the condition instead.
+        return {'ok': False, 'pending': pending}
+    return {'pending': 0}
+
+
+def _write():
+    # A no-op UPDATE still takes SQLite's write lock, so this fails on a
+    # read-only mount and shows how long a writer waits right now; the
+    # rollback leaves nothing behind.
+    with transaction.atomic():
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute('UPDATE django_migrations SET id = id WHERE id = (SELECT MIN(id) FROM django_migrations)')
+        transaction.set_rollback(True)
+
+
+def _sqlite():
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite':
+        return {'skipped': connection.vendor}
+    with connection.cursor() as cursor:
+        # quick_check skips integrity_check's index cross-checks, which read
+        # the whole database; backup_db runs the full check on each backup.
+        cursor.execute('PRAGMA quick_check')
+        integrity = cursor.fetchone()[0]
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+    try:
+        wal_bytes = os.path.getsize(f"{connection.settings_dict['NAME']}-wal")
+    except OSError:
+        wal_bytes = 0
+    return {'ok': integrity == 'ok', 'integrity': integrity, 'journal_mode': journal_mode, 'wal_bytes': wal_bytes}
+
+
+def _probe(deep):
+    started = time.perf_counter()
+    if deep:
+        checks = {
+            'schema': _timed(_schema),
+            'migrations': _timed(_migrations),
+            'write': _timed(_write),
+            'sqlite': _timed(_sqlite),
+        }
+        ok = all(check['ok'] for check in checks.values())
+        body = {'checks': checks}
+    else:
+        check = _timed(_schema)
+        ok = check['ok']
+        body = {} if ok else {'error': check['error']}
+    body['probe_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return ok, body
+
+
+def run(deep=False, now=None):
+    """(ok, body) for the shallow or deep probe, from cache when it is fresh.
+    `body` carries `probe_ms` (how long the probe took when it ran) and
+    `cached`."""
+    ttl = getattr(settings, 'HEALTH_DEEP_CACHE_SECONDS' if deep else 'HEALTH_CACHE_SECONDS',
+                  DEFAULT_DEEP_CACHE_SECONDS if deep else DEFAULT_CACHE_SECONDS)
+    now = time.monotonic() if now is None else now
+    with _lock:
+        cached = _results.get(deep)
+    if cached and cached[0] > now:
+        metrics.cache_hit('health')
+        return cached[1], {**cached[2], 'cached': True}
+    metrics.cache_miss('health')
+    # Concurrent misses may both probe; that is cheaper than making every
+    # request queue behind one probe's lock.
+    ok, body = _probe(deep)
+    with _lock:
+        _results[deep] = (now + ttl, ok, body)
+    return ok, {**body, 'cached': False}
@@ -0,0 +1,93 @@
+"""`Idempotency-Key` support for the create endpoints.
+
+A client that may retry a POST (a phone on a flaky connection) sends a
+unique key with it. The first request with that key runs normally and its
+rendered response is stored alongside the key in the same transaction as the
+insert; a retry gets the stored bytes back after one indexed lookup, without
+running the view. Keys are per user and expire after
+IDEMPOTENCY_KEY_TTL_HOURS. Reusing a key for a different request (other
+path or body) is a 422.
+
+Only successful responses are stored: an error changed nothing, so a retry
+may as well run again. Requests without the header are untouched.
+"""
+
+import datetime
+import functools
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+DEFAULT_TTL_HOURS = 24
+
+
+def _cutoff():
+    hours = getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', DEFAULT_TTL_HOURS)
+    return timezone.now() - datetime.timedelta(hours=hours)
+
+
+def _request_hash(request):
+    return hashlib.sha256(b'\n'.join([request.method.encode(), request.path.encode(), request.body])).hexdigest()
+
+
+def _replay(request, stored, request_hash):
+    from .api import api
+
+    if stored.request_hash != request_hash:
+        return api.create_response(
+            request, {"detail": f"{HEADER} was already used for a different request."}, status=422)
+    response = HttpResponse(bytes(stored.body), status=stored.status_code, content_type=api.renderer.media_type)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(schema):
+    """Make a create view honour `Idempotency-Key`. `schema` is the view's
+    200 response schema, used to render the response that gets stored.
+    Goes below the @api.post decorator."""
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            from .api import _prevalidated_response, api
+
+            key = request.headers.get(HEADER)
+            if not key:
+                return view_func(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return api.create_response(
+                    request, {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."}, status=400)
+
+            request_hash = _request_hash(request)
+            stored = IdempotencyKey.objects.filter(user=request.user, key=key, created_at__gte=_cutoff()).first()
+            if stored is not None:
+                return _replay(request, stored, request_hash)
+
+            try:
+                with transaction.atomic():
+                    result = view_func(request, *args, **kwargs)
+                    if isinstance(result, (tuple, HttpResponse)):
+                        return result  # an error response; nothing to replay
+                    response = _prevalidated_response(request, schema.model_validate(result).model_dump())
+                    # Expired rows go first, or a recycled key would collide.
+                    IdempotencyKey.objects.filter(created_at__lt=_cutoff()).delete()
+                    IdempotencyKey.objects.create(
+                        user=request.user, key=key, endpoint=view_func.__name__,
+                        request_hash=request_hash, status_code=response.status_code, body=response.content,
+                    )
+            except IntegrityError:
+                # A concurrent retry with the same key committed first; this
+                # request's insert has been rolled back with the key's.
+                stored = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+                if stored is None:
+                    raise
+                return _replay(request, stored, request_hash)
+            return response
+        return wrapper
+    return decorator
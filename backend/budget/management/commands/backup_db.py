@@ -0,0 +1,49 @@
+import os
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from budget.backup import BackupError, backup_database, default_backup_dir, COMPRESSION_SUFFIXES
+
+
+class Command(BaseCommand):
+    help = 'Online backup of the SQLite database using the backup API (safe while the app is serving).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dest', default=str(default_backup_dir()),
+                            help='Directory to write backups into (default: $BACKUP_DIR or /data/backups).')
+        parser.add_argument('--compress', choices=[c for c in COMPRESSION_SUFFIXES if c],
+                            default=os.environ.get('BACKUP_COMPRESS') or None,
+                            help='Compress the backup (default: $BACKUP_COMPRESS, else none).')
+        parser.add_argument('--keep', type=int, default=int(os.environ.get('BACKUP_KEEP') or 0),
+                            help='Keep only the newest N backups; 0 keeps everything (default: $BACKUP_KEEP).')
+        parser.add_argument('--no-verify', action='store_true',
+                            help='Skip restoring the backup and running integrity_check on it.')
+        parser.add_argument('--pages', type=int, default=None,
+                            help='Pages copied per step; smaller holds the source lock for less time.')
+
+    def handle(self, *args, **options):
+        source = settings.DATABASES['default']['NAME']
+        kwargs = {'pages': options['pages']} if options['pages'] else {}
+        try:
+            metrics = backup_database(
+                source, options['dest'],
+                compression=options['compress'],
+                keep=options['keep'],
+                verify=not options['no_verify'],
+                **kwargs,
+            )
+        except (BackupError, OSError, sqlite3.Error) as e:
+            raise CommandError(f'Backup failed: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backed up {source} to {metrics['path']} "
+            f"({metrics['bytes']} bytes, {metrics['pages_copied']} pages in {metrics['steps']} steps)"
+        ))
+        verify = 'skipped' if metrics['verify_seconds'] is None else f"{metrics['verify_seconds'] * 1000:.0f} ms"
+        self.stdout.write(
+            f"copy {metrics['copy_seconds'] * 1000:.0f} ms, "
+            f"verify {verify}, "
+            f"total {metrics['total_seconds'] * 1000:.0f} ms, pruned {metrics['pruned']}"
+        )
@@ -0,0 +1,76 @@
+import logging
+import statistics
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+
+from budget.api import api
+from budget.models import Month
+from budget.renderers import BACKENDS, json_backend
+from budget.timing import parse_server_timing
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the month items and tabs endpoints against this database under each "
+        "JSON backend, and report how much of each request is serialization."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='month_id to list (default: the latest month).')
+        parser.add_argument('--iterations', type=int, default=50,
+                            help='Requests per endpoint per backend (default: 50).')
+        parser.add_argument('--backend', choices=BACKENDS, action='append',
+                            help='Backend to time; repeat for several (default: all).')
+
+    def handle(self, *args, **options):
+        month = (
+            Month.objects.filter(month_id=options['month']).first() if options['month']
+            else Month.objects.order_by('-start_date').first()
+        )
+        if month is None:
+            raise CommandError('No month to list; pass --month or create one first.')
+        user = get_user_model().objects.filter(is_active=True).order_by('-is_superuser', 'pk').first()
+        if user is None:
+            raise CommandError('Need at least one user to log in as.')
+
+        paths = [f'/api/months/{month.month_id}/items/', '/api/tabs/']
+        host = next((h for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        original = (api.renderer, api.parser)
+        request_logger = logging.getLogger('budget.requests')
+        previous_level = request_logger.level
+        request_logger.setLevel(logging.WARNING)
+        self.stdout.write(f'{"endpoint":<40} {"backend":<8} {"bytes":>8} {"total ms":>9} {"ser ms":>8} {"ser %":>6}')
+        try:
+            # The login writes a session row; roll it back so a benchmark
+            # against the live database leaves nothing behind.
+            with transaction.atomic():
+                client = Client(HTTP_HOST=host)
+                client.force_login(user)
+                for path in paths:
+                    for backend in options['backend'] or BACKENDS:
+                        api.renderer, api.parser = json_backend(backend)
+                        self._bench(client, path, backend, options['iterations'])
+                transaction.set_rollback(True)
+        finally:
+            api.renderer, api.parser = original
+            request_logger.setLevel(previous_level)
+
+    def _bench(self, client, path, backend, iterations):
+        client.get(path, secure=True)  # warm up
+        totals, sers = [], []
+        size = 0
+        for _ in range(iterations):
+            response = client.get(path, secure=True)
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}')
+            phases = parse_server_timing(response['Server-Timing'])
+            totals.append(phases['total'])
+            sers.append(phases['ser'])
+            size = len(response.content)
+        total, ser = statistics.median(totals), statistics.median(sers)
+        share = 100 * ser / total if total else 0.0
+        self.stdout.write(f'{path:<40} {backend:<8} {size:>8} {total:>9.2f} {ser:>8.2f} {share:>5.1f}%')
@@ -0,0 +1,55 @@
+import time
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+def pending_migrations(database=DEFAULT_DB_ALIAS):
+    """The unapplied migrations, in the order `migrate` would run them.
+
+    Reads the migration files and the django_migrations table only — no model
+    checks, no signal handlers — so on an up-to-date database this is the
+    cheap half of `migrate` without the expensive half.
+    """
+    executor = MigrationExecutor(connections[database])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [migration for migration, backwards in plan]
+
+
+class Command(BaseCommand):
+    help = 'Container pre-flight: migrate if needed, then setup_oauth, timing each phase.'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        with self._phase('migration check'):
+            pending = pending_migrations()
+        if pending:
+            self.stdout.write(f'{len(pending)} unapplied migration(s), running migrate.')
+            with self._phase('migrate'):
+                call_command('migrate', interactive=False, verbosity=options['verbosity'])
+        else:
+            self.stdout.write('No unapplied migrations, skipping migrate.')
+
+        with self._phase('setup_oauth'):
+            call_command('setup_oauth', stdout=self.stdout)
+
+        with self._phase('compact change log'):
+            call_command('compact_changes', stdout=self.stdout)
+
+        with self._phase('provision months'):
+            call_command('provision_months', stdout=self.stdout)
+
+        with self._phase('close months'):
+            call_command('close_months', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(f'[boot] total: {(time.monotonic() - started) * 1000:.0f} ms'))
+
+    @contextmanager
+    def _phase(self, name):
+        phase_started = time.monotonic()
+        yield
+        self.stdout.write(f'[boot] {name}: {(time.monotonic() - phase_started) * 1000:.0f} ms')
@@ -0,0 +1,27 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from budget import dataset
+
+
+class Command(BaseCommand):
+    help = "Stream every budget row to a versioned NDJSON dump (budget/dataset.py); gzipped if the path ends in .gz."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='Where to write the dump (default: stdout).')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.monotonic()
+        if path == '-':
+            counts = dataset.dump(sys.stdout.buffer)
+        else:
+            with (gzip.open if path.endswith('.gz') else open)(path, 'wb') as out:
+                counts = dataset.dump(out)
+        summary = ', '.join(f'{rows} {name}' for name, rows in counts.items())
+        # Keep stdout for the dump itself when that is where it went.
+        report = self.stderr if path == '-' else self.stdout
+        report.write(f'Dumped {summary} in {(time.monotonic() - started) * 1000:.0f} ms.')
@@ -0,0 +1,32 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from budget import dataset
+
+
+class Command(BaseCommand):
+    help = "Load a budget_dump NDJSON dump (budget/dataset.py) in one transaction; gzipped if the path ends in .gz."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='The dump to read (default: stdin).')
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete the budget data already in the database first.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.monotonic()
+        try:
+            if path == '-':
+                counts, skipped = dataset.load(sys.stdin.buffer, replace=options['replace'])
+            else:
+                with (gzip.open if path.endswith('.gz') else open)(path, 'rb') as lines:
+                    counts, skipped = dataset.load(lines, replace=options['replace'])
+        except (dataset.DatasetError, OSError) as e:
+            raise CommandError(f'Load failed: {e}')
+        summary = ', '.join(f'{rows} {name}' for name, rows in counts.items())
+        self.stdout.write(f'Loaded {summary} in {(time.monotonic() - started) * 1000:.0f} ms.')
+        if skipped:
+            self.stdout.write(f'Skipped {skipped} nursery settings whose user does not exist here.')
@@ -0,0 +1,29 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from budget import snapshots
+from budget.models import Month
+
+
+class Command(BaseCommand):
+    help = "Freeze every month before the current one to a JSON snapshot that nginx serves (budget/snapshots.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Drop the existing snapshots and write them all again.')
+
+    def handle(self, *args, **options):
+        if not snapshots.enabled():
+            self.stdout.write('Month snapshots are off (MONTH_SNAPSHOTS), nothing to close.')
+            return
+        if options['rebuild']:
+            snapshots.clear()
+        today = datetime.date.today()
+        closed = Month.objects.filter(start_date__lt=datetime.date(today.year, today.month, 1)).order_by('start_date')
+        frozen = set(snapshots.snapshotted())
+        written = 0
+        for month in closed:
+            if month.month_id not in frozen and snapshots.freeze(month):
+                written += 1
+        self.stdout.write(f'Closed months: {written} snapshots written, {len(frozen)} already frozen.')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from budget import changelog
+
+
+class Command(BaseCommand):
+    help = 'Drop change log entries older than the retention window (clients behind it resync in full).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Retention in days (default: settings.CHANGE_LOG_RETENTION_DAYS).')
+
+    def handle(self, *args, **options):
+        deleted = changelog.compact(options['days'])
+        self.stdout.write(f'Compacted change log: {deleted} entries removed, latest seq {changelog.latest_seq()}.')
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from budget import compaction
+from budget.resolution import month_item_rows
+from budget.models import BudgetItemVersion, Month
+
+
+def _resolve_all_ms(months, rounds):
+    """Best of `rounds` timings of resolving every month's listing, in ms."""
+    best = None
+    for _ in range(rounds):
+        began = time.perf_counter()
+        for month in months:
+            month_item_rows(month)
+        elapsed = (time.perf_counter() - began) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop BudgetItemVersion rows that don't change any month's value, and report "
+        "how much faster month resolution gets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Measure, then roll the deletions back.')
+        parser.add_argument('--rounds', type=int, default=3,
+                            help='Timing rounds over every month, best taken (default: 3).')
+
+    def handle(self, *args, **options):
+        months = list(Month.objects.order_by('start_date'))
+        total = BudgetItemVersion.objects.count()
+        before = _resolve_all_ms(months, options['rounds'])
+        with transaction.atomic():
+            removed = compaction.compact()
+            after = _resolve_all_ms(months, options['rounds'])
+            if options['dry_run']:
+                transaction.set_rollback(True)
+        speed_up = f' ({before / after:.2f}x faster)' if after else ''
+        self.stdout.write(
+            f"{'Would compact' if options['dry_run'] else 'Compacted'} versions: {removed} of {total} removed; "
+            f"resolving {len(months)} months took {before:.1f} ms, now {after:.1f} ms{speed_up}."
+        )
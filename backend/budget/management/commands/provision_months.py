@@ -0,0 +1,28 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from budget.months import DEFAULT_PROVISION_COUNT, MAX_PROVISION_COUNT, parse_month_id, provision
+
+
+class Command(BaseCommand):
+    help = 'Create the months from --start (default: this month) onwards that do not exist yet, in one statement.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First month, YYYY-MM (default: the current month).')
+        parser.add_argument('--count', type=int, default=DEFAULT_PROVISION_COUNT,
+                            help=f'How many months (default: {DEFAULT_PROVISION_COUNT}).')
+
+    def handle(self, *args, **options):
+        if options['start']:
+            try:
+                year, month_num = parse_month_id(options['start'])
+            except ValueError:
+                raise CommandError('--start must be YYYY-MM.')
+        else:
+            today = datetime.date.today()
+            year, month_num = today.year, today.month
+        if not 1 <= options['count'] <= MAX_PROVISION_COUNT:
+            raise CommandError(f'--count must be between 1 and {MAX_PROVISION_COUNT}.')
+        created, months = provision(year, month_num, options['count'])
+        self.stdout.write(f'Provisioned {months[0].month_id}..{months[-1].month_id}: {created} created.')
@@ -7,14 +7,21 @@ class Command(BaseCommand):
     help = 'Initialize SocialApp and Site for Google OAuth'
 
     def handle(self, *args, **options):
+        # Runs on every container start, so each row is only written when its
+        # values actually differ — a no-op restart does reads only.
+
         # 1. Setup Site
         # Use the actual external domain if provided, otherwise fallback
         domain = os.environ.get('ADDON_DOMAIN', 'localhost:8000')
-        site, created = Site.objects.get_or_create(id=1)
-        site.domain = domain
-        site.name = 'Budgeter'
-        site.save()
-        self.stdout.write(self.style.SUCCESS(f'Site ID 1 configured with domain: {domain}'))
+        site, created = Site.objects.get_or_create(id=1, defaults={'domain': domain, 'name': 'Budgeter'})
+        if created or (site.domain, site.name) != (domain, 'Budgeter'):
+            if not created:
+                site.domain = domain
+                site.name = 'Budgeter'
+                site.save(update_fields=['domain', 'name'])
+            self.stdout.write(self.style.SUCCESS(f'Site ID 1 configured with domain: {domain}'))
+        else:
+            self.stdout.write(f'Site ID 1 unchanged (domain: {domain})')
 
         # 2. Setup SocialApp
         client_id = os.environ.get('GOOGLE_CLIENT_ID')
@@ -25,8 +32,6 @@ class Command(BaseCommand):
             self.stdout.write(f'Environment check: ID="{client_id}", Secret length={len(client_secret) if client_secret and client_secret != "null" else 0}')
             return
 
-        self.stdout.write(f'Updating SocialApp "google" with Client ID: {client_id[:10]}...')
-        
         app, created = SocialApp.objects.get_or_create(
             provider='google',
             defaults={
@@ -36,14 +41,21 @@ class Command(BaseCommand):
             }
         )
 
-        if not created:
+        changed = created
+        if not created and (app.client_id, app.secret, app.name) != (client_id, client_secret, 'Google OAuth'):
+            self.stdout.write(f'Updating SocialApp "google" with Client ID: {client_id[:10]}...')
             app.client_id = client_id
             app.secret = client_secret
             app.name = 'Google OAuth'
-            app.save()
+            app.save(update_fields=['client_id', 'secret', 'name'])
+            changed = True
 
         # Ensure the app is linked to the site
         if not app.sites.filter(id=site.id).exists():
             app.sites.add(site)
-            
-        self.stdout.write(self.style.SUCCESS(f'SocialApp "{app.provider}" successfully configured and linked to Site 1.'))
+            changed = True
+
+        if changed:
+            self.stdout.write(self.style.SUCCESS(f'SocialApp "{app.provider}" successfully configured and linked to Site 1.'))
+        else:
+            self.stdout.write(f'SocialApp "{app.provider}" unchanged.')
@@ -0,0 +1,236 @@
+"""In-process metrics, aggregated across gunicorn workers through files.
+
+Each worker keeps its counters and histograms in memory and, at most once a
+second (and when the worker exits), writes them to METRICS_DIR/<pid>.json
+with an atomic rename. `/api/metrics` sums every worker's file and renders
+the total in the Prometheus text format, so nothing outside the container is
+needed to collect them. Files left by workers that have since exited (for
+example recycled by max_requests) are folded into `archived.json`, so
+counters never go backwards.
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+FLUSH_INTERVAL = 1.0
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ARCHIVE_FILENAME = 'archived.json'
+
+METRIC_HELP = {
+    'budgeter_requests_total': ('counter', 'Requests served, by route, method and status.'),
+    'budgeter_request_duration_seconds': ('histogram', 'Request latency, by route and method.'),
+    'budgeter_db_queries_total': ('counter', 'SQL statements executed, by route.'),
+    'budgeter_db_seconds_total': ('counter', 'Time spent in SQL statements, by route.'),
+    'budgeter_cache_requests_total': ('counter', 'Process cache lookups, by cache and result (hit/miss).'),
+    'budgeter_sqlite_write_seconds': ('histogram', 'Duration of write statements; under contention this is mostly time waiting for the SQLite write lock.'),
+    'budgeter_sqlite_locked_total': ('counter', 'Statements that failed with "database is locked".'),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_last_flush = 0.0
+
+
+def _key(name, labels):
+    return (name, tuple(sorted((labels or {}).items())))
+
+
+def inc(name, labels=None, amount=1):
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, labels=None, buckets=LATENCY_BUCKETS):
+    with _lock:
+        key = _key(name, labels)
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(hist['buckets']):
+            if value <= bound:
+                hist['counts'][i] += 1
+                break
+        hist['sum'] += value
+        hist['count'] += 1
+
+
+def cache_hit(cache):
+    inc('budgeter_cache_requests_total', {'cache': cache, 'result': 'hit'})
+
+
+def cache_miss(cache):
+    inc('budgeter_cache_requests_total', {'cache': cache, 'result': 'miss'})
+
+
+def observe_request(route, method, status, seconds, queries, db_seconds):
+    labels = {'route': route, 'method': method}
+    inc('budgeter_requests_total', dict(labels, status=str(status)))
+    observe('budgeter_request_duration_seconds', seconds, labels)
+    inc('budgeter_db_queries_total', {'route': route}, queries)
+    inc('budgeter_db_seconds_total', {'route': route}, db_seconds)
+    flush()
+
+
+def reset():
+    """Forget this process's in-memory state (tests only)."""
+    global _last_flush
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _last_flush = 0.0
+
+
+# --- Cross-worker store ---
+
+def metrics_dir():
+    return Path(getattr(settings, 'METRICS_DIR', '/tmp/budgeter-metrics'))
+
+
+def _snapshot():
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in _counters.items()],
+        'histograms': [[name, list(labels), {**hist, 'counts': list(hist['counts'])}]
+                       for (name, labels), hist in _histograms.items()],
+    }
+
+
+def _write_atomic(path, data):
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def flush(force=False):
+    """Write this process's totals to its file, at most once per FLUSH_INTERVAL."""
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < FLUSH_INTERVAL:
+        return
+    with _lock:
+        _last_flush = now
+        data = _snapshot()
+    directory = metrics_dir()
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_atomic(directory / f'{os.getpid()}.json', data)
+    except OSError:
+        # Metrics must never take a request down with them.
+        pass
+
+
+def _merge(into, data):
+    for name, labels, value in data.get('counters', []):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        into['counters'][key] = into['counters'].get(key, 0) + value
+    for name, labels, hist in data.get('histograms', []):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        current = into['histograms'].get(key)
+        if current is None:
+            into['histograms'][key] = {**hist, 'counts': list(hist['counts'])}
+        else:
+            current['counts'] = [a + b for a, b in zip(current['counts'], hist['counts'])]
+            current['sum'] += hist['sum']
+            current['count'] += hist['count']
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _archive_dead_workers(directory):
+    """Fold files of exited workers into archived.json. The caller holds the
+    directory lock, so no scrape can see a file both folded and still present."""
+    dead = [p for p in directory.glob('*.json')
+            if p.stem.isdigit() and not _pid_alive(int(p.stem))]
+    if not dead:
+        return
+    archive = {'counters': {}, 'histograms': {}}
+    for path in [directory / ARCHIVE_FILENAME, *dead]:
+        _merge(archive, _read(path))
+    _write_atomic(directory / ARCHIVE_FILENAME, {
+        'counters': [[n, list(l), v] for (n, l), v in archive['counters'].items()],
+        'histograms': [[n, list(l), h] for (n, l), h in archive['histograms'].items()],
+    })
+    for path in dead:
+        path.unlink(missing_ok=True)
+
+
+def collect():
+    """Totals across every worker, live and exited."""
+    flush(force=True)
+    directory = metrics_dir()
+    merged = {'counters': {}, 'histograms': {}}
+    if not directory.exists():
+        return merged
+    with open(directory / '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        _archive_dead_workers(directory)
+        for path in directory.glob('*.json'):
+            _merge(merged, _read(path))
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def render(extra_gauges=()):
+    """Prometheus text exposition (format 0.0.4) of `collect()`, plus any
+    `(name, help, value)` gauges the caller wants to append."""
+    merged = collect()
+    lines = []
+    by_name = {}
+    for (name, labels), value in merged['counters'].items():
+        by_name.setdefault(name, []).append(('counter', labels, value))
+    for (name, labels), hist in merged['histograms'].items():
+        by_name.setdefault(name, []).append(('histogram', labels, hist))
+
+    for name in sorted(by_name):
+        kind, help_text = METRIC_HELP.get(name, (by_name[name][0][0], ''))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for _, labels, value in sorted(by_name[name], key=lambda entry: entry[1]):
+            if kind == 'histogram':
+                cumulative = 0
+                for bound, count in zip(value['buckets'], value['counts']):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {value["count"]}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {value["sum"]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {value["count"]}')
+            else:
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+
+    for name, help_text, value in extra_gauges:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-19 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0023_remove_budgetitem_bills_pot_owner'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('endpoint', models.CharField(help_text='Ninja view name, or the request path outside a view.', max_length=200)),
+                ('duration_ms', models.FloatField()),
+                ('sql', models.TextField()),
+                ('params', models.TextField(blank=True, default='')),
+                ('plan', models.TextField(blank=True, default='', help_text="SQLite's EXPLAIN QUERY PLAN output.")),
+            ],
+            options={
+                'verbose_name': 'Slow Query',
+                'verbose_name_plural': 'Slow Queries',
+                'ordering': ['-recorded_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-19 07:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0024_slowquery'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('endpoint', models.CharField(blank=True, default='', max_length=200)),
+                ('mode', models.CharField(choices=[('cprofile', 'cProfile (.prof)'), ('sample', 'Sampled stacks (.collapsed)')], max_length=10)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('queries', models.PositiveIntegerField(blank=True, null=True)),
+                ('filename', models.CharField(max_length=200)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Request Profile',
+                'verbose_name_plural': 'Request Profiles',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-19 08:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0025_requestprofile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('changed_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('model', models.CharField(max_length=30)),
+                ('key', models.CharField(help_text='Primary key, or budget_item_id:month_id for a version.', max_length=80)),
+                ('op', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], max_length=6)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Change',
+                'verbose_name_plural': 'Changes',
+                'ordering': ['seq'],
+            },
+        ),
+    ]
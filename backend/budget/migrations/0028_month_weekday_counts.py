@@ -0,0 +1,30 @@
+import calendar
+
+from django.db import migrations, models
+
+
+def fill_weekday_counts(apps, schema_editor):
+    # Same arithmetic as budget.months.weekday_counts, inlined so this
+    # migration keeps working whatever happens to that module.
+    Month = apps.get_model('budget', 'Month')
+    months = list(Month.objects.all())
+    for month in months:
+        first_weekday, days = calendar.monthrange(month.start_date.year, month.start_date.month)
+        month.weekday_counts = [4 + ((weekday - first_weekday) % 7 < days - 28) for weekday in range(7)]
+    Month.objects.bulk_update(months, ['weekday_counts'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0027_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='month',
+            name='weekday_counts',
+            field=models.JSONField(blank=True, default=list, help_text='How many times Monday..Sunday fall in the month (see budget/months.py).'),
+        ),
+        migrations.RunPython(fill_weekday_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-19 08:45
+
+from django.db import migrations, models
+
+
+def keep_one_auto_extra(apps, schema_editor):
+    # Before the constraint, a race in create_month could leave two rows
+    # flagged. Keep the first by name (the order the list shows them) and
+    # turn the rest into ordinary items so the index can be built.
+    BudgetItem = apps.get_model('budget', 'BudgetItem')
+    flagged = list(
+        BudgetItem.objects.filter(is_auto_extra=True).order_by('item_name', 'budget_item_id')
+        .values_list('budget_item_id', flat=True)
+    )
+    if len(flagged) > 1:
+        BudgetItem.objects.filter(budget_item_id__in=flagged[1:]).update(is_auto_extra=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0028_month_weekday_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_one_auto_extra, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='budgetitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_auto_extra', True)), fields=('is_auto_extra',), name='single_auto_extra'),
+        ),
+    ]
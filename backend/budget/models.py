@@ -1,5 +1,7 @@
 # models.py for a Django Budget Management Application
 
+from pathlib import Path
+
 from django.conf import settings
 from django.db import models
 import uuid
@@ -25,6 +27,11 @@ class Month(models.Model):
     end_date = models.DateField(
         help_text="The last day of the month."
     )
+    weekday_counts = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="How many times Monday..Sunday fall in the month (see budget/months.py).",
+    )
 
     class Meta:
         verbose_name = "Month"
@@ -145,6 +152,12 @@ class BudgetItem(models.Model):
         verbose_name = "Budget Item"
         verbose_name_plural = "Budget Items"
         ordering = ['item_name']
+        constraints = [
+            # The auto-balance Extra is a singleton; see budget/auto_extra.py.
+            models.UniqueConstraint(
+                fields=['is_auto_extra'], condition=models.Q(is_auto_extra=True), name='single_auto_extra',
+            ),
+        ]
 
     def __str__(self):
         return (f"{self.item_name} ({self.get_item_type_display()}) - Owner: {self.get_owner_display()}"
@@ -278,3 +291,112 @@ class NurserySettings(models.Model):
 
     def __str__(self):
         return f"Nursery settings for {self.user}"
+
+
+class SlowQuery(models.Model):
+    """A statement that ran over settings.SLOW_QUERY_MS (see budget/slowlog.py).
+
+    Trimmed to the newest SLOW_QUERY_LOG_SIZE rows, so it behaves as a ring buffer.
+    """
+    recorded_at = models.DateTimeField(auto_now_add=True)
+    endpoint = models.CharField(max_length=200, help_text="Ninja view name, or the request path outside a view.")
+    duration_ms = models.FloatField()
+    sql = models.TextField()
+    params = models.TextField(blank=True, default='')
+    plan = models.TextField(blank=True, default='', help_text="SQLite's EXPLAIN QUERY PLAN output.")
+
+    class Meta:
+        verbose_name = "Slow Query"
+        verbose_name_plural = "Slow Queries"
+        ordering = ['-recorded_at']
+
+    def __str__(self):
+        return f"{self.duration_ms:.1f} ms in {self.endpoint}"
+
+
+class RequestProfile(models.Model):
+    """A profiled /api/ request (see budget/profiling.py). The profile itself
+    is a file under settings.PROFILE_DIR; deleting the row deletes it."""
+    MODE_CHOICES = [
+        ('cprofile', 'cProfile (.prof)'),
+        ('sample', 'Sampled stacks (.collapsed)'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    endpoint = models.CharField(max_length=200, blank=True, default='')
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    queries = models.PositiveIntegerField(null=True, blank=True)
+    filename = models.CharField(max_length=200)
+
+    class Meta:
+        verbose_name = "Request Profile"
+        verbose_name_plural = "Request Profiles"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+    @property
+    def file_path(self):
+        return Path(settings.PROFILE_DIR) / self.filename
+
+    def delete(self, *args, **kwargs):
+        self.file_path.unlink(missing_ok=True)
+        return super().delete(*args, **kwargs)
+
+
+class Change(models.Model):
+    """One entry in the change log behind GET /api/changes/ (see budget/changelog.py).
+
+    `seq` is an AUTOINCREMENT key on SQLite, so it only ever grows and a
+    client can resume from the last one it saw.
+    """
+    OP_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+
+    seq = models.BigAutoField(primary_key=True)
+    changed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    model = models.CharField(max_length=30)
+    key = models.CharField(max_length=80, help_text="Primary key, or budget_item_id:month_id for a version.")
+    op = models.CharField(max_length=6, choices=OP_CHOICES)
+    # Set only for per-user rows (NurserySettings), which only their owner sees.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    class Meta:
+        verbose_name = "Change"
+        verbose_name_plural = "Changes"
+        ordering = ['seq']
+
+    def __str__(self):
+        return f"#{self.seq} {self.op} {self.model} {self.key}"
+
+
+class IdempotencyKey(models.Model):
+    """The response a create request sent under an `Idempotency-Key` header,
+    replayed to retries of it (see budget/idempotency.py).
+
+    Rows older than settings.IDEMPOTENCY_KEY_TTL_HOURS are ignored, and
+    purged by the next keyed create.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=60)
+    request_hash = models.CharField(max_length=64, help_text="SHA-256 of the method, path and body.")
+    status_code = models.PositiveSmallIntegerField()
+    body = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+        unique_together = ('user', 'key')
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key}"
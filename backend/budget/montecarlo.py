@@ -0,0 +1,161 @@
+"""Monte Carlo forecast for budgets whose spending varies month to month.
+
+Some lines (the groceries pot, weekly items) are never quite what the
+budget says. Each variable item gets a standard deviation, either given in
+the request or, for those two kinds, fitted from how its value moved over
+past months, and every path draws that item's monthly amount from a normal
+distribution around its resolved value (never below zero). Everything else
+is as resolved by the scenario history.
+
+The per-path work is array arithmetic. Each month's rows are reduced once
+to a (months x totals) matrix of the linear sums `month_totals` needs
+(shared income, salaries, ...). A batch of paths only re-draws the variable
+items' columns, shaped (paths, months, variable items), and corrects those
+sums with one matrix product. The split, the Remaining figures and the
+running balances then follow `totals.month_totals` element-wise. Batches
+bound the memory a run needs and are seeded from one SeedSequence. They
+run in the request's thread: spawning a process pool per request cost more
+than the batches it took over.
+"""
+
+import numpy as np
+
+DEFAULT_PATHS = 1000
+MAX_PATHS = 20000
+DEFAULT_MONTHS = 24
+DEFAULT_LOOKBACK_MONTHS = 12
+PERCENTILES = (5, 25, 50, 75, 95)
+BATCH_PATHS = 1000
+
+# Columns of the per-month sums, one weight per row below.
+_SUMS = (
+    'shared_income', 'shared_total', 'extra_total', 'shared_savings',
+    'keith_salary', 'tild_salary', 'keith_income', 'tild_income',
+    'keith_direct', 'tild_direct', 'keith_savings', 'tild_savings',
+    'keith_tab', 'tild_tab',
+)
+_COLUMN = {name: i for i, name in enumerate(_SUMS)}
+BANDS = ('shared', 'keith', 'tild', 'savings')
+
+
+def _weights(row):
+    """This row's contribution (0 or 1) to each of _SUMS, as month_totals
+    would add it."""
+    w = np.zeros(len(_SUMS))
+    owner, item_type = row['owner'], row['item_type']
+    if owner == 'shared':
+        if item_type == 'income':
+            w[_COLUMN['shared_income']] = 1
+        elif item_type == 'expense':
+            w[_COLUMN['shared_total']] = 1
+            if row['is_extra']:
+                w[_COLUMN['extra_total']] = 1
+        elif item_type == 'savings':
+            w[_COLUMN['shared_savings']] = 1
+    elif owner in ('keith', 'tild'):
+        if item_type == 'income':
+            w[_COLUMN[f'{owner}_income']] = 1
+            if row['item_name'].lower() == 'salary':
+                w[_COLUMN[f'{owner}_salary']] = 1
+        elif item_type == 'expense':
+            w[_COLUMN[f'{owner}_tab' if row['is_tab_repayment'] else f'{owner}_direct']] = 1
+        elif item_type == 'savings':
+            w[_COLUMN[f'{owner}_savings']] = 1
+    return w
+
+
+def _varies(row):
+    """Whether the item's spending is expected to wander month to month: the
+    groceries pot and weekly items. Anything else whose value moved did so
+    by a planned step (a rent rise), which is not variance."""
+    return row['item_type'] == 'expense' and (
+        row['expense_pot'] == 'groceries' or row['calculation_type'] == 'weekly_count')
+
+
+def fit_deviations(resolved):
+    """{item id: standard deviation of its per-occurrence value} for the
+    variable items (see `_varies`) whose value moved over `resolved`
+    ([(month, rows)]). Other items vary only when the request says so."""
+    values = {}
+    for _, rows in resolved:
+        for row in rows:
+            if _varies(row):
+                values.setdefault(row['budget_item_id'], []).append(row['value'])
+    return {
+        item_id: float(np.std(v, ddof=1))
+        for item_id, v in values.items()
+        if len(v) > 1 and np.std(v) > 0
+    }
+
+
+def prepare(resolved, deviations):
+    """The arrays a batch of paths needs, from the horizon's resolved rows
+    ([(month, rows)]) and {item id: standard deviation}.
+
+    An item's deviation is of its per-occurrence value, so a weekly item's
+    monthly spread scales with how often it falls in the month.
+    """
+    variable = sorted({row['budget_item_id'] for _, rows in resolved for row in rows
+                       if deviations.get(row['budget_item_id'])}, key=str)
+    index = {item_id: i for i, item_id in enumerate(variable)}
+    months = len(resolved)
+    base = np.zeros((months, len(_SUMS)))
+    mean = np.zeros((months, len(variable)))
+    spread = np.zeros((months, len(variable)))
+    weights = np.zeros((months, len(variable), len(_SUMS)))
+    for m, (_, rows) in enumerate(resolved):
+        for row in rows:
+            w = _weights(row)
+            base[m] += row['effective_value'] * w
+            i = index.get(row['budget_item_id'])
+            if i is not None:
+                mean[m, i] = row['effective_value']
+                spread[m, i] = deviations[row['budget_item_id']] * (row['occurrences'] or 1)
+                weights[m, i] = w
+    return {'base': base, 'mean': mean, 'spread': spread, 'weights': weights, 'variable': variable}
+
+
+def _monthly(sums):
+    """Joint, Keith's and Tild's Remaining and total savings from a
+    (..., _SUMS) array — totals.month_totals, element-wise."""
+    col = {name: sums[..., i] for name, i in _COLUMN.items()}
+    total_salary = col['keith_salary'] + col['tild_salary']
+    paid = total_salary > 0
+    safe_total = np.where(paid, total_salary, 1)
+    keith_proportion = np.where(paid, col['keith_salary'] / safe_total, 0.5)
+    tild_proportion = np.where(paid, col['tild_salary'] / safe_total, 0.5)
+    funded = np.maximum(0, col['shared_total'] + col['shared_savings'] - col['shared_income'])
+    shared_expense = col['shared_total'] - col['extra_total']
+    return {
+        'shared': col['shared_income'] + funded - shared_expense - col['shared_savings'],
+        'keith': (col['keith_income'] - col['keith_direct'] - col['keith_savings']
+                  - funded * keith_proportion - col['keith_tab'] + col['tild_tab']),
+        'tild': (col['tild_income'] - col['tild_direct'] - col['tild_savings']
+                 - funded * tild_proportion - col['tild_tab'] + col['keith_tab']),
+        'savings': col['shared_savings'] + col['keith_savings'] + col['tild_savings'],
+    }
+
+
+def run_batch(arrays, paths, seed):
+    """{band: (paths, months) running balances before the opening balance}
+    for one batch."""
+    rng = np.random.default_rng(seed)
+    mean, spread = arrays['mean'], arrays['spread']
+    draws = np.maximum(0, mean + spread * rng.standard_normal((paths, *mean.shape)))
+    # Swap the budgeted amounts of the variable items for the drawn ones.
+    sums = arrays['base'] + np.einsum('pmv,mvs->pms', draws - mean, arrays['weights'])
+    return {band: np.cumsum(monthly, axis=1) for band, monthly in _monthly(sums).items()}
+
+
+def simulate(arrays, paths, opening=None, seed=None):
+    """{band: (len(PERCENTILES), months) percentiles of the running balance},
+    across `paths` paths split into batches of BATCH_PATHS."""
+    opening = opening or {}
+    sizes = [min(BATCH_PATHS, paths - start) for start in range(0, paths, BATCH_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    batches = [run_batch(arrays, size, s) for size, s in zip(sizes, seeds)]
+    return {
+        band: np.percentile(np.concatenate([b[band] for b in batches]), PERCENTILES, axis=0)
+        + opening.get(band, 0.0)
+        for band in BANDS
+    }
@@ -0,0 +1,86 @@
+"""Month rows and their calendar metadata.
+
+`provision()` creates a run of months ahead of time — POST
+/api/months/provision/, the provision_months command and the boot step all
+call it — so navigating forward finds the month already there instead of
+creating it on the way. Each month's metadata, including how many times each
+weekday falls in it, is worked out arithmetically from calendar.monthrange in
+a single pass, and the whole run is one INSERT OR IGNORE.
+"""
+
+import calendar
+import datetime
+
+from . import auto_extra
+from .models import Month
+
+DEFAULT_PROVISION_COUNT = 24
+MAX_PROVISION_COUNT = 120
+
+
+def parse_month_id(month_id):
+    """(year, month) for a 'YYYY-MM' id; ValueError if it is not one."""
+    year, month_num = map(int, month_id.split('-'))
+    if not (1 <= month_num <= 12):
+        raise ValueError("Month must be between 01 and 12.")
+    return year, month_num
+
+
+def weekday_counts(first_weekday, days):
+    """Occurrences of Monday..Sunday in a month of `days` days starting on
+    `first_weekday` (0 = Monday): four of each, plus one for each of the
+    first `days - 28` weekdays."""
+    return [4 + ((weekday - first_weekday) % 7 < days - 28) for weekday in range(7)]
+
+
+def month_fields(year, month_num):
+    """Everything a Month row holds, keyed by field name."""
+    first_weekday, days = calendar.monthrange(year, month_num)
+    start_date = datetime.date(year, month_num, 1)
+    return {
+        'month_id': f'{year:04d}-{month_num:02d}',
+        'month_name': start_date.strftime("%B %Y"),
+        'start_date': start_date,
+        'end_date': datetime.date(year, month_num, days),
+        'weekday_counts': weekday_counts(first_weekday, days),
+    }
+
+
+def weekday_occurrences(month_obj, day_of_week):
+    """How often `day_of_week` (1 = Monday .. 7, as
+    BudgetItem.weekly_payment_day) falls in `month_obj`. Months created before
+    weekday_counts existed, or without it, are worked out on the spot."""
+    if not 1 <= day_of_week <= 7:
+        return 0
+    if month_obj.weekday_counts:
+        return month_obj.weekday_counts[day_of_week - 1]
+    first_weekday, days = calendar.monthrange(month_obj.start_date.year, month_obj.start_date.month)
+    return weekday_counts(first_weekday, days)[day_of_week - 1]
+
+
+def month_range(year, month_num, count):
+    """Month rows (unsaved) for `count` months starting at year-month_num."""
+    months = []
+    for offset in range(count):
+        y, m = divmod(month_num - 1 + offset, 12)
+        months.append(Month(**month_fields(year + y, m + 1)))
+    return months
+
+
+def provision(year, month_num, count=DEFAULT_PROVISION_COUNT):
+    """Make sure `count` months from year-month_num exist.
+
+    Returns (number created, the months in order). Existing months are left
+    exactly as they are. Creates the auto-balance Extra from the first month
+    that is not in the past, if there is none yet (auto_extra.ensure).
+    """
+    months = month_range(year, month_num, count)
+    ids = [m.month_id for m in months]
+    existing = Month.objects.filter(month_id__in=ids).count()
+    Month.objects.bulk_create(months, ignore_conflicts=True)
+    months = list(Month.objects.filter(month_id__in=ids).order_by('start_date'))
+    today = datetime.date.today()
+    current = [m for m in months if m.start_date >= datetime.date(today.year, today.month, 1)]
+    if current:
+        auto_extra.ensure(current[0])
+    return len(ids) - existing, months
@@ -0,0 +1,177 @@
+"""On-demand profiling of single /api/ requests, for staff only.
+
+A staff user adds `?profile=1` (or the header `X-Profile: 1`) to any /api/
+request and that one request runs under cProfile, or under the sampler if
+another request in the same worker already is. `profile=sample` uses a
+stdlib sampling profiler instead, which walks the request thread's stack
+every PROFILE_SAMPLE_INTERVAL seconds and writes collapsed stacks — the
+input format of flamegraph.pl and speedscope.
+
+The profile is written under settings.PROFILE_DIR, indexed by a
+RequestProfile row (listed and downloadable in the Django admin), and its id
+is returned in the `X-Profile-Id` response header. Only the newest
+PROFILE_KEEP profiles are kept. Everyone else's requests pay one attribute
+check.
+"""
+
+import cProfile
+import datetime
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger('budget.profiling')
+
+MODES = {'1': 'cprofile', 'cprofile': 'cprofile', 'sample': 'sample'}
+SUFFIXES = {'cprofile': '.prof', 'sample': '.collapsed'}
+DEFAULT_KEEP = 50
+DEFAULT_SAMPLE_INTERVAL = 0.001
+
+# Only one cProfile.Profile can be enabled per process (from Python 3.12 a
+# second enable() raises ValueError), so overlapping cProfile requests in a
+# gthread worker take turns: one that finds it busy is sampled instead.
+_cprofile_lock = threading.Lock()
+
+
+def profile_dir():
+    return Path(settings.PROFILE_DIR)
+
+
+def requested_mode(request):
+    """The profiler this request asked for, or None. Anyone but an
+    authenticated staff user gets None, whatever they send."""
+    if not request.path.startswith('/api/'):
+        return None
+    flag = request.GET.get('profile') or request.headers.get('X-Profile')
+    if not flag:
+        return None
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated or not user.is_staff:
+        return None
+    return MODES.get(flag.strip().lower())
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread.
+
+    Works anywhere (no signals, so it is fine inside gthread workers), at the
+    cost of only seeing the target thread when it holds or releases the GIL.
+    """
+
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.target = threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='budget-stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+def prune_profiles(keep):
+    """Drop all but the newest `keep` profiles, files included."""
+    from .models import RequestProfile
+
+    stale = RequestProfile.objects.order_by('-created_at', '-id')[keep:]
+    for profile in stale:
+        profile.delete()
+
+
+class ProfilingMiddleware:
+    """Must come after AuthenticationMiddleware: it needs request.user."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        if mode == 'cprofile' and not _cprofile_lock.acquire(blocking=False):
+            # Another thread of this worker is under cProfile already.
+            mode = 'sample'
+
+        started = time.perf_counter()
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+                _cprofile_lock.release()
+        else:
+            profiler = StackSampler(getattr(settings, 'PROFILE_SAMPLE_INTERVAL', DEFAULT_SAMPLE_INTERVAL))
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        try:
+            profile = self._save(request, response, mode, profiler, duration_ms)
+        except (OSError, DatabaseError):
+            logger.exception('Could not save profile for %s %s', request.method, request.path)
+            return response
+        response['X-Profile-Id'] = str(profile.id)
+        return response
+
+    def _save(self, request, response, mode, profiler, duration_ms):
+        from .models import RequestProfile
+
+        timing = getattr(request, 'timing', None)
+        endpoint = (timing and timing.endpoint) or ''
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%S')
+        filename = f'{stamp}-{endpoint or "request"}-{uuid.uuid4().hex[:8]}{SUFFIXES[mode]}'
+        directory = profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        if mode == 'cprofile':
+            profiler.dump_stats(directory / filename)
+        else:
+            profiler.write(directory / filename)
+
+        profile = RequestProfile.objects.create(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            endpoint=endpoint,
+            mode=mode,
+            status_code=response.status_code,
+            duration_ms=duration_ms,
+            queries=timing.queries if timing else None,
+            filename=filename,
+        )
+        prune_profiles(getattr(settings, 'PROFILE_KEEP', DEFAULT_KEEP))
+        logger.info('Profiled %s %s (%s, %.1f ms) -> %s', request.method, request.path, mode, duration_ms, filename)
+        return profile
@@ -0,0 +1,58 @@
+"""JSON renderer and parser for the NinjaAPI, chosen by settings.API_JSON_BACKEND.
+
+'orjson' (the default) encodes UUIDs, dates and datetimes in Rust instead of
+calling back into NinjaJSONEncoder.default() for every one of them, which is
+most of what a month of BudgetItemVersionSchema rows or the tabs payload
+costs to render. 'json' is ninja's stock stdlib renderer and parser, kept
+for comparison (see the bench_serialization command).
+
+The wire format is the same either way except for datetimes, which orjson
+writes with microseconds rather than Django's milliseconds; no response
+schema currently carries one.
+"""
+
+import decimal
+
+import orjson
+from django.core.exceptions import ImproperlyConfigured
+from ninja.parser import Parser
+from ninja.renderers import BaseRenderer, JSONRenderer
+from ninja.responses import NinjaJSONEncoder
+
+BACKENDS = ('orjson', 'json')
+
+_fallback_encoder = NinjaJSONEncoder()
+
+
+def _default(obj):
+    # Decimal as a string, like DjangoJSONEncoder, so money never picks up
+    # float noise on the way out.
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    # Pydantic models, URLs, lazy translations, timedeltas...: whatever the
+    # stock renderer can encode, so can this one.
+    return _fallback_encoder.default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, request, data, *, response_status):
+        return orjson.dumps(data, default=_default, option=self.options)
+
+
+class ORJSONParser(Parser):
+    def parse_body(self, request):
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so ninja
+        # still answers a malformed body with a 400.
+        return orjson.loads(request.body)
+
+
+def json_backend(name):
+    """(renderer, parser) instances for the named backend."""
+    if name == 'orjson':
+        return ORJSONRenderer(), ORJSONParser()
+    if name == 'json':
+        return JSONRenderer(), Parser()
+    raise ImproperlyConfigured(f'API_JSON_BACKEND must be one of {BACKENDS}, not {name!r}.')
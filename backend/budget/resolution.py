@@ -0,0 +1,117 @@
+"""How a month's items resolve to their effective values.
+
+An item's value for a month is that month's own version if it has one
+(possibly a one-off), otherwise the most recent rolling version that started
+on or before it; weekly items are multiplied by how often their weekday falls
+in the month. `resolve_month_rows` does this over plain tuples, so the month
+listing (`month_item_rows`: two `values_list` queries) and the scenario
+simulator (an in-memory copy of the history) produce exactly the same rows.
+"""
+
+from django.db.models import Q
+
+from . import stamps
+from .models import BudgetItem, BudgetItemVersion
+from .months import weekday_occurrences
+from .totals import MONTH_ITEMS_STAMP, balance_auto_extra
+
+# Item columns, in BudgetItemVersionSchema's field order.
+ITEM_COLUMNS = (
+    'budget_item_id', 'item_name', 'item_type', 'owner', 'expense_pot',
+    'is_tab_repayment', 'is_extra', 'childcare_link', 'is_auto_extra',
+    'calculation_type', 'weekly_payment_day',
+)
+VERSION_COLUMNS = ('budget_item_id', 'month_id', 'value', 'is_one_off', 'effective_from_month__month_name')
+
+
+def resolve_month_rows(month_obj, items, versions):
+    """The month's item listing as BudgetItemVersionSchema-shaped dicts.
+
+    `items` are ITEM_COLUMNS tuples for the items still running in the month;
+    `versions` are VERSION_COLUMNS tuples (extra trailing fields are ignored)
+    for the versions that can apply to it — its own, and rolling versions
+    that started on or before it — newest effective month first.
+    """
+    month_id = month_obj.month_id
+    exact = {}
+    fallback = {}
+    for row in versions:
+        item_id = row[0]
+        if row[1] == month_id:
+            exact[item_id] = row
+        elif item_id not in fallback and not row[3]:
+            fallback[item_id] = row  # sorted desc: the first is the most recent
+
+    out = []
+    for (item_id, item_name, item_type, owner, expense_pot, is_tab_repayment, is_extra,
+         childcare_link, is_auto_extra, calculation_type, weekly_payment_day) in items:
+        version = exact.get(item_id) or fallback.get(item_id)
+        if version is None:
+            continue
+        value = float(version[2])
+        effective_value = value
+        occurrences = None
+        if calculation_type == 'weekly_count' and weekly_payment_day:
+            occurrences = weekday_occurrences(month_obj, weekly_payment_day)
+            effective_value = value * occurrences
+        out.append({
+            'budget_item_id': item_id,
+            'item_name': item_name,
+            'item_type': item_type,
+            'owner': owner,
+            'expense_pot': expense_pot,
+            'is_tab_repayment': is_tab_repayment,
+            'is_extra': is_extra,
+            'childcare_link': childcare_link,
+            'is_auto_extra': is_auto_extra,
+            'calculation_type': calculation_type,
+            'weekly_payment_day': weekly_payment_day,
+            'value': value,
+            'effective_value': effective_value,
+            'effective_from_month_name': version[4],
+            'is_one_off': version[3],
+            'occurrences': occurrences,
+            'balanced_value': None,
+        })
+    return out
+
+
+def month_item_rows(month_obj):
+    """The month's item listing as BudgetItemVersionSchema-shaped dicts.
+
+    Same rows as the API's `_serialize_version` over
+    `_effective_version_for_month`, built from two `values_list` queries
+    instead of model instances and a pydantic object per item — this is the
+    app's hottest path.
+    """
+    month_id = month_obj.month_id
+    start = month_obj.start_date
+
+    items = (
+        BudgetItem.objects
+        .exclude(last_payment_month__end_date__lt=start)
+        .values_list(*ITEM_COLUMNS)
+    )
+    # Only the versions that can apply: this month's own row (possibly a
+    # one-off), and rolling versions that started on or before it.
+    versions = (
+        BudgetItemVersion.objects
+        .filter(Q(month_id=month_id) | Q(is_one_off=False, effective_from_month__start_date__lte=start))
+        .order_by('-effective_from_month__start_date')
+        .values_list(*VERSION_COLUMNS)
+    )
+    return resolve_month_rows(month_obj, items, versions)
+
+
+_listing_cache = stamps.StampedCache(MONTH_ITEMS_STAMP)
+
+
+def month_listing(month_obj):
+    """`month_item_rows` with the auto-balance Extra balanced, cached per
+    month until the next budget write (changelog.record bumps the stamp).
+    Callers must not modify the rows."""
+    def compute():
+        rows = month_item_rows(month_obj)
+        balance_auto_extra(rows)
+        return rows
+    return _listing_cache.get(month_obj.month_id, compute)
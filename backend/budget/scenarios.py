@@ -0,0 +1,116 @@
+"""What-if scenarios: month-by-month totals with hypothetical changes applied.
+
+POST /api/scenarios/simulate loads every item and the whole version history
+once (two queries) into a `History`, applies the scenario's changes to that
+in-memory copy, and resolves each month of the horizon with the same code as
+the month listing (resolution.resolve_month_rows, then totals). Nothing is
+written, so trying a scenario no longer means editing real versions and
+undoing them.
+"""
+
+import uuid
+
+from .models import BudgetItem, BudgetItemVersion
+from .months import month_fields, month_range
+from .resolution import ITEM_COLUMNS, VERSION_COLUMNS, resolve_month_rows
+from .totals import PEOPLE, balance_auto_extra
+
+DEFAULT_HORIZON = 36
+MAX_HORIZON = 120
+
+_ITEM_INDEX = {name: i for i, name in enumerate(ITEM_COLUMNS)}
+
+
+def _month_name(month_id):
+    year, month_num = map(int, month_id.split('-'))
+    return month_fields(year, month_num)['month_name']
+
+
+class History:
+    """Items and versions as plain tuples, keyed the way the listing reads
+    them. Versions carry their effective month's id after VERSION_COLUMNS,
+    which resolve_month_rows ignores; month ids sort chronologically, so
+    they stand in for start dates."""
+
+    def __init__(self, items, last_months, versions):
+        self.items = items  # id -> ITEM_COLUMNS tuple
+        self.last_months = last_months  # id -> last_payment_month_id
+        self.versions = versions  # (item, month) -> VERSION_COLUMNS + (effective month id,)
+
+    @classmethod
+    def load(cls):
+        items = {}
+        last_months = {}
+        for row in BudgetItem.objects.order_by('item_name').values_list(*ITEM_COLUMNS, 'last_payment_month_id'):
+            items[row[0]] = row[:-1]
+            last_months[row[0]] = row[-1]
+        versions = {
+            (row[0], row[1]): row
+            for row in BudgetItemVersion.objects.order_by().values_list(*VERSION_COLUMNS, 'effective_from_month_id')
+        }
+        return cls(items, last_months, versions)
+
+    def set_value(self, item_id, month_id, value, is_one_off=False):
+        """As PUT .../items/{id}/value/ would, for `month_id` onwards (or
+        only that month, for a one-off)."""
+        self.versions[(item_id, month_id)] = (item_id, month_id, value, is_one_off, _month_name(month_id), month_id)
+
+    def end_item(self, item_id, last_month_id):
+        self.last_months[item_id] = last_month_id
+
+    def add_item(self, fields, month_id, value, is_one_off=False, last_month_id=None):
+        item_id = uuid.uuid4()
+        row = dict.fromkeys(ITEM_COLUMNS, '')
+        row.update(is_tab_repayment=False, is_extra=False, is_auto_extra=False,
+                   calculation_type='fixed', weekly_payment_day=None)
+        row.update(fields, budget_item_id=item_id)
+        if row['calculation_type'] != 'weekly_count':
+            row['weekly_payment_day'] = None
+        self.items[item_id] = tuple(row[name] for name in ITEM_COLUMNS)
+        self.last_months[item_id] = last_month_id
+        self.set_value(item_id, month_id, value, is_one_off)
+        return item_id
+
+    def salary_item(self, owner):
+        """The owner's Salary income item, as useBudgetTotals.js finds it."""
+        for item_id, row in self.items.items():
+            if (row[_ITEM_INDEX['owner']] == owner and row[_ITEM_INDEX['item_type']] == 'income'
+                    and row[_ITEM_INDEX['item_name']].lower() == 'salary'):
+                return item_id
+        return None
+
+    def rows(self, month_obj, ordered_versions):
+        month_id = month_obj.month_id
+        items = [
+            row for item_id, row in self.items.items()
+            if self.last_months[item_id] is None or self.last_months[item_id] >= month_id
+        ]
+        versions = [v for v in ordered_versions if v[1] == month_id or (not v[3] and v[5] <= month_id)]
+        return resolve_month_rows(month_obj, items, versions)
+
+    def resolve(self, year, month_num, count):
+        """[(month, listing rows)] for `count` months from year-month_num."""
+        ordered_versions = sorted(self.versions.values(), key=lambda v: v[5], reverse=True)
+        return [(month_obj, self.rows(month_obj, ordered_versions))
+                for month_obj in month_range(year, month_num, count)]
+
+    def simulate(self, year, month_num, count):
+        """[(month, totals, balanced Extra or None)] for `count` months."""
+        out = []
+        for month_obj, rows in self.resolve(year, month_num, count):
+            totals = balance_auto_extra(rows)
+            balanced = next((row['balanced_value'] for row in rows if row['balanced_value'] is not None), None)
+            out.append((month_obj, totals, balanced))
+        return out
+
+
+def apply_salary(history, owner, month_id, value):
+    """A salary change for `owner` (one of totals.PEOPLE) from `month_id`,
+    adding a Salary item if they have none."""
+    if owner not in PEOPLE:
+        raise ValueError(f"Salary owner must be one of: {', '.join(PEOPLE)}.")
+    item_id = history.salary_item(owner)
+    if item_id is None:
+        history.add_item({'item_name': 'Salary', 'item_type': 'income', 'owner': owner}, month_id, value)
+    else:
+        history.set_value(item_id, month_id, value)
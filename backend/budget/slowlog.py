@@ -0,0 +1,120 @@
+"""Opt-in slow-query log with EXPLAIN QUERY PLAN capture.
+
+With settings.SLOW_QUERY_MS set, SlowQueryMiddleware wraps each request's
+cursor via `connection.execute_wrapper`. A statement slower than the
+threshold is logged on `budget.slowquery` with its parameters, duration,
+calling endpoint and SQLite's query plan, which answers "was that a full
+scan of budget_budgetitemversion, or was the time in Python?".
+
+Records are saved to the SlowQuery table after the response is built, never
+from inside the request's own transactions, and the table is trimmed to the
+newest SLOW_QUERY_LOG_SIZE rows so it behaves as a ring buffer. Browse it in
+the Django admin.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+logger = logging.getLogger('budget.slowquery')
+
+DEFAULT_LOG_SIZE = 200
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+MAX_PARAMS_LENGTH = 2000
+
+
+def explain(sql, params):
+    """SQLite's plan for `sql`, one line per step, indented by depth. Runs on
+    the backend cursor directly so the EXPLAIN itself is not wrapped, counted
+    or recorded."""
+    if connection.vendor != 'sqlite' or not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return ''
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        rows = cursor.fetchall()
+    except DatabaseError as e:
+        return f'(EXPLAIN failed: {type(e).__name__})'
+    finally:
+        cursor.close()
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return '\n'.join(lines)
+
+
+class SlowQueryRecorder:
+    """execute_wrapper that collects statements over `threshold_ms`."""
+
+    def __init__(self, request, threshold_ms):
+        self.request = request
+        self.threshold_ms = threshold_ms
+        self.records = []
+
+    def _endpoint(self):
+        # request.timing.endpoint is set once the ninja view starts running;
+        # before that (session and auth lookups) the path is the best we have.
+        timing = getattr(self.request, 'timing', None)
+        return (timing and timing.endpoint) or self.request.path
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= self.threshold_ms:
+                self.record(sql, params, many, duration_ms)
+
+    def record(self, sql, params, many, duration_ms):
+        plan = '' if many else explain(sql, params)
+        endpoint = self._endpoint()
+        params_repr = repr(params)[:MAX_PARAMS_LENGTH]
+        logger.warning(
+            'Slow query (%.1f ms) in %s: %s\n  params: %s\n  plan:\n%s',
+            duration_ms, endpoint, sql, params_repr, plan,
+        )
+        self.records.append({
+            'sql': sql,
+            'params': params_repr,
+            'duration_ms': duration_ms,
+            'endpoint': endpoint,
+            'plan': plan,
+        })
+
+
+def save_records(records):
+    """Persist records and trim the table to the newest SLOW_QUERY_LOG_SIZE rows."""
+    from .models import SlowQuery
+
+    SlowQuery.objects.bulk_create(SlowQuery(**r) for r in records)
+    size = getattr(settings, 'SLOW_QUERY_LOG_SIZE', DEFAULT_LOG_SIZE)
+    cutoff = SlowQuery.objects.order_by('-id').values_list('id', flat=True)[size:size + 1].first()
+    if cutoff is not None:
+        SlowQuery.objects.filter(id__lte=cutoff).delete()
+
+
+class SlowQueryMiddleware:
+    """Sits outside RequestTimingMiddleware so saving the log is not counted
+    against the request it describes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold_ms = getattr(settings, 'SLOW_QUERY_MS', None)
+        if threshold_ms is None:
+            return self.get_response(request)
+        recorder = SlowQueryRecorder(request, threshold_ms)
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        if recorder.records:
+            try:
+                save_records(recorder.records)
+            except DatabaseError:
+                logger.exception('Could not save slow-query records')
+        return response
@@ -0,0 +1,146 @@
+"""Frozen JSON snapshots of closed months' item listings.
+
+A month before the current one can no longer be edited through the API, so
+its listing only changes when an item itself is edited or deleted. The first
+time a closed month is listed, or when `./manage.py close_months` runs at
+boot, its rendered listing is written to SNAPSHOT_DIR as `<month_id>.json`
+with a `.json.gz` copy beside it. From then on
+GET /api/months/<month_id>/items/ checks the session and answers with an
+X-Accel-Redirect to that file. nginx serves it, the precompressed copy
+included, and no version is resolved. Without SNAPSHOT_ACCEL_PREFIX (no
+nginx in front), Django sends the file's bytes itself.
+
+Writes to items and versions remove the snapshots they could change, once
+the write commits (`invalidate`, called from changelog.record). A version
+change reaches from its month onwards. An item change reaches from the
+item's earliest version onwards. A snapshot is only kept if the month
+listing stamp did not move while it was rendered, so a write that commits
+mid-render cannot leave a stale one behind. Snapshots live outside the
+database; `close_months --rebuild` redoes them all, e.g. after a restore.
+"""
+
+import gzip
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.http import HttpResponse
+
+from . import stamps
+from .models import BudgetItemVersion
+from .renderers import json_backend
+from .resolution import month_listing
+from .totals import MONTH_ITEMS_STAMP
+
+# The API's renderer, so a snapshot is byte for byte the live listing.
+_renderer, _ = json_backend(settings.API_JSON_BACKEND)
+
+
+def enabled():
+    return getattr(settings, 'MONTH_SNAPSHOTS', False)
+
+
+def _dir():
+    return Path(settings.SNAPSHOT_DIR)
+
+
+def _path(month_id):
+    return _dir() / f'{month_id}.json'
+
+
+def snapshotted():
+    """Month ids that have a snapshot."""
+    try:
+        return [p.stem for p in _dir().glob('*.json')]
+    except FileNotFoundError:
+        return []
+
+
+def current_stamp():
+    """Read before rendering a snapshot and hand to `write`."""
+    return stamps.read(MONTH_ITEMS_STAMP)
+
+
+def _replace(path, body):
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}')
+    tmp.write_bytes(body)
+    os.replace(tmp, path)
+
+
+def _remove(month_id):
+    # The .json goes first: it is what `response` looks for.
+    for path in (_path(month_id), _path(month_id).with_suffix('.json.gz')):
+        path.unlink(missing_ok=True)
+
+
+def write(month_id, body, stamp):
+    """Store `body` as the month's snapshot, unless the listing stamp has
+    moved on from `stamp`. Returns whether it was kept."""
+    path = _path(month_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _replace(path.with_suffix('.json.gz'), gzip.compress(body, compresslevel=9, mtime=0))
+    _replace(path, body)
+    if current_stamp() != stamp:
+        _remove(month_id)
+        return False
+    return True
+
+
+def freeze(month_obj):
+    """Render the month's listing to its snapshot. Returns whether it was
+    kept (see `write`)."""
+    stamp = current_stamp()
+    body = _renderer.render(None, month_listing(month_obj), response_status=200)
+    return write(month_obj.month_id, body, stamp)
+
+
+def response(month_id):
+    """The month's snapshot as a response, or None if it has none."""
+    path = _path(month_id)
+    prefix = settings.SNAPSHOT_ACCEL_PREFIX
+    if prefix:
+        if not path.exists():
+            return None
+        response = HttpResponse(content_type='application/json')
+        response['X-Accel-Redirect'] = f'{prefix}{path.name}'
+        return response
+    try:
+        return HttpResponse(path.read_bytes(), content_type='application/json')
+    except FileNotFoundError:
+        return None
+
+
+def _invalidate_now(item_ids, month_ids):
+    frozen = snapshotted()
+    if not frozen:
+        return
+    starts = list(month_ids)
+    if item_ids:
+        first = BudgetItemVersion.objects.filter(budget_item_id__in=item_ids).aggregate(
+            month=Min('month_id'), effective=Min('effective_from_month_id'))
+        starts += [month_id for month_id in first.values() if month_id]
+    if not starts:
+        return
+    earliest = min(starts)
+    for month_id in frozen:
+        if month_id >= earliest:
+            _remove(month_id)
+
+
+def invalidate(item_ids=(), month_ids=()):
+    """Once the current transaction commits, remove the snapshots that
+    changes to `item_ids` (BudgetItem rows) or to versions of `month_ids`
+    could affect."""
+    if not enabled():
+        return
+    item_ids, month_ids = list(item_ids), list(month_ids)
+    transaction.on_commit(lambda: _invalidate_now(item_ids, month_ids))
+
+
+def clear():
+    """Remove every snapshot."""
+    for month_id in snapshotted():
+        _remove(month_id)
@@ -0,0 +1,86 @@
+"""Cross-worker version stamps for per-process caches.
+
+Each gunicorn worker keeps a few rarely-changing facts in memory. A write
+that changes one of them bumps its stamp — a small file under
+CACHE_STAMP_DIR, replaced atomically — and a worker compares the stamp its
+copy was cached under against a single os.stat() before trusting it. The
+stat is far cheaper than the query it saves, and like the metrics files it
+needs nothing shared beyond the container's filesystem.
+
+Bumps happen on commit: bumping before, another worker could re-read the old
+rows under the new stamp and keep them until the next change.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from . import metrics
+
+
+def _path(name):
+    return Path(settings.CACHE_STAMP_DIR) / name
+
+
+def read(name):
+    """The current stamp for `name`; None until it is first bumped."""
+    try:
+        st = os.stat(_path(name))
+    except FileNotFoundError:
+        return None
+    # os.replace gives the file a new inode, so this changes on every bump
+    # even where mtime is coarse.
+    return st.st_ino, st.st_mtime_ns
+
+
+def _bump_now(name):
+    path = _path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{name}.{os.getpid()}.{threading.get_ident()}')
+    tmp.write_text(str(time.time_ns()))
+    os.replace(tmp, path)
+
+
+def bump(name):
+    """Invalidate every worker's copy of `name` once the current transaction
+    commits (immediately outside one)."""
+    transaction.on_commit(lambda: _bump_now(name))
+
+
+class StampedCache:
+    """Values computed per key, trusted while `name`'s stamp is unchanged.
+
+    Off (compute every time) when settings.CROSS_WORKER_CACHES is false, as
+    under the test runner: a TestCase rollback removes rows without sending
+    the signals that would bump the stamp.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        if not getattr(settings, 'CROSS_WORKER_CACHES', True):
+            return compute()
+        # Read the stamp before computing: a bump landing in between leaves
+        # the entry under the older stamp, so the next get recomputes.
+        stamp = read(self.name)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            metrics.cache_hit(self.name)
+            return entry[1]
+        metrics.cache_miss(self.name)
+        value = compute()
+        with self._lock:
+            self._entries[key] = (stamp, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
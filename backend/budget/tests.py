@@ -1,16 +1,19 @@
 # tests.py for a Django Budget Management Application API
 
-from django.test import TestCase, Client
+from django.db import IntegrityError, transaction
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse # Useful for complex URLs, though not strictly necessary for ninja
 from unittest.mock import patch
 import datetime
 import json
+import tempfile
 import uuid
 
 # Import your models and the API instance
 from .models import Month, BudgetItem, BudgetItemVersion
 from django.contrib.auth.models import User
 from .api import api # Assuming api.py is in the same app directory
+from . import auto_extra, stamps
 
 
 class FakeDate(datetime.date):
@@ -19,6 +22,18 @@ class FakeDate(datetime.date):
         return cls(2025, 10, 15)
 
 
+def make_item(month, name, item_type, owner, value, **fields):
+    """A BudgetItem whose first version is `month`'s. A list `value` gives
+    one rolling version per month from `month` on."""
+    item = BudgetItem.objects.create(item_name=name, item_type=item_type, owner=owner, **fields)
+    values = value if isinstance(value, list) else [value]
+    months = Month.objects.filter(start_date__gte=month.start_date).order_by('start_date')[:len(values)]
+    for version_month, version_value in zip(months, values, strict=True):
+        BudgetItemVersion.objects.create(
+            budget_item=item, month=version_month, effective_from_month=version_month, value=version_value)
+    return item
+
+
 class BudgetAPITestCase(TestCase):
     """
     Test suite for the Django Ninja API endpoints related to budget management.
@@ -651,3 +666,424 @@ class AutoExtraSingletonTestCase(TestCase):
         auto_items = [i for i in items if i.get('is_auto_extra')]
         self.assertEqual(len(auto_items), 1)
         self.assertTrue(auto_items[0]['is_extra'])
+
+    def test_edit_rejects_flagging_a_second_auto_extra(self):
+        self.client.post('/api/months/', json.dumps({'month': '2025-10'}), content_type='application/json')
+        other = BudgetItem.objects.create(item_name='Fun', item_type='expense', owner='shared')
+        resp = self.client.put(
+            f'/api/budgetitems/{other.budget_item_id}/',
+            json.dumps({'is_auto_extra': True}), content_type='application/json',
+        )
+        self.assertEqual(resp.status_code, 409)
+        other.refresh_from_db()
+        self.assertFalse(other.is_auto_extra)
+
+    def test_database_allows_only_one_auto_extra(self):
+        BudgetItem.objects.create(item_name='Extra', item_type='expense', owner='shared', is_auto_extra=True)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            BudgetItem.objects.create(item_name='Extra 2', item_type='expense', owner='shared', is_auto_extra=True)
+
+    def test_losing_the_creation_race_is_harmless(self):
+        # Another worker created the singleton after this one's cache said
+        # there was none.
+        BudgetItem.objects.create(item_name='Extra', item_type='expense', owner='shared', is_auto_extra=True)
+        with patch('budget.auto_extra.current_id', return_value=None):
+            resp = self.client.post('/api/months/', json.dumps({'month': '2025-10'}), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(BudgetItem.objects.filter(is_auto_extra=True).count(), 1)
+        self.assertFalse(BudgetItemVersion.objects.exists())
+
+
+class AutoExtraCacheTests(TestCase):
+    """Each worker caches the singleton's id under the `auto_extra` stamp;
+    saves and deletes that could change it bump the stamp on commit."""
+
+    def setUp(self):
+        stamp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(stamp_dir.cleanup)
+        settings_override = override_settings(CROSS_WORKER_CACHES=True, CACHE_STAMP_DIR=stamp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        auto_extra._cache.clear()
+        self.addCleanup(auto_extra._cache.clear)
+
+    def _create_auto_extra(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BudgetItem.objects.create(item_name='Extra', item_type='expense', owner='shared', is_auto_extra=True)
+
+    def test_repeat_lookups_are_served_from_the_cache(self):
+        item = self._create_auto_extra()
+        self.assertEqual(auto_extra.current_id(), item.budget_item_id)
+        with self.assertNumQueries(0):
+            self.assertEqual(auto_extra.current_id(), item.budget_item_id)
+
+    def test_creating_the_singleton_invalidates_a_cached_none(self):
+        self.assertIsNone(auto_extra.current_id())
+        item = self._create_auto_extra()
+        self.assertEqual(auto_extra.current_id(), item.budget_item_id)
+
+    def test_deleting_the_singleton_invalidates_the_cache(self):
+        item = self._create_auto_extra()
+        auto_extra.current_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertIsNone(auto_extra.current_id())
+
+    def test_unflagging_the_singleton_invalidates_the_cache(self):
+        item = self._create_auto_extra()
+        auto_extra.current_id()
+        item.is_auto_extra = False
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save(update_fields=['is_auto_extra'])
+        self.assertIsNone(auto_extra.current_id())
+
+    def test_unrelated_edits_do_not_bump_the_stamp(self):
+        item = self._create_auto_extra()
+        auto_extra.current_id()
+        stamp = stamps.read(auto_extra.STAMP)
+        item.item_name = 'Buffer'
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save(update_fields=['item_name'])
+        self.assertEqual(stamps.read(auto_extra.STAMP), stamp)
+
+
+class MonthItemsFastPathTests(TestCase):
+    """list_budget_items_for_month builds its rows from values_list tuples and
+    skips ninja's validation; it must still say exactly what the model path says."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        self.months = [
+            Month.objects.create(
+                month_id=f"2026-{m:02d}", month_name=datetime.date(2026, m, 1).strftime('%B %Y'),
+                start_date=datetime.date(2026, m, 1),
+                end_date=datetime.date(2026, m + 1, 1) - datetime.timedelta(days=1),
+            )
+            for m in range(1, 7)
+        ]
+        jan, feb, mar, apr = self.months[:4]
+        rent = BudgetItem.objects.create(item_name='Rent', item_type='expense', owner='shared', expense_pot='bills')
+        BudgetItemVersion.objects.create(budget_item=rent, month=jan, effective_from_month=jan, value=1000)
+        BudgetItemVersion.objects.create(budget_item=rent, month=mar, effective_from_month=mar, value=1100)
+        BudgetItemVersion.objects.create(budget_item=rent, month=feb, effective_from_month=feb, value=50, is_one_off=True)
+        cleaner = BudgetItem.objects.create(
+            item_name='Cleaner', item_type='expense', owner='keith',
+            calculation_type='weekly_count', weekly_payment_day=5,
+        )
+        BudgetItemVersion.objects.create(budget_item=cleaner, month=jan, effective_from_month=jan, value=12.5)
+        gym = BudgetItem.objects.create(item_name='Gym', item_type='expense', owner='tild', last_payment_month=feb)
+        BudgetItemVersion.objects.create(budget_item=gym, month=jan, effective_from_month=jan, value=30)
+        bonus = BudgetItem.objects.create(item_name='Bonus', item_type='income', owner='keith')
+        BudgetItemVersion.objects.create(budget_item=bonus, month=apr, effective_from_month=apr, value=500, is_one_off=True)
+        BudgetItem.objects.create(item_name='No versions', item_type='expense', owner='shared')
+
+    def _reference(self, month):
+        from .api import _effective_version_for_month, _serialize_version
+        from django.db.models import Prefetch
+        versions_qs = (
+            BudgetItemVersion.objects
+            .select_related('effective_from_month', 'month')
+            .order_by('-effective_from_month__start_date')
+        )
+        out = []
+        for item in BudgetItem.objects.select_related('last_payment_month').prefetch_related(
+                Prefetch('versions', queryset=versions_qs)):
+            if item.last_payment_month and month.start_date > item.last_payment_month.end_date:
+                continue
+            version = _effective_version_for_month(item, month)
+            if version is not None:
+                out.append(_serialize_version(item, version, month).model_dump(mode='json'))
+        return out
+
+    def test_matches_the_model_path_for_every_month(self):
+        for month in self.months:
+            with self.subTest(month=month.month_id):
+                response = self.client.get(f'/api/months/{month.month_id}/items/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), self._reference(month))
+
+    def test_rows_validate_against_the_published_schema(self):
+        from .api import BudgetItemVersionSchema
+        rows = self.client.get('/api/months/2026-02/items/').json()
+        self.assertEqual({i['item_name'] for i in rows}, {'Rent', 'Cleaner', 'Gym'})
+        for row in rows:
+            self.assertEqual(BudgetItemVersionSchema.model_validate(row).model_dump(mode='json'), row)
+        schema = api.get_openapi_schema()
+        ok = schema['paths']['/api/months/{month_id}/items/']['get']['responses'][200]
+        self.assertIn('BudgetItemVersionSchema', json.dumps(ok))
+
+
+class AutoExtraBalanceTests(TestCase):
+    """The month listing carries the auto-balance Extra's balanced value,
+    worked out as useBudgetTotals.js and App.jsx work out the joint Remaining."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        self.month = Month.objects.create(
+            month_id="2025-10", month_name="October 2025",
+            start_date=datetime.date(2025, 10, 1), end_date=datetime.date(2025, 10, 31),
+        )
+        self.extra = make_item(self.month, 'Extra', 'expense', 'shared', 500, is_extra=True, is_auto_extra=True)
+        make_item(self.month, 'Salary', 'income', 'keith', 2000)
+        make_item(self.month, 'Salary', 'income', 'tild', 2000)
+        make_item(self.month, 'Bills', 'expense', 'shared', 600)
+
+    def _rows(self):
+        return {row['item_name']: row for row in self.client.get('/api/months/2025-10/items/').json()}
+
+    def test_contributions_hold_the_joint_remaining_at_the_buffer(self):
+        # The hook test's case: 600 + 500 shared, 300 joint income.
+        make_item(self.month, 'Joint income', 'income', 'shared', 300)
+        rows = self._rows()
+        self.assertEqual(rows['Extra']['balanced_value'], 500)
+        self.assertEqual(rows['Extra']['effective_value'], 500)
+        self.assertIsNone(rows['Bills']['balanced_value'])
+
+    def test_joint_income_surplus_lands_in_the_buffer(self):
+        make_item(self.month, 'Joint income', 'income', 'shared', 2000)
+        make_item(self.month, 'Joint savings', 'savings', 'shared', 200)
+        make_item(self.month, 'Holiday', 'expense', 'shared', 100, is_extra=True)
+        # 2000 in, 600 bills and 200 saved: 1200 left, of which 100 is the other Extra.
+        self.assertEqual(self._rows()['Extra']['balanced_value'], 1100)
+
+    def test_cached_until_a_budget_write(self):
+        with tempfile.TemporaryDirectory() as stamp_dir, \
+                override_settings(CROSS_WORKER_CACHES=True, CACHE_STAMP_DIR=stamp_dir):
+            from .resolution import _listing_cache
+            _listing_cache.clear()
+            self.addCleanup(_listing_cache.clear)
+            self.assertEqual(self._rows()['Extra']['balanced_value'], 500)
+            # Session, user and month only; the listing comes from the cache.
+            with self.assertNumQueries(3):
+                self._rows()
+            with self.captureOnCommitCallbacks(execute=True):
+                make_item(self.month, 'Joint income', 'income', 'shared', 1500)
+            self.assertEqual(self._rows()['Extra']['balanced_value'], 900)
+
+
+class BatchMonthValuesTests(TestCase):
+    """PUT /months/{month_id}/values/ (today is 2025-10-15)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        self.date_patcher = patch('budget.api.datetime.date', FakeDate)
+        self.date_patcher.start()
+        self.addCleanup(self.date_patcher.stop)
+
+        self.september = Month.objects.create(
+            month_id="2025-09", month_name="September 2025",
+            start_date=datetime.date(2025, 9, 1), end_date=datetime.date(2025, 9, 30),
+        )
+        self.october = Month.objects.create(
+            month_id="2025-10", month_name="October 2025",
+            start_date=datetime.date(2025, 10, 1), end_date=datetime.date(2025, 10, 31),
+        )
+        self.rent = BudgetItem.objects.create(item_name="Rent", item_type="expense")
+        self.salary = BudgetItem.objects.create(item_name="Salary", item_type="income")
+        self.phone = BudgetItem.objects.create(item_name="Phone", item_type="expense")
+        BudgetItemVersion.objects.create(
+            budget_item=self.rent, month=self.september, effective_from_month=self.september, value=1200,
+        )
+        BudgetItemVersion.objects.create(
+            budget_item=self.salary, month=self.october, effective_from_month=self.october, value=3000,
+        )
+
+    def _put(self, month_id, values):
+        return self.client.put(
+            f'/api/months/{month_id}/values/', json.dumps(values), content_type='application/json',
+        )
+
+    def test_applies_every_entry_and_returns_the_refreshed_month(self):
+        response = self._put('2025-10', [
+            {'budget_item_id': str(self.rent.budget_item_id), 'value': 1250},
+            {'budget_item_id': str(self.salary.budget_item_id), 'value': 3100},
+            {'budget_item_id': str(self.phone.budget_item_id), 'value': 20, 'is_one_off': True},
+        ])
+        self.assertEqual(response.status_code, 200)
+        by_name = {row['item_name']: row for row in response.json()}
+        self.assertEqual(by_name['Rent']['value'], 1250.0)
+        self.assertEqual(by_name['Rent']['effective_from_month_name'], 'October 2025')
+        self.assertEqual(by_name['Salary']['value'], 3100.0)
+        self.assertTrue(by_name['Phone']['is_one_off'])
+        # An existing row is updated in place, not duplicated.
+        self.assertEqual(BudgetItemVersion.objects.filter(budget_item=self.salary).count(), 1)
+        self.assertEqual(BudgetItemVersion.objects.filter(month=self.october).count(), 3)
+        self.assertEqual(response.json(), self.client.get('/api/months/2025-10/items/').json())
+
+    def test_one_upsert_for_the_whole_batch(self):
+        values = [
+            {'budget_item_id': str(item.budget_item_id), 'value': 1}
+            for item in (self.rent, self.salary, self.phone)
+        ]
+        # session + user, month, item existence, savepoint, the upsert, the
+        # change log entries, release, then the listing's versions and items.
+        with self.assertNumQueries(10):
+            self.assertEqual(self._put('2025-10', values).status_code, 200)
+
+    def test_past_month_is_forbidden(self):
+        response = self._put('2025-09', [{'budget_item_id': str(self.rent.budget_item_id), 'value': 1}])
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(float(BudgetItemVersion.objects.get(budget_item=self.rent).value), 1200.0)
+
+    def test_unknown_item_rejects_the_whole_batch(self):
+        response = self._put('2025-10', [
+            {'budget_item_id': str(self.salary.budget_item_id), 'value': 1},
+            {'budget_item_id': str(uuid.uuid4()), 'value': 2},
+        ])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(response.json()['budget_item_ids']), 1)
+        self.assertEqual(float(BudgetItemVersion.objects.get(budget_item=self.salary).value), 3000.0)
+
+    def test_duplicate_items_are_rejected(self):
+        entry = {'budget_item_id': str(self.rent.budget_item_id), 'value': 1}
+        self.assertEqual(self._put('2025-10', [entry, entry]).status_code, 400)
+        self.assertFalse(BudgetItemVersion.objects.filter(month=self.october, budget_item=self.rent).exists())
+
+    def test_empty_batch_just_returns_the_month(self):
+        response = self._put('2025-10', [])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['item_name'] for row in response.json()], ['Rent', 'Salary'])
+
+
+class WriteQueryCountTests(TestCase):
+    """What each write endpoint costs. Every count starts with the session and
+    user lookups; a change here should be a deliberate one."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        self.date_patcher = patch('budget.api.datetime.date', FakeDate)
+        self.date_patcher.start()
+        self.addCleanup(self.date_patcher.stop)
+
+        self.october = Month.objects.create(
+            month_id="2025-10", month_name="October 2025",
+            start_date=datetime.date(2025, 10, 1), end_date=datetime.date(2025, 10, 31),
+        )
+        self.november = Month.objects.create(
+            month_id="2025-11", month_name="November 2025",
+            start_date=datetime.date(2025, 11, 1), end_date=datetime.date(2025, 11, 30),
+        )
+        self.rent = BudgetItem.objects.create(item_name="Rent", item_type="expense")
+        self.rent_version = BudgetItemVersion.objects.create(
+            budget_item=self.rent, month=self.october, effective_from_month=self.october, value=1200,
+        )
+
+    def _json(self, method, url, data):
+        return getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+
+    def test_set_value_updates_in_one_statement(self):
+        # session + user, month, item, savepoint, upsert, change log, release.
+        with self.assertNumQueries(8):
+            response = self._json('put', f'/api/months/2025-10/items/{self.rent.budget_item_id}/value/', {'value': 1300})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['value'], 1300.0)
+        version = BudgetItemVersion.objects.get(budget_item=self.rent, month=self.october)
+        self.assertEqual(float(version.value), 1300.0)
+        # Updated in place: same row, original creation time.
+        self.assertEqual(version.budget_item_version_id, self.rent_version.budget_item_version_id)
+        self.assertEqual(version.created_at, self.rent_version.created_at)
+
+    def test_set_value_inserts_in_one_statement(self):
+        with self.assertNumQueries(8):
+            response = self._json('put', f'/api/months/2025-11/items/{self.rent.budget_item_id}/value/',
+                                  {'value': 50, 'is_one_off': True})
+        self.assertEqual(response.json()['effective_from_month_name'], 'November 2025')
+        self.assertTrue(BudgetItemVersion.objects.get(budget_item=self.rent, month=self.november).is_one_off)
+
+    def test_set_value_unknown_item_is_404(self):
+        response = self._json('put', f'/api/months/2025-10/items/{uuid.uuid4()}/value/', {'value': 1})
+        self.assertEqual(response.status_code, 404)
+
+    def test_delete_from_month_is_an_insert_or_ignore_and_one_update(self):
+        # session + user, month, savepoint, previous month INSERT OR IGNORE,
+        # item UPDATE, change log, release.
+        with self.assertNumQueries(8):
+            response = self.client.delete(f'/api/months/2025-11/items/{self.rent.budget_item_id}/')
+        self.assertEqual(response.status_code, 204)
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.last_payment_month_id, '2025-10')
+        self.assertEqual(self.rent.item_name, 'Rent')
+
+    def test_delete_from_month_creates_a_missing_previous_month(self):
+        january = Month.objects.create(
+            month_id="2026-01", month_name="January 2026",
+            start_date=datetime.date(2026, 1, 1), end_date=datetime.date(2026, 1, 31),
+        )
+        self.client.delete(f'/api/months/{january.month_id}/items/{self.rent.budget_item_id}/')
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.last_payment_month.month_name, 'December 2025')
+
+    def test_delete_from_month_unknown_item_is_404(self):
+        response = self.client.delete(f'/api/months/2025-11/items/{uuid.uuid4()}/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_edit_writes_only_the_given_columns(self):
+        # session + user, item, month existence, UPDATE, change log.
+        with self.assertNumQueries(6) as ctx:
+            response = self._json('put', f'/api/budgetitems/{self.rent.budget_item_id}/',
+                                  {'item_name': 'Mortgage', 'last_payment_month_id': '2025-11'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['last_payment_month_id'], '2025-11')
+        update = ctx.captured_queries[-2]['sql']
+        self.assertTrue(update.startswith('UPDATE'))
+        self.assertIn('"item_name"', update)
+        self.assertNotIn('"owner"', update)
+
+    def test_edit_unknown_last_payment_month_is_404(self):
+        response = self._json('put', f'/api/budgetitems/{self.rent.budget_item_id}/', {'last_payment_month_id': '2031-01'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_budget_item(self):
+        payload = {
+            'item_name': 'Gym', 'item_type': 'expense', 'owner': 'tild', 'expense_pot': '',
+            'is_tab_repayment': False, 'is_extra': False, 'calculation_type': 'fixed',
+            'value': 30, 'is_one_off': False, 'last_payment_month_id': '2025-11',
+        }
+        # session + user, month, last payment month existence, savepoint,
+        # item INSERT and its change, version INSERT and its change, release.
+        with self.assertNumQueries(10):
+            response = self._json('post', '/api/months/2025-10/budgetitems/', payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['last_payment_month_id'], '2025-11')
+
+    def test_listing_items_does_not_follow_last_payment_month(self):
+        for n in range(3):
+            BudgetItem.objects.create(item_name=f'Ending {n}', last_payment_month=self.november)
+        with self.assertNumQueries(3):
+            rows = self.client.get('/api/budgetitems/').json()
+        self.assertEqual(sum(row['last_payment_month_id'] == '2025-11' for row in rows), 3)
+
+    def test_tab_deletes_are_one_select_and_delete(self):
+        from .models import TabItem, TabRepayment
+        item = TabItem.objects.create(description='x', paid_by='keith', total_cost=2, amount_owed=1,
+                                      date_added=datetime.date(2025, 10, 1))
+        repayment = TabRepayment.objects.create(amount=1, paid_by='tild', date=datetime.date(2025, 10, 2))
+        # session + user, then the collector's SELECT (the change log's
+        # post_delete receiver needs the instance), DELETE and change log.
+        with self.assertNumQueries(5):
+            self.assertEqual(self.client.delete(f'/api/tabs/items/{item.id}/').status_code, 204)
+        with self.assertNumQueries(5):
+            self.assertEqual(self.client.delete(f'/api/tabs/repayments/{repayment.id}/').status_code, 204)
+        self.assertEqual(self.client.delete(f'/api/tabs/items/{item.id}/').status_code, 404)
+        self.assertEqual(self.client.delete(f'/api/tabs/repayments/{repayment.id}/').status_code, 404)
+
+    def test_tab_creates_are_one_insert(self):
+        # session + user, INSERT, change log.
+        with self.assertNumQueries(4):
+            self._json('post', '/api/tabs/items/', {'description': 'd', 'paid_by': 'keith', 'total_cost': 2,
+                                                    'amount_owed': 1, 'date_added': '2025-10-02'})
+        with self.assertNumQueries(4):
+            self._json('post', '/api/tabs/repayments/', {'amount': 2, 'paid_by': 'keith', 'date': '2025-10-02'})
+
+    def test_nursery_settings_put_is_one_upsert(self):
+        from .models import NurserySettings
+        for data in ({'a': 1}, {'a': 2}):
+            # session + user, savepoint, upsert, change log, release.
+            with self.assertNumQueries(6):
+                response = self._json('put', '/api/nursery/settings/', {'data': data})
+            self.assertEqual(response.json(), {'data': data})
+        self.assertEqual(NurserySettings.objects.get(user=self.user).data, {'a': 2})
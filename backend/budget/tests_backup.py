@@ -0,0 +1,98 @@
+import gzip
+import io
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from .backup import BackupError, backup_database, prune_backups, verify_backup
+
+
+class BackupDatabaseTests(SimpleTestCase):
+    """Runs against a scratch SQLite file: the Django test database is
+    in-memory, and the backup must open its own connection to a real file."""
+
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.dir = Path(scratch.name)
+        self.source = self.dir / 'db.sqlite3'
+        conn = sqlite3.connect(self.source)
+        conn.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)')
+        conn.executemany('INSERT INTO item (name) VALUES (?)', [(f'row {i}' * 20,) for i in range(2000)])
+        conn.commit()
+        conn.close()
+        self.dest = self.dir / 'backups'
+
+    def _rows(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute('SELECT COUNT(*) FROM item').fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_uncompressed_backup_is_a_working_database(self):
+        metrics = backup_database(self.source, self.dest)
+        self.assertEqual(self._rows(metrics['path']), 2000)
+        self.assertTrue(metrics['path'].endswith('.sqlite3'))
+
+    def test_copies_in_several_small_steps(self):
+        metrics = backup_database(self.source, self.dest, pages=4)
+        self.assertGreater(metrics['pages_copied'], 4)
+        self.assertGreater(metrics['steps'], 1)
+
+    def test_pauses_between_steps(self):
+        with mock.patch('budget.backup.time.sleep') as sleep:
+            metrics = backup_database(self.source, self.dest, pages=4, sleep=0.25)
+        # Not after the last step: there is nothing left to wait for.
+        self.assertEqual(sleep.call_args_list, [mock.call(0.25)] * (metrics['steps'] - 1))
+
+    def test_gzip_backup_round_trips(self):
+        metrics = backup_database(self.source, self.dest, compression='gzip')
+        self.assertTrue(metrics['path'].endswith('.sqlite3.gz'))
+        restored = self.dir / 'restored.sqlite3'
+        with gzip.open(metrics['path'], 'rb') as src:
+            restored.write_bytes(src.read())
+        self.assertEqual(self._rows(restored), 2000)
+
+    def test_writes_metrics_sidecar(self):
+        metrics = backup_database(self.source, self.dest)
+        sidecar = json.loads((self.dest / 'last_backup.json').read_text())
+        self.assertEqual(sidecar['pages_copied'], metrics['pages_copied'])
+        self.assertIsNotNone(sidecar['verify_seconds'])
+
+    def test_verification_rejects_a_corrupt_backup(self):
+        bad = self.dir / 'budgeter-bad.sqlite3'
+        bad.write_bytes(b'SQLite format 3\x00' + b'\xff' * 4096)
+        with self.assertRaises((BackupError, sqlite3.DatabaseError)):
+            verify_backup(bad, None)
+
+    def test_unknown_compression_is_rejected_before_copying(self):
+        with self.assertRaises(BackupError):
+            backup_database(self.source, self.dest, compression='lz4')
+        self.assertFalse(self.dest.exists())
+
+    def test_prune_keeps_the_newest(self):
+        self.dest.mkdir()
+        for stamp in ('20260101T000000Z', '20260102T000000Z', '20260103T000000Z'):
+            (self.dest / f'budgeter-{stamp}.sqlite3.gz').write_bytes(b'')
+        removed = prune_backups(self.dest, keep=2)
+        self.assertEqual([p.name for p in removed], ['budgeter-20260101T000000Z.sqlite3.gz'])
+        self.assertEqual(len(list(self.dest.glob('budgeter-*'))), 2)
+
+    def test_command_reports_pages_and_timings(self):
+        out = io.StringIO()
+        with mock.patch.dict('django.conf.settings.DATABASES', {'default': {'NAME': self.source}}):
+            call_command('backup_db', dest=str(self.dest), compress='gzip', keep=1, stdout=out)
+        self.assertIn('pages in', out.getvalue())
+        self.assertEqual(len(list(self.dest.glob('budgeter-*.sqlite3.gz'))), 1)
+
+    def test_command_surfaces_failures_as_command_errors(self):
+        with mock.patch.dict('django.conf.settings.DATABASES', {'default': {'NAME': self.dir / 'missing.sqlite3'}}):
+            with self.assertRaises(CommandError):
+                call_command('backup_db', dest=str(self.dest), stdout=io.StringIO())
@@ -0,0 +1,116 @@
+import datetime
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import changelog
+from .models import BudgetItem, BudgetItemVersion, Change, Month, TabItem, TabRepayment
+
+
+class ChangesAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        self.october = Month.objects.create(
+            month_id='2026-10', month_name='October 2026',
+            start_date=datetime.date(2026, 10, 1), end_date=datetime.date(2026, 10, 31),
+        )
+        self.rent = BudgetItem.objects.create(item_name='Rent', item_type='expense', owner='shared')
+        BudgetItemVersion.objects.create(
+            budget_item=self.rent, month=self.october, effective_from_month=self.october, value=1200,
+        )
+        self.since = changelog.latest_seq()
+
+    def _changes(self, since=None):
+        response = self.client.get('/api/changes/', {'since': self.since if since is None else since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _json(self, method, url, data):
+        return getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+
+    def test_nothing_new_is_an_empty_page(self):
+        body = self._changes()
+        self.assertEqual(body, {'seq': self.since, 'reset': False, 'more': False, 'changes': []})
+
+    def test_saves_are_recorded_with_current_state(self):
+        self.rent.item_name = 'Mortgage'
+        self.rent.save()
+        (change,) = self._changes()['changes']
+        self.assertEqual((change['model'], change['key'], change['op']), ('budget_item', str(self.rent.pk), 'upsert'))
+        self.assertEqual(change['data']['item_name'], 'Mortgage')
+
+    def test_bulk_upserts_are_recorded_by_item_and_month(self):
+        self._json('put', '/api/months/2026-10/values/', [{'budget_item_id': str(self.rent.pk), 'value': 1300}])
+        body = self._changes()
+        (change,) = body['changes']
+        self.assertEqual(change['key'], f'{self.rent.pk}:2026-10')
+        self.assertEqual(change['data']['value'], 1300.0)
+        self.assertEqual(body['seq'], changelog.latest_seq())
+
+    def test_delete_from_month_records_the_item(self):
+        self.client.delete(f'/api/months/2026-10/items/{self.rent.pk}/')
+        (change,) = self._changes()['changes']
+        self.assertEqual(change['model'], 'budget_item')
+        self.assertEqual(change['data']['last_payment_month_id'], '2026-09')
+
+    def test_repeated_changes_collapse_to_the_newest(self):
+        item = TabItem.objects.create(description='a', paid_by='keith', total_cost=2, amount_owed=1,
+                                      date_added=datetime.date(2026, 10, 1))
+        item.description = 'b'
+        item.save()
+        self.client.delete(f'/api/tabs/items/{item.id}/')
+        (change,) = self._changes()['changes']
+        self.assertEqual((change['model'], change['op'], change['data']), ('tab_item', 'delete', None))
+
+    def test_upsert_of_a_since_deleted_row_reads_as_delete(self):
+        repayment = TabRepayment.objects.create(amount=5, paid_by='tild', date=datetime.date(2026, 10, 2))
+        TabRepayment.objects.filter(pk=repayment.pk)._raw_delete('default')
+        (change,) = self._changes()['changes']
+        self.assertEqual(change['op'], 'delete')
+
+    def test_nursery_settings_are_only_visible_to_their_owner(self):
+        self._json('put', '/api/nursery/settings/', {'data': {'days': 3}})
+        (change,) = self._changes()['changes']
+        self.assertEqual(change['data'], {'data': {'days': 3}})
+
+        User.objects.create_user(username='other', password='p')
+        self.client.login(username='other', password='p')
+        self.assertEqual(self._changes()['changes'], [])
+
+    @override_settings(CHANGE_LOG_PAGE_SIZE=2)
+    def test_pages_resume_from_seq(self):
+        for n in range(3):
+            TabItem.objects.create(description=str(n), paid_by='keith', total_cost=2, amount_owed=1,
+                                   date_added=datetime.date(2026, 10, 1))
+        first = self._changes()
+        self.assertTrue(first['more'])
+        self.assertEqual([c['data']['description'] for c in first['changes']], ['0', '1'])
+        second = self._changes(first['seq'])
+        self.assertFalse(second['more'])
+        self.assertEqual([c['data']['description'] for c in second['changes']], ['2'])
+
+    def test_compaction_keeps_the_newest_and_resets_stale_clients(self):
+        for n in range(3):
+            TabItem.objects.create(description=str(n), paid_by='keith', total_cost=2, amount_owed=1,
+                                   date_added=datetime.date(2026, 10, 1))
+        latest = changelog.latest_seq()
+        removed = changelog.compact(retention_days=0, now=timezone.now() + datetime.timedelta(seconds=1))
+        self.assertEqual(removed, latest - 1)
+        self.assertEqual(list(Change.objects.values_list('seq', flat=True)), [latest])
+
+        stale = self._changes(0)
+        self.assertEqual((stale['reset'], stale['seq'], stale['changes']), (True, latest, []))
+        self.assertFalse(self._changes(latest - 1)['reset'])
+        self.assertTrue(self._changes(latest + 5)['reset'])
+
+    def test_compact_changes_command_respects_retention(self):
+        Change.objects.update(changed_at=timezone.now() - datetime.timedelta(days=40))
+        TabItem.objects.create(description='new', paid_by='keith', total_cost=2, amount_owed=1,
+                               date_added=datetime.date(2026, 10, 1))
+        call_command('compact_changes', days=30, stdout=io.StringIO())
+        self.assertEqual(Change.objects.count(), 1)
@@ -0,0 +1,81 @@
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from . import compaction
+from .models import BudgetItem, BudgetItemVersion, Month
+from .months import provision
+from .resolution import month_item_rows
+from .tests import FakeDate
+
+
+class CompactionTests(TestCase):
+    """Dropping versions that repeat the value already in effect (today is
+    2025-10-15; October to March are provisioned)."""
+
+    def setUp(self):
+        User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        date_patcher = patch('budget.api.datetime.date', FakeDate)
+        date_patcher.start()
+        self.addCleanup(date_patcher.stop)
+        _, self.months = provision(2025, 10, 6)
+        # Only Rent's versions are under test, not provision's auto-balance Extra.
+        BudgetItem.objects.filter(is_auto_extra=True).delete()
+        self.rent = BudgetItem.objects.create(item_name='Rent', item_type='expense', owner='shared')
+        self.ids = {}
+        for index, value, is_one_off in [(0, 1000, False), (1, 1000, False), (2, 250, True),
+                                         (3, 1000, False), (4, 1100, False), (5, 1100, False)]:
+            month = self.months[index]
+            self.ids[month.month_id] = BudgetItemVersion.objects.create(
+                budget_item=self.rent, month=month, effective_from_month=month,
+                value=value, is_one_off=is_one_off).pk
+
+    def _values(self):
+        return {month.month_id: [row['value'] for row in month_item_rows(month)]
+                for month in Month.objects.all()}
+
+    def test_drops_repeats_and_keeps_one_offs_and_the_earliest_row(self):
+        before = self._values()
+        self.assertEqual(compaction.compact(dry_run=True), 3)
+        self.assertEqual(BudgetItemVersion.objects.count(), 6)
+
+        self.assertEqual(compaction.compact(), 3)
+        self.assertEqual(
+            set(BudgetItemVersion.objects.values_list('pk', flat=True)),
+            {self.ids['2025-10'], self.ids['2025-12'], self.ids['2026-02']})
+        self.assertEqual(self._values(), before)
+        self.assertEqual(compaction.compact(), 0)
+
+    def test_rows_sharing_a_start_are_left_alone(self):
+        # A carried-over row (its month differs from its start) is never
+        # dropped, and nothing after it is judged against it.
+        BudgetItemVersion.objects.filter(pk=self.ids['2025-11']).update(effective_from_month=self.months[0])
+        self.assertEqual(compaction.redundant_versions(), [self.ids['2026-03']])
+
+    def test_compacting_on_write_is_opt_in(self):
+        url = f'/api/months/2026-03/items/{self.rent.budget_item_id}/value/'
+        self.client.put(url, json.dumps({'value': 1100}), content_type='application/json')
+        self.assertEqual(BudgetItemVersion.objects.count(), 6)
+
+        with override_settings(COMPACT_VERSIONS_ON_WRITE=True):
+            response = self.client.put(url, json.dumps({'value': 1100}), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['value'], 1100)
+        self.assertFalse(BudgetItemVersion.objects.filter(month_id__in=['2025-11', '2026-01', '2026-03']).exists())
+
+    def test_command_reports_rows_removed_and_the_speed_up(self):
+        out = io.StringIO()
+        call_command('compact_versions', dry_run=True, rounds=1, stdout=out)
+        self.assertIn('Would compact versions: 3 of 6 removed; resolving', out.getvalue())
+        self.assertIn('x faster', out.getvalue())
+        self.assertEqual(BudgetItemVersion.objects.count(), 6)
+
+        out = io.StringIO()
+        call_command('compact_versions', rounds=1, stdout=out)
+        self.assertIn('Compacted versions: 3 of 6 removed', out.getvalue())
+        self.assertEqual(BudgetItemVersion.objects.count(), 3)
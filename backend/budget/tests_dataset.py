@@ -0,0 +1,113 @@
+import datetime
+import io
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+
+import orjson
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from . import changelog, dataset
+from .models import BudgetItem, BudgetItemVersion, Change, NurserySettings, TabItem, TabRepayment
+from .months import provision
+
+
+class DatasetTests(TestCase):
+    """budget_dump / budget_load and the NDJSON format behind them."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', password='p')
+        _, months = provision(2025, 9, 3)
+        rent = BudgetItem.objects.create(item_name='Rent', item_type='expense', owner='shared',
+                                         last_payment_month=months[2])
+        for month, value in zip(months, ['1000.00', '1050.50']):
+            BudgetItemVersion.objects.create(budget_item=rent, month=month, effective_from_month=month,
+                                             value=Decimal(value))
+        TabItem.objects.create(description='Shopping', paid_by='keith', total_cost=40, amount_owed=20,
+                               date_added=datetime.date(2025, 9, 3))
+        TabRepayment.objects.create(amount=20, paid_by='tild', date=datetime.date(2025, 9, 10))
+        NurserySettings.objects.create(user=self.user, data={'days': [1, 2]})
+
+    def _dump(self):
+        out = io.BytesIO()
+        counts = dataset.dump(out)
+        return out.getvalue(), counts
+
+    def test_a_dump_loads_back_row_for_row(self):
+        body, counts = self._dump()
+        self.assertEqual(counts, {'month': 3, 'budget_item': 1, 'budget_item_version': 2,
+                                  'tab_item': 1, 'tab_repayment': 1, 'nursery_settings': 1})
+        header, *rows = [orjson.loads(line) for line in body.splitlines()]
+        self.assertEqual(header, {'format': 'budgeter-dataset', 'version': 1, 'change_seq': changelog.latest_seq()})
+        self.assertEqual([row['model'] for row in rows][:4], ['month', 'month', 'month', 'budget_item'])
+        self.assertEqual(rows[-1]['row'], {'user': 'u', 'data': {'days': [1, 2]},
+                                           'updated_at': rows[-1]['row']['updated_at']})
+
+        counts, skipped = dataset.load(io.BytesIO(body), replace=True)
+        self.assertEqual((sum(counts.values()), skipped), (9, 0))
+        # Same rows, timestamps included.
+        self.assertEqual(self._dump()[0].splitlines()[1:], body.splitlines()[1:])
+        self.assertEqual(str(BudgetItemVersion.objects.get(month_id='2025-10').value), '1050.50')
+
+    def test_loading_resets_every_client(self):
+        body, _ = self._dump()
+        seen = changelog.latest_seq()
+        dataset.load(io.BytesIO(body), replace=True)
+        self.assertEqual(Change.objects.count(), 1)
+        for since in (0, seen):
+            self.assertTrue(changelog.changes_since(since, self.user)[2])
+
+    def test_refusals(self):
+        body, _ = self._dump()
+        with self.assertRaisesMessage(dataset.DatasetError, 'already holds budget data'):
+            dataset.load(io.BytesIO(body))
+        newer = body.replace(b'"version":1', b'"version":2', 1)
+        with self.assertRaisesMessage(dataset.DatasetError, 'version 2 is not supported'):
+            dataset.load(io.BytesIO(newer), replace=True)
+        header, *lines = body.splitlines(keepends=True)
+        with self.assertRaisesMessage(dataset.DatasetError, "Unexpected 'month' rows"):
+            dataset.load(io.BytesIO(header + lines[6] + lines[0]), replace=True)
+        self.assertEqual(BudgetItem.objects.count(), 1)
+
+    def test_malformed_lines_are_refused_by_number(self):
+        body, _ = self._dump()
+        header, *lines = body.splitlines(keepends=True)
+        for bad, message in [(b'[1, 2]\n', 'Line 2 is not a JSON object.'),
+                             (b'{"model": "month"}\n', 'Line 2 needs a "model" name and a "row" object.'),
+                             (b'{"model": "month", "row": []}\n', 'Line 2 needs a "model" name')]:
+            with self.assertRaisesMessage(dataset.DatasetError, message):
+                dataset.load(io.BytesIO(header + bad + lines[0]), replace=True)
+
+    def test_rows_the_database_rejects_name_their_batch(self):
+        body, _ = self._dump()
+        header, *lines = body.splitlines(keepends=True)
+        orphan = orjson.loads(lines[3])
+        orphan['row']['last_payment_month_id'] = '2099-01'
+        unnamed = orjson.loads(lines[3])
+        unnamed['row']['item_name'] = None
+        for row, message in [(orphan, 'Lines 6-6 (budget_item):'), (unnamed, 'NOT NULL constraint failed')]:
+            with self.assertRaisesMessage(dataset.DatasetError, message):
+                dataset.load(io.BytesIO(b''.join([header, *lines[:3], b'\n', orjson.dumps(row)])), replace=True)
+        self.assertEqual(BudgetItem.objects.count(), 1)
+
+    def test_nursery_settings_need_their_user(self):
+        body, _ = self._dump()
+        self.user.username = 'someone-else'
+        self.user.save()
+        counts, skipped = dataset.load(io.BytesIO(body), replace=True)
+        self.assertEqual((counts['nursery_settings'], skipped), (0, 1))
+
+    def test_commands_round_trip_a_gzipped_dump(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / 'budget.ndjson.gz')
+            out = io.StringIO()
+            call_command('budget_dump', path, stdout=out)
+            self.assertIn('Dumped 3 month, 1 budget_item, 2 budget_item_version', out.getvalue())
+            with self.assertRaisesMessage(CommandError, 'use --replace'):
+                call_command('budget_load', path, stdout=io.StringIO())
+            out = io.StringIO()
+            call_command('budget_load', path, replace=True, stdout=out)
+        self.assertIn('Loaded 3 month, 1 budget_item, 2 budget_item_version', out.getvalue())
@@ -0,0 +1,133 @@
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from . import changelog
+from .models import BudgetItem, BudgetItemVersion, Month, NurserySettings, TabItem
+
+
+def _parse(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().splitlines())
+    return fields['event'], int(fields['id']), json.loads(fields['data'])
+
+
+@override_settings(EVENTS_POLL_SECONDS=0, EVENTS_MAX_SECONDS=5)
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', password='p')
+        self.october = Month.objects.create(
+            month_id='2026-10', month_name='October 2026',
+            start_date=datetime.date(2026, 10, 1), end_date=datetime.date(2026, 10, 31),
+        )
+        self.since = changelog.latest_seq()
+
+    async def _open(self, since=None, headers=None):
+        await self.async_client.aforce_login(self.user)
+        path = '/api/events/' if since is None else f'/api/events/?since={since}'
+        response = await self.async_client.get(path, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        return response, stream
+
+    async def test_requires_a_session(self):
+        response = await self.async_client.get('/api/events/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_headers_disable_buffering(self):
+        response, stream = await self._open(self.since)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['X-Accel-Buffering'], 'no')
+        await stream.aclose()
+
+    async def test_value_change_reports_the_effective_value(self):
+        def write():
+            gym = BudgetItem.objects.create(item_name='Gym', calculation_type='weekly_count', weekly_payment_day=4)
+            BudgetItemVersion.objects.create(
+                budget_item=gym, month=self.october, effective_from_month=self.october, value=10,
+            )
+            return gym
+        gym = await sync_to_async(write)()
+        response, stream = await self._open(self.since)
+        event, seq, data = _parse(await anext(stream))
+        await stream.aclose()
+        self.assertEqual((event, seq), ('changes', await sync_to_async(changelog.latest_seq)()))
+        self.assertIn({'type': 'item', 'budget_item_id': str(gym.pk), 'op': 'upsert'}, data)
+        # Five Thursdays in October 2026.
+        self.assertIn({'type': 'value', 'month_id': '2026-10', 'budget_item_id': str(gym.pk),
+                       'effective_value': 50.0}, data)
+
+    async def test_a_shared_value_change_reports_the_balanced_extra(self):
+        def write():
+            items = {}
+            for name, item_type, owner, value, fields in [
+                ('Extra', 'expense', 'shared', 500, {'is_extra': True, 'is_auto_extra': True}),
+                ('Salary', 'income', 'keith', 2000, {}),
+                ('Joint income', 'income', 'shared', 300, {}),
+            ]:
+                items[name] = BudgetItem.objects.create(item_name=name, item_type=item_type, owner=owner, **fields)
+                BudgetItemVersion.objects.create(
+                    budget_item=items[name], month=self.october, effective_from_month=self.october, value=value,
+                )
+            return items
+        items = await sync_to_async(write)()
+        since = await sync_to_async(changelog.latest_seq)()
+        await sync_to_async(BudgetItemVersion.objects.filter(budget_item=items['Joint income']).update)(value=900)
+        await sync_to_async(changelog.record)(
+            BudgetItemVersion, [changelog.version_key(items['Joint income'].pk, '2026-10')])
+        response, stream = await self._open(since)
+        event, seq, data = _parse(await anext(stream))
+        await stream.aclose()
+        # 500 shared out, 900 joint income in: the 400 surplus joins the buffer.
+        self.assertEqual(data[-1], {'type': 'auto_extra', 'month_id': '2026-10',
+                                    'budget_item_id': str(items['Extra'].pk), 'balanced_value': 900.0})
+
+    async def test_an_ended_item_has_no_value_where_the_listing_leaves_it_out(self):
+        def write():
+            september = Month.objects.create(
+                month_id='2026-09', month_name='September 2026',
+                start_date=datetime.date(2026, 9, 1), end_date=datetime.date(2026, 9, 30),
+            )
+            gym = BudgetItem.objects.create(item_name='Gym', last_payment_month=september)
+            BudgetItemVersion.objects.create(
+                budget_item=gym, month=self.october, effective_from_month=self.october, value=10,
+            )
+            return gym
+        gym = await sync_to_async(write)()
+        response, stream = await self._open(self.since)
+        event, seq, data = _parse(await anext(stream))
+        await stream.aclose()
+        self.assertIn({'type': 'value', 'month_id': '2026-10', 'budget_item_id': str(gym.pk),
+                       'effective_value': None}, data)
+
+    async def test_tab_change_reports_the_balance(self):
+        await sync_to_async(TabItem.objects.create)(
+            description='Shopping', paid_by='keith', total_cost=30, amount_owed=15,
+            date_added=datetime.date(2026, 10, 2),
+        )
+        response, stream = await self._open(headers={'Last-Event-ID': str(self.since)})
+        event, _, data = _parse(await anext(stream))
+        await stream.aclose()
+        self.assertEqual(data, [{'type': 'tab', 'net_balance': -15.0}])
+
+    @override_settings(EVENTS_MAX_SECONDS=0.05, EVENTS_KEEPALIVE_SECONDS=0)
+    async def test_idle_stream_sends_keepalives_then_ends(self):
+        other = await sync_to_async(User.objects.create_user)(username='other')
+        # Another user's nursery settings are not this user's business.
+        await sync_to_async(NurserySettings.objects.create)(user=other, data={})
+        response, stream = await self._open(self.since)
+        chunks = [chunk async for chunk in stream]
+        self.assertTrue(chunks)
+        self.assertEqual(set(chunks), {b': keepalive\n\n'})
+
+    async def test_compacted_history_asks_for_a_reset(self):
+        await sync_to_async(TabItem.objects.create)(
+            description='x', paid_by='keith', total_cost=2, amount_owed=1, date_added=datetime.date(2026, 10, 2),
+        )
+        response, stream = await self._open(self.since + 100)
+        event, seq, data = _parse(await anext(stream))
+        await stream.aclose()
+        self.assertEqual((event, data), ('reset', {}))
@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .api import ForecastMonthSchema
+from .models import BudgetItemVersion
+from .months import provision
+from .tests import FakeDate, make_item
+
+
+class ForecastTests(TestCase):
+    """GET /api/forecast/ (today is 2025-10-15)."""
+
+    def setUp(self):
+        User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        date_patcher = patch('budget.api.datetime.date', FakeDate)
+        date_patcher.start()
+        self.addCleanup(date_patcher.stop)
+        _, months = provision(2025, 10, 3)
+        self.october, self.december = months[0], months[2]
+        make_item(self.october, 'Salary', 'income', 'keith', 3000)
+        make_item(self.october, 'Salary', 'income', 'tild', 1000)
+        make_item(self.october, 'Rent', 'expense', 'shared', 1000)
+        # provision created the auto-balance Extra; this household's buffer is 200.
+        BudgetItemVersion.objects.filter(budget_item__is_auto_extra=True).update(value=200)
+        self.isa = make_item(self.october, 'ISA', 'savings', 'tild', 100)
+
+    def test_balances_accumulate_from_the_opening_balances(self):
+        BudgetItemVersion.objects.create(
+            budget_item=self.isa, month=self.december, effective_from_month=self.december, value=300)
+        response = self.client.get('/api/forecast/', {'months': 18, 'keith': 500, 'tild_savings': 1000})
+        self.assertEqual(response.status_code, 200)
+        months = response.json()
+        self.assertEqual(len(months), 18)
+        self.assertEqual(months[0]['month_id'], '2025-10')
+        self.assertEqual(months[-1]['month_id'], '2027-03')
+        for month in months:
+            self.assertEqual(ForecastMonthSchema.model_validate(month).model_dump(), month)
+
+        # Keith pays 75% of the 1200 shared costs out of 3000.
+        self.assertEqual(months[0]['keith'], {'remaining': 2100, 'balance': 2600, 'savings': 0, 'savings_balance': 0})
+        self.assertEqual(months[17]['keith']['balance'], 500 + 18 * 2100)
+        # The joint account holds the buffer each month.
+        self.assertEqual(months[2]['shared']['balance'], 600)
+        # Tild's ISA goes up from December.
+        self.assertEqual([m['tild']['savings_balance'] for m in months[:4]], [1100, 1200, 1500, 1800])
+        self.assertEqual(months[3]['tild']['remaining'], 1000 - 300 - 300)
+
+    def test_one_request_is_the_session_plus_two_queries(self):
+        with self.assertNumQueries(4):
+            self.client.get('/api/forecast/', {'months': 36})
+
+    def test_rejects_bad_input(self):
+        self.assertEqual(self.client.get('/api/forecast/', {'start': '2025-13'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/forecast/', {'months': 0}).status_code, 400)
+        self.assertEqual(self.client.get('/api/forecast/', {'months': 121}).status_code, 400)
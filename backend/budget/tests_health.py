@@ -1,8 +1,10 @@
 import os
 from unittest import mock
 
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 
+from . import health
 from .models import BudgetItem
 
 
@@ -11,6 +13,11 @@ class HealthEndpointTests(TestCase):
     so it must answer without a session — the rest of the API uses
     NinjaAPI(auth=django_auth), which would return 401 here."""
 
+    def setUp(self):
+        # Probe results and rate-limit windows live in the process.
+        health.clear()
+        self.addCleanup(health.clear)
+
     def test_health_is_reachable_without_authentication(self):
         response = self.client.get("/api/health")
         self.assertEqual(response.status_code, 200)
@@ -82,3 +89,103 @@ class HealthEndpointTests(TestCase):
             response = self.client.get("/api/health")
         self.assertEqual(response.status_code, 503)
         self.assertEqual(response.json()["error"], "OperationalError")
+
+
+class HealthCachingTests(TestCase):
+    def setUp(self):
+        health.clear()
+        self.addCleanup(health.clear)
+
+    def test_shallow_probe_is_reused_within_the_window(self):
+        with mock.patch.object(BudgetItem.objects, "first", wraps=BudgetItem.objects.first) as spy:
+            first = self.client.get("/api/health").json()
+            second = self.client.get("/api/health").json()
+        spy.assert_called_once()
+        self.assertFalse(first["cached"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["probe_ms"], first["probe_ms"])
+
+    @override_settings(HEALTH_CACHE_SECONDS=0)
+    def test_expired_probe_runs_again(self):
+        with mock.patch.object(BudgetItem.objects, "first", wraps=BudgetItem.objects.first) as spy:
+            self.client.get("/api/health")
+            self.client.get("/api/health")
+        self.assertEqual(spy.call_count, 2)
+
+    def _login(self):
+        self.client.force_login(User.objects.create_user(username="u"))
+
+    def test_deep_mode_reports_each_check(self):
+        self._login()
+        response = self.client.get("/api/health?deep=1")
+        self.assertEqual(response.status_code, 200)
+        checks = response.json()["checks"]
+        self.assertEqual(set(checks), {"schema", "migrations", "write", "sqlite"})
+        self.assertTrue(all(check["ok"] and "ms" in check for check in checks.values()))
+        self.assertEqual(checks["migrations"]["pending"], 0)
+        self.assertEqual(checks["sqlite"]["integrity"], "ok")
+        self.assertIn("wal_bytes", checks["sqlite"])
+
+    def test_deep_mode_is_degraded_by_pending_migrations(self):
+        self._login()
+        with mock.patch("budget.management.commands.boot.pending_migrations", return_value=["budget.9999_x"]):
+            response = self.client.get("/api/health?deep=1")
+        self.assertEqual(response.status_code, 503)
+        body = response.json()
+        self.assertEqual(body["status"], "degraded")
+        self.assertEqual(body["checks"]["migrations"], {"ok": False, "pending": 1, "ms": mock.ANY})
+        self.assertTrue(body["checks"]["schema"]["ok"])
+
+    def test_deep_and_shallow_are_cached_separately(self):
+        self._login()
+        self.client.get("/api/health")
+        self.assertIn("checks", self.client.get("/api/health?deep=1").json())
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_deep_mode_needs_a_session_or_the_metrics_token(self):
+        with mock.patch.object(health, "run", wraps=health.run) as spy:
+            self.assertEqual(self.client.get("/api/health?deep=1").status_code, 401)
+            wrong = {"Authorization": "Bearer nope"}
+            self.assertEqual(self.client.get("/api/health?deep=1", headers=wrong).status_code, 401)
+            spy.assert_not_called()
+        token = {"Authorization": "Bearer s3cret"}
+        self.assertIn("checks", self.client.get("/api/health?deep=1", headers=token).json())
+
+
+@override_settings(HEALTH_RATE_LIMIT=2)
+class HealthRateLimitTests(TestCase):
+    def setUp(self):
+        health.clear()
+        self.addCleanup(health.clear)
+
+    def test_anonymous_clients_are_limited_per_address(self):
+        codes = [self.client.get("/api/health", headers={"X-Real-IP": "10.0.0.1"}).status_code for _ in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+        limited = self.client.get("/api/health", headers={"X-Real-IP": "10.0.0.1"})
+        self.assertEqual(limited.json()["status"], "rate_limited")
+        self.assertLessEqual(int(limited["Retry-After"]), 60)
+        self.assertEqual(self.client.get("/api/health", headers={"X-Real-IP": "10.0.0.2"}).status_code, 200)
+
+    @override_settings(HEALTH_TRUSTED_PROXIES=["192.168.0.207"])
+    def test_clients_behind_a_trusted_proxy_are_told_apart(self):
+        def get(forwarded_for, peer="192.168.0.207"):
+            headers = {"X-Real-IP": peer, "X-Forwarded-For": forwarded_for}
+            return self.client.get("/api/health", headers=headers).status_code
+
+        # A client can prepend whatever it likes; only the proxy's entry counts.
+        codes = [get(f"10.9.9.{i}, 10.0.0.1, 192.168.0.207") for i in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+        self.assertEqual(get("10.0.0.2, 192.168.0.207"), 200)
+        # From anyone else, X-Forwarded-For is ignored.
+        self.assertEqual([get("10.0.0.3", peer="10.0.0.4") for _ in range(3)], [200, 200, 429])
+
+    def test_window_resets(self):
+        self.assertTrue(health.rate_limit("c", now=0)[0])
+        self.assertTrue(health.rate_limit("c", now=1)[0])
+        self.assertEqual(health.rate_limit("c", now=2), (False, 58))
+        self.assertTrue(health.rate_limit("c", now=60)[0])
+
+    def test_sessions_are_not_limited(self):
+        self.client.force_login(User.objects.create_user(username="u"))
+        codes = {self.client.get("/api/health").status_code for _ in range(4)}
+        self.assertEqual(codes, {200})
@@ -0,0 +1,79 @@
+import datetime
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .models import BudgetItem, IdempotencyKey, Month, TabItem, TabRepayment
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', password='p')
+        self.client.force_login(self.user)
+        self.item = {'description': 'Milk', 'paid_by': 'tild', 'total_cost': 2.0,
+                     'amount_owed': 1.0, 'date_added': '2026-10-03'}
+
+    def _post(self, url, data, key=None):
+        headers = {'Idempotency-Key': key} if key else {}
+        return self.client.post(url, json.dumps(data), content_type='application/json', headers=headers)
+
+    def test_retry_replays_the_stored_response_without_inserting(self):
+        first = self._post('/api/tabs/items/', self.item, key='k1')
+        self.assertEqual(first.status_code, 200)
+        # session + user, then the key lookup alone.
+        with self.assertNumQueries(3):
+            retry = self._post('/api/tabs/items/', self.item, key='k1')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(TabItem.objects.count(), 1)
+
+    def test_without_a_key_every_request_inserts(self):
+        self._post('/api/tabs/items/', self.item)
+        self._post('/api/tabs/items/', self.item)
+        self.assertEqual(TabItem.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_reused_for_a_different_body_is_rejected(self):
+        self._post('/api/tabs/items/', self.item, key='k1')
+        response = self._post('/api/tabs/items/', {**self.item, 'total_cost': 3.0}, key='k1')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(TabItem.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        self._post('/api/tabs/repayments/', {'amount': 5, 'paid_by': 'keith', 'date': '2026-10-03'}, key='k1')
+        self.client.force_login(User.objects.create_user(username='other'))
+        self._post('/api/tabs/repayments/', {'amount': 5, 'paid_by': 'keith', 'date': '2026-10-03'}, key='k1')
+        self.assertEqual(TabRepayment.objects.count(), 2)
+
+    def test_expired_keys_run_again_and_are_purged(self):
+        self._post('/api/tabs/items/', self.item, key='k1')
+        IdempotencyKey.objects.update(created_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        response = self._post('/api/tabs/items/', self.item, key='k1')
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(TabItem.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_errors_are_not_stored(self):
+        Month.objects.create(month_id='2026-10', month_name='October 2026',
+                             start_date=datetime.date(2026, 10, 1), end_date=datetime.date(2026, 10, 31))
+        BudgetItem.objects.create(item_name='Extra', is_auto_extra=True)
+        payload = {'item_name': 'Extra 2', 'item_type': 'expense', 'owner': 'shared', 'expense_pot': '',
+                   'is_tab_repayment': False, 'is_extra': True, 'is_auto_extra': True,
+                   'calculation_type': 'fixed', 'value': 10, 'is_one_off': False}
+        response = self._post('/api/months/2026-10/budgetitems/', payload, key='k1')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        BudgetItem.objects.filter(is_auto_extra=True).delete()
+        created = self._post('/api/months/2026-10/budgetitems/', payload, key='k1')
+        self.assertEqual(created.status_code, 200)
+        replay = self._post('/api/months/2026-10/budgetitems/', payload, key='k1')
+        self.assertEqual(replay.json(), created.json())
+        self.assertEqual(BudgetItem.objects.filter(item_name='Extra 2').count(), 1)
+
+    def test_overlong_key_is_rejected(self):
+        response = self._post('/api/tabs/items/', self.item, key='x' * 256)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TabItem.objects.exists())
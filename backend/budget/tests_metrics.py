@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from . import metrics
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.dir = scratch.name
+        overrides = override_settings(METRICS_DIR=self.dir, METRICS_TOKEN='s3cret')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+
+class RegistryTests(MetricsTestCase):
+    def test_counter_and_histogram_render_in_prometheus_format(self):
+        metrics.inc('budgeter_requests_total', {'route': 'get_tabs', 'method': 'GET', 'status': '200'})
+        metrics.observe('budgeter_request_duration_seconds', 0.02, {'route': 'get_tabs', 'method': 'GET'})
+        text = metrics.render()
+        self.assertIn('# TYPE budgeter_requests_total counter', text)
+        self.assertIn('budgeter_requests_total{method="GET",route="get_tabs",status="200"} 1', text)
+        self.assertIn('budgeter_request_duration_seconds_bucket{method="GET",route="get_tabs",le="0.01"} 0', text)
+        self.assertIn('budgeter_request_duration_seconds_bucket{method="GET",route="get_tabs",le="0.025"} 1', text)
+        self.assertIn('budgeter_request_duration_seconds_bucket{method="GET",route="get_tabs",le="+Inf"} 1', text)
+        self.assertIn('budgeter_request_duration_seconds_count{method="GET",route="get_tabs"} 1', text)
+
+    def test_totals_are_summed_across_worker_files(self):
+        metrics.inc('budgeter_db_queries_total', {'route': 'get_tabs'}, 3)
+        # Another live worker's file (our parent process is certainly alive).
+        other = {'counters': [['budgeter_db_queries_total', [['route', 'get_tabs']], 4]], 'histograms': []}
+        with open(os.path.join(self.dir, f'{os.getppid()}.json'), 'w') as f:
+            json.dump(other, f)
+        self.assertIn('budgeter_db_queries_total{route="get_tabs"} 7', metrics.render())
+
+    def test_exited_workers_are_archived_not_lost(self):
+        dead_pid = 2 ** 22 + 12345  # above pid_max, so never alive
+        dead = {'counters': [['budgeter_sqlite_locked_total', [], 2]], 'histograms': []}
+        with open(os.path.join(self.dir, f'{dead_pid}.json'), 'w') as f:
+            json.dump(dead, f)
+        self.assertIn('budgeter_sqlite_locked_total 2', metrics.render())
+        self.assertFalse(os.path.exists(os.path.join(self.dir, f'{dead_pid}.json')))
+        # Scraping again must not count the archived total twice.
+        self.assertIn('budgeter_sqlite_locked_total 2', metrics.render())
+
+    def test_cache_hits_and_misses(self):
+        metrics.cache_hit('health')
+        metrics.cache_hit('health')
+        metrics.cache_miss('health')
+        text = metrics.render()
+        self.assertIn('budgeter_cache_requests_total{cache="health",result="hit"} 2', text)
+        self.assertIn('budgeter_cache_requests_total{cache="health",result="miss"} 1', text)
+
+
+class MetricsEndpointTests(MetricsTestCase):
+    def test_requests_are_recorded_per_route(self):
+        self.client.get('/api/health')
+        staff = User.objects.create_user(username='admin', password='p', is_staff=True)
+        self.client.force_login(staff)
+        text = self.client.get('/api/metrics').content.decode()
+        self.assertIn('budgeter_requests_total{method="GET",route="health",status="200"} 1', text)
+        self.assertIn('budgeter_request_duration_seconds_count{method="GET",route="health"} 1', text)
+
+    def test_anonymous_is_rejected(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 401)
+
+    def test_non_staff_session_is_rejected(self):
+        User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        self.assertEqual(self.client.get('/api/metrics').status_code, 401)
+
+    def test_bearer_token_is_accepted(self):
+        response = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_wrong_token_is_rejected(self):
+        response = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer nope')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_token_access_disabled_when_unset(self):
+        response = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, 401)
+
+    def test_last_backup_is_exposed_as_gauges(self):
+        last = {'finished_at': '2026-01-01T00:00:00+00:00', 'total_seconds': 1.5, 'pages_copied': 42, 'bytes': 1000}
+        with mock.patch('budget.api.read_last_backup_metrics', return_value=last):
+            text = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer s3cret').content.decode()
+        self.assertIn('budgeter_backup_pages_copied 42', text)
+        self.assertIn('budgeter_backup_duration_seconds 1.5', text)
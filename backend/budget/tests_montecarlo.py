@@ -0,0 +1,83 @@
+import json
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from . import forecast, montecarlo, scenarios
+from .months import provision
+from .tests import make_item
+
+
+class MonteCarloTests(TestCase):
+    """POST /api/scenarios/monte-carlo; the history runs from 2026-01 and
+    the simulations from 2026-07."""
+
+    def setUp(self):
+        User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        _, self.months = provision(2026, 1, 7)
+        jan = self.months[0]
+        make_item(jan, 'Salary', 'income', 'keith', [3000, 3000, 3200])
+        make_item(jan, 'Salary', 'income', 'tild', 1000)
+        make_item(jan, 'Rent', 'expense', 'shared', [1000, 1000, 1100])
+        self.groceries = make_item(jan, 'Groceries', 'expense', 'shared', [400, 450, 380, 420], expense_pot='groceries')
+        self.cleaner = make_item(jan, 'Cleaner', 'expense', 'keith', 20, calculation_type='weekly_count',
+                                 weekly_payment_day=4)
+
+    def _run(self, **data):
+        return self.client.post('/api/scenarios/monte-carlo', json.dumps({'start': '2026-07', **data}),
+                                content_type='application/json')
+
+    def test_without_variance_every_band_is_the_forecast(self):
+        response = self._run(fit=False, paths=50, months=12, keith=100, savings=10)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['variable_items'], [])
+        expected = forecast.project(scenarios.History.load(), 2026, 7, 12, opening={'keith': 100})
+        for month, projected in zip(body['months'], expected):
+            self.assertEqual(month['month_id'], projected['month_id'])
+            for band in ('shared', 'keith', 'tild'):
+                self.assertEqual(set(month[band].values()), {projected[band]['balance']})
+            self.assertEqual(month['savings']['p50'], 10)
+
+    def test_fitted_and_configured_variance_spread_the_bands(self):
+        response = self._run(paths=2000, seed=7, deviations=[
+            {'budget_item_id': str(self.cleaner.budget_item_id), 'sd': 5}])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        variable = {item['item_name']: item for item in body['variable_items']}
+        # Planned steps (Keith's raise, the rent rise) are not variance.
+        self.assertEqual(set(variable), {'Groceries', 'Cleaner'})
+        self.assertTrue(variable['Groceries']['fitted'])
+        # The April value rolls on through May and June.
+        self.assertAlmostEqual(variable['Groceries']['sd'], float(np.std([400, 450, 380, 420, 420, 420], ddof=1)))
+        self.assertEqual(variable['Cleaner'], {
+            'budget_item_id': str(self.cleaner.budget_item_id), 'item_name': 'Cleaner', 'sd': 5, 'fitted': False})
+
+        last = body['months'][-1]
+        self.assertEqual(last['month_id'], '2028-06')
+        self.assertLess(last['keith']['p5'], last['keith']['p50'])
+        self.assertLess(last['keith']['p50'], last['keith']['p95'])
+        # Contributions absorb shared spending, so the joint account holds.
+        self.assertEqual(last['shared']['p5'], last['shared']['p95'])
+        self.assertEqual(self._run(paths=2000, seed=7, deviations=[
+            {'budget_item_id': str(self.cleaner.budget_item_id), 'sd': 5}]).json(), body)
+
+    def test_batches_split_one_seeded_run(self):
+        history = scenarios.History.load()
+        arrays = montecarlo.prepare(history.resolve(2026, 7, 6), {self.groceries.budget_item_id: 30.0})
+        bands = montecarlo.simulate(arrays, 2500, seed=3)
+        self.assertEqual(bands['keith'].shape, (len(montecarlo.PERCENTILES), 6))
+        again = montecarlo.simulate(arrays, 2500, seed=3)
+        for band in montecarlo.BANDS:
+            np.testing.assert_array_equal(again[band], bands[band])
+
+    def test_rejects_bad_input(self):
+        self.assertEqual(self._run(paths=0).status_code, 400)
+        self.assertEqual(self._run(paths=montecarlo.MAX_PATHS + 1).status_code, 400)
+        self.assertEqual(self._run(months=0).status_code, 400)
+        self.assertEqual(self._run(deviations=[
+            {'budget_item_id': str(self.groceries.budget_item_id), 'sd': -1}]).status_code, 400)
+        self.assertEqual(self._run(deviations=[
+            {'budget_item_id': '00000000-0000-0000-0000-000000000000', 'sd': 1}]).status_code, 404)
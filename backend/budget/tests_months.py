@@ -0,0 +1,74 @@
+import datetime
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from .api import calculate_weekly_occurrences
+from .models import BudgetItem, Month
+from .months import month_fields, provision, weekday_occurrences
+
+
+class WeekdayCountTests(TestCase):
+    def test_matches_the_calendar_walk_for_every_month(self):
+        for year in range(2024, 2031):
+            for month_num in range(1, 13):
+                counts = month_fields(year, month_num)['weekday_counts']
+                expected = [calculate_weekly_occurrences(year, month_num, day) for day in range(1, 8)]
+                self.assertEqual(counts, expected, f'{year}-{month_num:02d}')
+
+    def test_months_without_counts_are_worked_out(self):
+        month = Month(start_date=datetime.date(2026, 10, 1))
+        self.assertEqual(weekday_occurrences(month, 4), 5)  # October 2026 has five Thursdays
+        self.assertEqual(weekday_occurrences(month, 0), 0)
+
+
+class ProvisionTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+
+    def _post(self, data):
+        return self.client.post('/api/months/provision/', json.dumps(data), content_type='application/json')
+
+    def test_creates_the_range_in_one_insert_across_a_year_end(self):
+        Month.objects.create(**{**month_fields(2026, 12), 'month_name': 'Christmas 2026'})
+        created, months = provision(2026, 11, 3)
+        self.assertEqual(created, 2)
+        self.assertEqual([m.month_id for m in months], ['2026-11', '2026-12', '2027-01'])
+        self.assertEqual(months[0].month_name, 'November 2026')
+        self.assertEqual(months[0].end_date, datetime.date(2026, 11, 30))
+        self.assertEqual(months[1].month_name, 'Christmas 2026')  # existing rows are left alone
+
+    def test_endpoint_reports_what_it_created(self):
+        response = self._post({'start': '2026-10', 'count': 24})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['created'], 24)
+        self.assertEqual(body['months'][-1], {'month_id': '2028-09', 'month_name': 'September 2028'})
+        self.assertTrue(BudgetItem.objects.filter(is_auto_extra=True).exists())
+        # session + user, existing count, INSERT OR IGNORE, the months, and
+        # the auto-balance Extra lookup (cached per worker outside tests).
+        with self.assertNumQueries(6):
+            self.assertEqual(self._post({'start': '2026-10', 'count': 24}).json()['created'], 0)
+
+    def test_rejects_bad_input(self):
+        self.assertEqual(self._post({'start': '2026-13'}).status_code, 400)
+        self.assertEqual(self._post({'count': 0}).status_code, 400)
+        self.assertEqual(self._post({'count': 121}).status_code, 400)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('provision_months', start='2027-01', count=12, stdout=out)
+        self.assertIn('2027-01..2027-12: 12 created', out.getvalue())
+        self.assertEqual(Month.objects.count(), 12)
+        # Boot runs this on a fresh database: the auto-balance Extra starts
+        # with the first month, not with whoever opens one.
+        extra = BudgetItem.objects.get(is_auto_extra=True)
+        self.assertEqual(extra.versions.get().month_id, '2027-01')
+
+    def test_past_months_get_no_auto_extra(self):
+        provision(2020, 1, 3)
+        self.assertFalse(BudgetItem.objects.filter(is_auto_extra=True).exists())
@@ -0,0 +1,99 @@
+import datetime
+import pstats
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from . import profiling
+from .models import Month, BudgetItem, BudgetItemVersion, RequestProfile
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.dir = Path(scratch.name)
+        overrides = override_settings(PROFILE_DIR=self.dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.staff = User.objects.create_user(username='admin', password='p', is_staff=True, is_superuser=True)
+        self.month = Month.objects.create(
+            month_id='2026-06', month_name='June 2026',
+            start_date=datetime.date(2026, 6, 1), end_date=datetime.date(2026, 6, 30),
+        )
+        item = BudgetItem.objects.create(item_name='Rent', item_type='expense', owner='shared')
+        BudgetItemVersion.objects.create(
+            budget_item=item, month=self.month, effective_from_month=self.month, value=100,
+        )
+        self.url = f'/api/months/{self.month.month_id}/items/'
+
+    def test_staff_query_flag_writes_a_cprofile_file(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {'profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get(id=response['X-Profile-Id'])
+        self.assertEqual(profile.endpoint, 'list_budget_items_for_month')
+        self.assertEqual(profile.mode, 'cprofile')
+        self.assertTrue(profile.filename.endswith('.prof'))
+        self.assertGreater(profile.queries, 0)
+        stats = pstats.Stats(str(profile.file_path))
+        self.assertTrue(any(func[2] == 'list_budget_items_for_month' for func in stats.stats))
+
+    def test_overlapping_cprofile_requests_fall_back_to_sampling(self):
+        self.client.force_login(self.staff)
+        # As if another thread of the worker were mid-request under cProfile.
+        self.assertTrue(profiling._cprofile_lock.acquire(blocking=False))
+        try:
+            response = self.client.get(self.url, {'profile': '1'})
+        finally:
+            profiling._cprofile_lock.release()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RequestProfile.objects.get(id=response['X-Profile-Id']).mode, 'sample')
+
+        # The lock is handed back after each cProfile request.
+        for _ in range(2):
+            response = self.client.get(self.url, {'profile': '1'})
+            self.assertEqual(RequestProfile.objects.get(id=response['X-Profile-Id']).mode, 'cprofile')
+        self.assertFalse(profiling._cprofile_lock.locked())
+
+    def test_header_with_sampling_writes_collapsed_stacks(self):
+        self.client.force_login(self.staff)
+        with override_settings(PROFILE_SAMPLE_INTERVAL=0.0001):
+            response = self.client.get(self.url, HTTP_X_PROFILE='sample')
+        profile = RequestProfile.objects.get(id=response['X-Profile-Id'])
+        self.assertTrue(profile.filename.endswith('.collapsed'))
+        for line in profile.file_path.read_text().splitlines():
+            stack, count = line.rsplit(' ', 1)
+            self.assertTrue(int(count) > 0 and stack)
+
+    def test_non_staff_requests_are_never_profiled(self):
+        User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        response = self.client.get(self.url, {'profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_unflagged_requests_are_not_profiled(self):
+        self.client.force_login(self.staff)
+        self.assertNotIn('X-Profile-Id', self.client.get(self.url))
+
+    @override_settings(PROFILE_KEEP=2)
+    def test_old_profiles_and_their_files_are_pruned(self):
+        self.client.force_login(self.staff)
+        for _ in range(3):
+            self.client.get(self.url, {'profile': '1'})
+        self.assertEqual(RequestProfile.objects.count(), 2)
+        self.assertEqual(len(list(self.dir.iterdir())), 2)
+
+    def test_admin_lists_and_downloads_profiles(self):
+        self.client.force_login(self.staff)
+        profile_id = self.client.get(self.url, {'profile': '1'})['X-Profile-Id']
+        listing = self.client.get('/admin/budget/requestprofile/')
+        self.assertContains(listing, f'/admin/budget/requestprofile/{profile_id}/download/')
+        download = self.client.get(f'/admin/budget/requestprofile/{profile_id}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attachment', download['Content-Disposition'])
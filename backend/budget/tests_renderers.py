@@ -0,0 +1,99 @@
+import datetime
+import decimal
+import io
+import json
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase
+
+from .api import api
+from .models import Month, BudgetItem, BudgetItemVersion, TabItem
+from .renderers import ORJSONRenderer, json_backend
+
+
+class ORJSONRendererTests(TestCase):
+    def test_native_and_fallback_types(self):
+        item_id = uuid.uuid4()
+        data = {
+            'id': item_id,
+            'amount': decimal.Decimal('12.50'),
+            'date': datetime.date(2026, 6, 1),
+            'at': datetime.datetime(2026, 6, 1, 9, 30, tzinfo=datetime.timezone.utc),
+            'span': datetime.timedelta(days=1),
+            3: 'non-str key',
+        }
+        rendered = json.loads(ORJSONRenderer().render(None, data, response_status=200))
+        self.assertEqual(rendered['id'], str(item_id))
+        self.assertEqual(rendered['amount'], '12.50')
+        self.assertEqual(rendered['date'], '2026-06-01')
+        self.assertEqual(rendered['at'], '2026-06-01T09:30:00Z')
+        self.assertEqual(rendered['span'], 'P1DT00H00M00S')
+        self.assertEqual(rendered['3'], 'non-str key')
+
+    def test_unknown_backend_is_a_configuration_error(self):
+        with self.assertRaises(ImproperlyConfigured):
+            json_backend('ujson')
+
+
+class BackendParityTests(TestCase):
+    """Both backends must put the same bytes-equivalent JSON on the wire."""
+
+    def setUp(self):
+        User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        self.month = Month.objects.create(
+            month_id='2026-06', month_name='June 2026',
+            start_date=datetime.date(2026, 6, 1), end_date=datetime.date(2026, 6, 30),
+        )
+        for name in ('Rent', 'Water'):
+            item = BudgetItem.objects.create(item_name=name, item_type='expense', owner='shared')
+            BudgetItemVersion.objects.create(
+                budget_item=item, month=self.month, effective_from_month=self.month, value=100.5,
+            )
+        TabItem.objects.create(
+            description='Shopping', paid_by='keith', total_cost=decimal.Decimal('30.00'),
+            amount_owed=decimal.Decimal('15.00'), date_added=datetime.date(2026, 6, 2),
+        )
+        original = (api.renderer, api.parser)
+        self.addCleanup(lambda: setattr(api, 'renderer', original[0]) or setattr(api, 'parser', original[1]))
+
+    def _get_with(self, backend, path):
+        api.renderer, api.parser = json_backend(backend)
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_month_items_and_tabs_match(self):
+        for path in (f'/api/months/{self.month.month_id}/items/', '/api/tabs/'):
+            with self.subTest(path=path):
+                self.assertEqual(self._get_with('orjson', path), self._get_with('json', path))
+
+    def test_orjson_parser_reads_bodies_and_rejects_garbage(self):
+        api.renderer, api.parser = json_backend('orjson')
+        response = self.client.post(
+            '/api/tabs/items/',
+            data=json.dumps({'description': 'Milk', 'paid_by': 'tild', 'total_cost': 2.0,
+                             'amount_owed': 1.0, 'date_added': '2026-06-03'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['description'], 'Milk')
+        response = self.client.post('/api/tabs/items/', data='{not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class BenchSerializationCommandTests(TestCase):
+    def test_reports_every_backend_for_both_endpoints(self):
+        User.objects.create_superuser(username='admin', password='p')
+        Month.objects.create(
+            month_id='2026-06', month_name='June 2026',
+            start_date=datetime.date(2026, 6, 1), end_date=datetime.date(2026, 6, 30),
+        )
+        out = io.StringIO()
+        call_command('bench_serialization', iterations=2, stdout=out)
+        lines = out.getvalue().splitlines()[1:]
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(all(line.rstrip().endswith('%') for line in lines))
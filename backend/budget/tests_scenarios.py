@@ -0,0 +1,114 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .models import BudgetItem, BudgetItemVersion, Month
+from .months import provision
+from .tests import make_item
+from .totals import balance_auto_extra
+
+
+class SimulateScenarioTests(TestCase):
+    """POST /api/scenarios/simulate resolves months exactly as the listing
+    does, with the changes applied in memory only."""
+
+    def setUp(self):
+        User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        _, months = provision(2026, 1, 6)
+        self.jan, self.mar = months[0], months[2]
+        self.keith_salary = make_item(self.jan, 'Salary', 'income', 'keith', 3000)
+        make_item(self.jan, 'Salary', 'income', 'tild', 1000)
+        self.rent = make_item(self.jan, 'Rent', 'expense', 'shared', 1200, expense_pot='bills')
+        make_item(self.jan, 'Extra', 'expense', 'shared', 500, is_extra=True, is_auto_extra=True)
+        self.cleaner = make_item(
+            self.jan, 'Cleaner', 'expense', 'keith', 20, calculation_type='weekly_count', weekly_payment_day=4)
+        BudgetItemVersion.objects.create(
+            budget_item=self.rent, month=self.mar, effective_from_month=self.mar, value=1300)
+
+    def _simulate(self, **data):
+        return self.client.post('/api/scenarios/simulate', json.dumps({'start': '2026-01', **data}),
+                                content_type='application/json')
+
+    def _totals(self, response):
+        return {month['month_id']: month['totals'] for month in response.json()['months']}
+
+    def test_no_changes_matches_the_month_listing(self):
+        response = self._simulate(months=6)
+        self.assertEqual(response.status_code, 200)
+        simulated = {month['month_id']: month for month in response.json()['months']}
+        self.assertEqual(list(simulated), [f'2026-{m:02d}' for m in range(1, 7)])
+        for month in Month.objects.all():
+            with self.subTest(month=month.month_id):
+                rows = self.client.get(f'/api/months/{month.month_id}/items/').json()
+                self.assertEqual(simulated[month.month_id]['totals'], balance_auto_extra(rows))
+                extra = next(row for row in rows if row['is_auto_extra'])
+                self.assertEqual(simulated[month.month_id]['balanced_extra'], extra['balanced_value'])
+
+    def test_changes_apply_from_their_month_without_writing(self):
+        versions = BudgetItemVersion.objects.count()
+        response = self._simulate(
+            months=4,
+            values=[{'budget_item_id': str(self.rent.budget_item_id), 'from_month': '2026-02', 'value': 1000}],
+            end_items=[{'budget_item_id': str(self.cleaner.budget_item_id), 'last_month': '2026-02'}],
+            new_items=[{'item_name': 'Car', 'item_type': 'expense', 'owner': 'shared',
+                        'from_month': '2026-04', 'value': 250}],
+        )
+        self.assertEqual(response.status_code, 200)
+        totals = self._totals(response)
+        self.assertEqual(totals['2026-01']['shared_total'], 1700)
+        self.assertEqual(totals['2026-02']['shared_total'], 1500)
+        # The real March version still overrides the scenario's February one.
+        self.assertEqual(totals['2026-03']['shared_total'], 1800)
+        self.assertEqual(totals['2026-04']['shared_total'], 2050)
+        self.assertEqual(totals['2026-01']['keith_direct_expenses'], 20 * 5)  # five Thursdays
+        self.assertEqual(totals['2026-03']['keith_direct_expenses'], 0)
+        self.assertEqual(BudgetItemVersion.objects.count(), versions)
+        self.assertFalse(BudgetItem.objects.filter(item_name='Car').exists())
+
+    def test_unpadded_month_ids_are_normalised(self):
+        padded = self._simulate(
+            start='2026-01', months=4,
+            values=[{'budget_item_id': str(self.rent.budget_item_id), 'from_month': '2026-02', 'value': 1000}],
+            end_items=[{'budget_item_id': str(self.cleaner.budget_item_id), 'last_month': '2026-03'}],
+        )
+        unpadded = self._simulate(
+            start='2026-1', months=4,
+            values=[{'budget_item_id': str(self.rent.budget_item_id), 'from_month': '2026-2', 'value': 1000}],
+            end_items=[{'budget_item_id': str(self.cleaner.budget_item_id), 'last_month': '2026-3'}],
+        )
+        self.assertEqual(unpadded.status_code, 200)
+        self.assertEqual(unpadded.json(), padded.json())
+        totals = self._totals(unpadded)
+        self.assertEqual(totals['2026-02']['shared_total'], 1500)
+        self.assertEqual(totals['2026-04']['keith_direct_expenses'], 0)
+
+    def test_salary_changes_shift_the_split(self):
+        response = self._simulate(months=2, salaries=[{'owner': 'tild', 'from_month': '2026-02', 'value': 3000}])
+        totals = self._totals(response)
+        self.assertEqual(totals['2026-01']['tild_proportion'], 0.25)
+        self.assertEqual(totals['2026-02']['tild_proportion'], 0.5)
+
+    def test_salary_for_someone_without_one_adds_it(self):
+        self.keith_salary.delete()
+        totals = self._totals(self._simulate(months=1, salaries=[
+            {'owner': 'keith', 'from_month': '2026-01', 'value': 1000}]))
+        self.assertEqual(totals['2026-01']['keith_income'], 1000)
+        self.assertEqual(totals['2026-01']['keith_proportion'], 0.5)
+
+    def test_horizon_is_two_queries_beyond_the_session(self):
+        with self.assertNumQueries(4):
+            response = self._simulate(months=36)
+        self.assertEqual(len(response.json()['months']), 36)
+
+    def test_rejects_bad_input(self):
+        self.assertEqual(self._simulate(months=0).status_code, 400)
+        self.assertEqual(self._simulate(months=121).status_code, 400)
+        self.assertEqual(self._simulate(salaries=[{'owner': 'shared', 'from_month': '2026-01', 'value': 1}]).status_code, 400)
+        self.assertEqual(self._simulate(end_items=[
+            {'budget_item_id': str(self.rent.budget_item_id), 'last_month': '2026-13'}]).status_code, 400)
+        response = self._simulate(values=[
+            {'budget_item_id': '00000000-0000-0000-0000-000000000000', 'from_month': '2026-01', 'value': 1}])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['budget_item_ids'], ['00000000-0000-0000-0000-000000000000'])
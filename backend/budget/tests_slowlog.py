@@ -0,0 +1,58 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from .models import Month, BudgetItem, BudgetItemVersion, SlowQuery
+from .slowlog import explain, save_records
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        self.month = Month.objects.create(
+            month_id='2026-06', month_name='June 2026',
+            start_date=datetime.date(2026, 6, 1), end_date=datetime.date(2026, 6, 30),
+        )
+        item = BudgetItem.objects.create(item_name='Rent', item_type='expense', owner='shared')
+        BudgetItemVersion.objects.create(
+            budget_item=item, month=self.month, effective_from_month=self.month, value=100,
+        )
+
+    def test_disabled_by_default(self):
+        self.client.get(f'/api/months/{self.month.month_id}/items/')
+        self.assertFalse(SlowQuery.objects.exists())
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_records_statements_with_endpoint_params_and_plan(self):
+        with self.assertLogs('budget.slowquery', level='WARNING'):
+            self.client.get(f'/api/months/{self.month.month_id}/items/')
+        record = SlowQuery.objects.filter(sql__contains='FROM "budget_budgetitemversion"').first()
+        self.assertIsNotNone(record)
+        self.assertEqual(record.endpoint, 'list_budget_items_for_month')
+        self.assertIn('budget_budgetitemversion', record.plan)
+        # Lookups before the view runs (the session) are attributed to the path.
+        self.assertTrue(SlowQuery.objects.filter(endpoint=f'/api/months/{self.month.month_id}/items/').exists())
+
+    @override_settings(SLOW_QUERY_MS=60_000)
+    def test_fast_statements_are_not_recorded(self):
+        self.client.get(f'/api/months/{self.month.month_id}/items/')
+        self.assertFalse(SlowQuery.objects.exists())
+
+    @override_settings(SLOW_QUERY_LOG_SIZE=3)
+    def test_table_is_trimmed_to_the_newest_rows(self):
+        for i in range(5):
+            save_records([{'sql': f'SELECT {i}', 'params': '', 'duration_ms': 1.0, 'endpoint': 'x', 'plan': ''}])
+        self.assertEqual(
+            list(SlowQuery.objects.order_by('id').values_list('sql', flat=True)),
+            ['SELECT 2', 'SELECT 3', 'SELECT 4'],
+        )
+
+    def test_explain_shows_an_index_lookup(self):
+        plan = explain('SELECT * FROM "budget_month" WHERE "month_id" = %s', ['2026-06'])
+        self.assertIn('budget_month', plan)
+        self.assertIn('INDEX', plan.upper())
+
+    def test_explain_skips_non_queries(self):
+        self.assertEqual(explain('BEGIN', None), '')
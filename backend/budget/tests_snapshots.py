@@ -0,0 +1,105 @@
+import gzip
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from . import snapshots, stamps
+from .models import BudgetItem, BudgetItemVersion
+from .months import provision
+from .tests import FakeDate
+from .totals import MONTH_ITEMS_STAMP
+
+
+class MonthSnapshotTests(TestCase):
+    """Closed months served from frozen snapshots (today is 2025-10-15;
+    July to November are provisioned, July to September are closed)."""
+
+    def setUp(self):
+        User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        date_patcher = patch('budget.api.datetime.date', FakeDate)
+        date_patcher.start()
+        self.addCleanup(date_patcher.stop)
+        for name in ('snapshots', 'stamps'):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            setattr(self, f'{name}_dir', Path(directory.name))
+        settings_override = override_settings(
+            MONTH_SNAPSHOTS=True, SNAPSHOT_DIR=self.snapshots_dir, SNAPSHOT_ACCEL_PREFIX='',
+            CACHE_STAMP_DIR=self.stamps_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        _, self.months = provision(2025, 7, 5)
+        self.rent = BudgetItem.objects.create(item_name='Rent', item_type='expense', owner='shared')
+        self.phone = BudgetItem.objects.create(item_name='Phone', item_type='expense', owner='keith')
+        for item, index, value in [(self.rent, 0, 1000), (self.rent, 2, 1100), (self.phone, 1, 30)]:
+            month = self.months[index]
+            BudgetItemVersion.objects.create(budget_item=item, month=month, effective_from_month=month, value=value)
+
+    def _list(self, month_id):
+        return self.client.get(f'/api/months/{month_id}/items/')
+
+    def test_a_closed_month_is_frozen_on_first_listing(self):
+        with override_settings(MONTH_SNAPSHOTS=False):
+            live = self._list('2025-09').json()
+        first = self._list('2025-09')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(json.loads(first.content), live)
+
+        path = self.snapshots_dir / '2025-09.json'
+        self.assertEqual(json.loads(path.read_bytes()), live)
+        self.assertEqual(gzip.decompress((self.snapshots_dir / '2025-09.json.gz').read_bytes()), path.read_bytes())
+        # Session, user and month: nothing is resolved.
+        with self.assertNumQueries(3):
+            self.assertEqual(json.loads(self._list('2025-09').content), live)
+
+    def test_open_months_are_never_frozen(self):
+        self.assertEqual(self._list('2025-10').status_code, 200)
+        self.assertEqual(snapshots.snapshotted(), [])
+
+    def test_nginx_sends_the_file_when_a_prefix_is_set(self):
+        self._list('2025-08')
+        with override_settings(SNAPSHOT_ACCEL_PREFIX='/_snapshots/'):
+            response = self._list('2025-08')
+        self.assertEqual(response['X-Accel-Redirect'], '/_snapshots/2025-08.json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, b'')
+
+    def test_writes_drop_the_snapshots_they_reach(self):
+        call_command('close_months', stdout=io.StringIO())
+        self.assertEqual(sorted(snapshots.snapshotted()), ['2025-07', '2025-08', '2025-09'])
+
+        # This month's values reach no closed month.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f'/api/months/2025-10/items/{self.rent.budget_item_id}/value/',
+                            json.dumps({'value': 1200}), content_type='application/json')
+        self.assertEqual(len(snapshots.snapshotted()), 3)
+
+        # Renaming Phone changes August onwards.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f'/api/budgetitems/{self.phone.budget_item_id}/',
+                            json.dumps({'item_name': 'Mobile'}), content_type='application/json')
+        self.assertEqual(snapshots.snapshotted(), ['2025-07'])
+        self.assertEqual(self._list('2025-09').json()[0]['item_name'], 'Mobile')
+
+    def test_a_snapshot_rendered_across_a_write_is_discarded(self):
+        stamp = snapshots.current_stamp()
+        stamps._bump_now(MONTH_ITEMS_STAMP)
+        self.assertFalse(snapshots.write('2025-09', b'[]', stamp))
+        self.assertEqual(list(self.snapshots_dir.iterdir()), [])
+
+    def test_close_months_freezes_the_missing_ones(self):
+        self._list('2025-07')
+        out = io.StringIO()
+        call_command('close_months', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Closed months: 2 snapshots written, 1 already frozen.')
+        out = io.StringIO()
+        call_command('close_months', rebuild=True, stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Closed months: 3 snapshots written, 0 already frozen.')
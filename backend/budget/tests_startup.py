@@ -0,0 +1,70 @@
+import io
+import os
+from unittest import mock
+
+from allauth.socialaccount.models import SocialApp
+from django.contrib.sites.models import Site
+from django.core.management import call_command
+from django.test import TestCase
+
+from .management.commands.boot import pending_migrations
+
+OAUTH_ENV = {
+    "ADDON_DOMAIN": "budgeter.example",
+    "GOOGLE_CLIENT_ID": "client-id",
+    "GOOGLE_CLIENT_SECRET": "client-secret",
+}
+
+
+class SetupOAuthTests(TestCase):
+    """setup_oauth runs on every container start; a restart with nothing
+    changed must not write, so it only costs the reads."""
+
+    def _run(self, **overrides):
+        out = io.StringIO()
+        with mock.patch.dict(os.environ, dict(OAUTH_ENV, **overrides)):
+            call_command("setup_oauth", stdout=out)
+        return out.getvalue()
+
+    def test_first_run_configures_site_and_app(self):
+        self._run()
+        self.assertEqual(Site.objects.get(id=1).domain, "budgeter.example")
+        app = SocialApp.objects.get(provider="google")
+        self.assertEqual((app.client_id, app.secret), ("client-id", "client-secret"))
+        self.assertTrue(app.sites.filter(id=1).exists())
+
+    def test_second_run_writes_nothing(self):
+        self._run()
+        with mock.patch.object(Site, "save") as site_save, \
+                mock.patch.object(SocialApp, "save") as app_save:
+            output = self._run()
+        site_save.assert_not_called()
+        app_save.assert_not_called()
+        self.assertIn("unchanged", output)
+
+    def test_changed_secret_is_written(self):
+        self._run()
+        self._run(GOOGLE_CLIENT_SECRET="rotated")
+        self.assertEqual(SocialApp.objects.get(provider="google").secret, "rotated")
+
+
+class BootCommandTests(TestCase):
+    def test_no_pending_migrations_on_the_test_database(self):
+        self.assertEqual(pending_migrations(), [])
+
+    def test_skips_migrate_when_nothing_is_pending(self):
+        out = io.StringIO()
+        with mock.patch.dict(os.environ, OAUTH_ENV), \
+                mock.patch("budget.management.commands.boot.call_command", wraps=call_command) as spy:
+            call_command("boot", stdout=out)
+        called = [c.args[0] for c in spy.call_args_list]
+        self.assertEqual(called, ["setup_oauth", "compact_changes", "provision_months", "close_months"])
+        self.assertIn("[boot] migration check:", out.getvalue())
+        self.assertIn("[boot] total:", out.getvalue())
+
+    def test_runs_migrate_when_something_is_pending(self):
+        with mock.patch.dict(os.environ, OAUTH_ENV), \
+                mock.patch("budget.management.commands.boot.pending_migrations", return_value=["budget.9999_x"]), \
+                mock.patch("budget.management.commands.boot.call_command") as spy:
+            call_command("boot", stdout=io.StringIO())
+        self.assertEqual([c.args[0] for c in spy.call_args_list], ["migrate", "setup_oauth", "compact_changes", "provision_months", "close_months"])
@@ -0,0 +1,63 @@
+import datetime
+import re
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from .models import Month, BudgetItem, BudgetItemVersion
+
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', password='p')
+        self.client.login(username='u', password='p')
+        self.month = Month.objects.create(
+            month_id='2026-06', month_name='June 2026',
+            start_date=datetime.date(2026, 6, 1), end_date=datetime.date(2026, 6, 30),
+        )
+        for name in ('Rent', 'Council Tax', 'Water'):
+            item = BudgetItem.objects.create(item_name=name, item_type='expense', owner='shared')
+            BudgetItemVersion.objects.create(
+                budget_item=item, month=self.month, effective_from_month=self.month, value=100,
+            )
+
+    def _server_timing(self, response):
+        return dict(
+            (m.group(1), m.group(2))
+            for m in re.finditer(r'(\w+);dur=([\d.]+)', response['Server-Timing'])
+        )
+
+    def test_server_timing_header_reports_every_phase(self):
+        response = self.client.get(f'/api/months/{self.month.month_id}/items/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(self._server_timing(response)), {'db', 'app', 'ser', 'total'})
+        queries = int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+        self.assertGreater(queries, 0)
+
+    def test_query_count_matches_what_the_database_saw(self):
+        with self.assertNumQueries(5):
+            # session + user, month, items, prefetched versions.
+            response = self.client.get(f'/api/months/{self.month.month_id}/items/')
+        self.assertIn('desc="5 queries"', response['Server-Timing'])
+
+    def test_access_line_names_the_endpoint(self):
+        with self.assertLogs('budget.requests', level='INFO') as logs:
+            self.client.get(f'/api/months/{self.month.month_id}/items/')
+        line = logs.output[0]
+        self.assertIn('endpoint=list_budget_items_for_month', line)
+        self.assertIn('status=200', line)
+        self.assertRegex(line, r'queries=\d+ db_ms=[\d.]+ app_ms=[\d.]+ ser_ms=[\d.]+ total_ms=[\d.]+')
+
+    @override_settings(REQUEST_TIMING_THRESHOLDS={'list_budget_items_for_month': {'queries': 1}})
+    def test_threshold_breach_logs_the_offending_sql(self):
+        with self.assertLogs('budget.requests', level='WARNING') as logs:
+            self.client.get(f'/api/months/{self.month.month_id}/items/')
+        warning = next(o for o in logs.output if o.startswith('WARNING'))
+        self.assertIn('exceeded thresholds: queries', warning)
+        self.assertIn('budget_budgetitemversion', warning)
+
+    @override_settings(REQUEST_TIMING_THRESHOLDS={'get_tabs': {'queries': 1}})
+    def test_thresholds_are_per_endpoint(self):
+        with self.assertLogs('budget.requests', level='INFO') as logs:
+            self.client.get(f'/api/months/{self.month.month_id}/items/')
+        self.assertFalse([o for o in logs.output if o.startswith('WARNING')])
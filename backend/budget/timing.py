@@ -0,0 +1,174 @@
+"""Per-request query counting and timing.
+
+RequestTimingMiddleware wraps each request in `connection.execute_wrapper`,
+so every SQL statement is counted and timed. Ninja views are registered
+through TimedRouter, which marks the moment the view function returns: the
+time after that (schema validation, model_dump, JSON rendering) is reported
+as serialization, and what is left after the database is Python compute.
+
+The result goes out as a `Server-Timing` header (visible in the browser's
+network panel), one `key=value` line on the `budget.requests` logger, and
+the per-route counters and histograms in budget.metrics.
+Requests over the thresholds in settings.REQUEST_TIMING_THRESHOLDS log a
+warning that includes the slowest and most repeated SQL, which is where an
+N+1 shows up.
+"""
+
+import functools
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from ninja import Router
+
+from . import metrics
+
+logger = logging.getLogger('budget.requests')
+
+# Bound the per-request statement list: a runaway N+1 should be logged, not
+# allowed to eat the worker's memory.
+MAX_RECORDED_STATEMENTS = 500
+DEFAULT_THRESHOLDS = {'queries': 25, 'ms': 1000}
+WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class RequestTiming:
+    """Query and phase timings for one request. Also the execute_wrapper."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoint = None
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = []
+        self.view_finished_at = None
+        self.db_seconds_at_view_end = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as e:
+            if 'locked' in str(e):
+                metrics.inc('budgeter_sqlite_locked_total')
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += elapsed
+            if len(self.statements) < MAX_RECORDED_STATEMENTS:
+                self.statements.append((sql, elapsed))
+            if sql.lstrip()[:6].upper() in WRITE_VERBS:
+                metrics.observe('budgeter_sqlite_write_seconds', elapsed)
+
+    def view_finished(self):
+        self.view_finished_at = time.perf_counter()
+        self.db_seconds_at_view_end = self.db_seconds
+
+    def finish(self):
+        """Freeze the timings. Returns (total, db, compute, serialize) in seconds."""
+        total = time.perf_counter() - self.started
+        serialize = 0.0
+        if self.view_finished_at is not None:
+            after_view = time.perf_counter() - self.view_finished_at
+            # Lazy relations resolved by the schema query the database too;
+            # that belongs to db, not to serialization.
+            serialize = max(0.0, after_view - (self.db_seconds - self.db_seconds_at_view_end))
+        compute = max(0.0, total - self.db_seconds - serialize)
+        return total, self.db_seconds, compute, serialize
+
+
+def timed_view(view_func):
+    """Record which endpoint ran and when its view function returned."""
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        timing = getattr(request, 'timing', None)
+        if timing is None:
+            return view_func(request, *args, **kwargs)
+        timing.endpoint = view_func.__name__
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            # A view that renders its own response marks this itself.
+            if timing.view_finished_at is None:
+                timing.view_finished()
+    return wrapper
+
+
+class TimedRouter(Router):
+    """Router whose operations all go through `timed_view`."""
+
+    def add_api_operation(self, path, methods, view_func, **kwargs):
+        return super().add_api_operation(path, methods, timed_view(view_func), **kwargs)
+
+
+def parse_server_timing(header):
+    """{'db': ms, 'app': ms, 'ser': ms, 'total': ms} from a Server-Timing header."""
+    return {name: float(ms) for name, ms in re.findall(r'(\w+);dur=([\d.]+)', header)}
+
+
+def thresholds_for(endpoint):
+    configured = getattr(settings, 'REQUEST_TIMING_THRESHOLDS', {})
+    merged = dict(DEFAULT_THRESHOLDS)
+    merged.update(configured.get('default', {}))
+    if endpoint:
+        merged.update(configured.get(endpoint, {}))
+    return merged
+
+
+def _offending_sql(statements, limit=5):
+    repeated = Counter(sql for sql, _ in statements).most_common(limit)
+    slowest = sorted(statements, key=lambda s: s[1], reverse=True)[:limit]
+    lines = ['  most repeated:']
+    lines += [f'    {count}x {sql}' for sql, count in repeated]
+    lines.append('  slowest:')
+    lines += [f'    {elapsed * 1000:.1f} ms {sql}' for sql, elapsed in slowest]
+    return '\n'.join(lines)
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        request.timing = timing
+        with connection.execute_wrapper(timing):
+            response = self.get_response(request)
+        total, db, compute, serialize = timing.finish()
+
+        response['Server-Timing'] = (
+            f'db;dur={db * 1000:.1f};desc="{timing.queries} queries", '
+            f'app;dur={compute * 1000:.1f}, '
+            f'ser;dur={serialize * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+        endpoint = timing.endpoint or '-'
+        # Non-ninja views (admin, allauth) share one route label to keep the
+        # metric's cardinality bounded.
+        metrics.observe_request(
+            timing.endpoint or 'other', request.method, response.status_code,
+            total, timing.queries, db,
+        )
+        logger.info(
+            'method=%s path=%s endpoint=%s status=%s queries=%d db_ms=%.1f app_ms=%.1f ser_ms=%.1f total_ms=%.1f',
+            request.method, request.path, endpoint, response.status_code,
+            timing.queries, db * 1000, compute * 1000, serialize * 1000, total * 1000,
+        )
+
+        limits = thresholds_for(timing.endpoint)
+        exceeded = []
+        if timing.queries > limits['queries']:
+            exceeded.append(f"queries {timing.queries} > {limits['queries']}")
+        if total * 1000 > limits['ms']:
+            exceeded.append(f"total {total * 1000:.0f} ms > {limits['ms']} ms")
+        if exceeded:
+            logger.warning(
+                '%s %s (%s) exceeded thresholds: %s\n%s',
+                request.method, request.path, endpoint, ', '.join(exceeded),
+                _offending_sql(timing.statements),
+            )
+        return response
@@ -0,0 +1,97 @@
+"""A month's totals and the auto-balance Extra's balanced value.
+
+Mirrors frontend/src/hooks/useBudgetTotals.js (and the joint Remaining in
+App.jsx): joint income pays the shared outgoings first and the two salaries
+cover the shortfall in proportion, so the joint Remaining lands on the Extra
+items' total. The auto-balance Extra's stored value is the buffer the joint
+account should keep; when joint income alone more than covers the shared
+outgoings, the surplus lands in it too. `balanced_value` is what it actually
+comes to.
+
+Works on rows shaped like resolution.resolve_month_rows', in one pass.
+"""
+
+MONTH_ITEMS_STAMP = 'month_items'
+PEOPLE = ('keith', 'tild')
+
+
+def month_totals(rows):
+    """The month's totals, keyed like the hook's (snake_cased)."""
+    salary = dict.fromkeys(PEOPLE, 0.0)
+    income = dict.fromkeys(PEOPLE, 0.0)
+    direct = dict.fromkeys(PEOPLE, 0.0)
+    savings = dict.fromkeys(PEOPLE, 0.0)
+    tab = dict.fromkeys(PEOPLE, 0.0)
+    shared_income = shared_total = extra_total = shared_savings = 0.0
+    bills_pot = groceries_pot = 0.0
+    for row in rows:
+        value = row['effective_value']
+        owner, item_type = row['owner'], row['item_type']
+        if row['expense_pot'] == 'bills':
+            bills_pot += value
+        elif row['expense_pot'] == 'groceries':
+            groceries_pot += value
+        if owner == 'shared':
+            if item_type == 'income':
+                shared_income += value
+            elif item_type == 'expense':
+                shared_total += value
+                if row['is_extra']:
+                    extra_total += value
+            elif item_type == 'savings':
+                shared_savings += value
+        elif owner in income:
+            if item_type == 'income':
+                income[owner] += value
+                if row['item_name'].lower() == 'salary':
+                    salary[owner] += value
+            elif item_type == 'expense':
+                (tab if row['is_tab_repayment'] else direct)[owner] += value
+            elif item_type == 'savings':
+                savings[owner] += value
+
+    total_salary = salary['keith'] + salary['tild']
+    keith_proportion = salary['keith'] / total_salary if total_salary > 0 else 0.5
+    tild_proportion = salary['tild'] / total_salary if total_salary > 0 else 0.5
+    shared_expense_total = shared_total - extra_total
+    shared_funded_total = max(0.0, shared_total + shared_savings - shared_income)
+    keith_share = shared_funded_total * keith_proportion
+    tild_share = shared_funded_total * tild_proportion
+    return {
+        'keith_share': keith_share,
+        'tild_share': tild_share,
+        'keith_proportion': keith_proportion,
+        'tild_proportion': tild_proportion,
+        'keith_remaining': income['keith'] - direct['keith'] - savings['keith'] - keith_share - tab['keith'] + tab['tild'],
+        'tild_remaining': income['tild'] - direct['tild'] - savings['tild'] - tild_share - tab['tild'] + tab['keith'],
+        'keith_income': income['keith'],
+        'tild_income': income['tild'],
+        'keith_direct_expenses': direct['keith'],
+        'tild_direct_expenses': direct['tild'],
+        'keith_savings': savings['keith'],
+        'tild_savings': savings['tild'],
+        'shared_savings': shared_savings,
+        'keith_tab_repayment': tab['keith'],
+        'tild_tab_repayment': tab['tild'],
+        'bills_pot_total': bills_pot,
+        'groceries_pot_total': groceries_pot,
+        'shared_total': shared_total,
+        'shared_expense_total': shared_expense_total,
+        'shared_funded_total': shared_funded_total,
+        'extra_total': extra_total,
+        'shared_income': shared_income,
+        'shared_remaining': shared_income + shared_funded_total - shared_expense_total - shared_savings,
+    }
+
+
+def balance_auto_extra(rows):
+    """Set `balanced_value` on the month's auto-balance Extra row, if it has
+    one: the joint Remaining less any other Extra items. Returns the totals."""
+    totals = month_totals(rows)
+    for row in rows:
+        # The item form only allows a shared expense Extra; anything else
+        # never reaches the joint Remaining, so there is nothing to balance.
+        if row['is_auto_extra'] and row['owner'] == 'shared' and row['item_type'] == 'expense' and row['is_extra']:
+            other_extras = totals['extra_total'] - row['effective_value']
+            row['balanced_value'] = round(totals['shared_remaining'] - other_extras, 2)
+    return totals
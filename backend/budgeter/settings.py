@@ -6,6 +6,8 @@ import os
 import sys
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -57,6 +59,11 @@ SITE_ID = 1
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # Outside the timing middleware, so saving slow-query records is not
+    # counted against the request they describe.
+    'budget.slowlog.SlowQueryMiddleware',
+    # Early, so session and auth queries count towards the request's totals.
+    'budget.timing.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,6 +72,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "allauth.account.middleware.AccountMiddleware",
+    # Needs request.user, so after AuthenticationMiddleware.
+    'budget.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'budgeter.urls'
@@ -159,6 +168,8 @@ CORS_ALLOWED_ORIGINS = [
 ]
 if _domain and _domain != "localhost":
     CORS_ALLOWED_ORIGINS.append(f"https://{_domain}")
+# The Vite dev server is cross-origin, so it may only send headers listed here.
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 CSRF_TRUSTED_ORIGINS = list(CORS_ALLOWED_ORIGINS)
 
@@ -171,6 +182,102 @@ if not DEBUG:
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
 
+# Per-request timing (budget/timing.py). A request over either limit logs a
+# warning with its slowest and most repeated SQL. Keys are view function names;
+# 'default' applies to everything not listed.
+REQUEST_TIMING_THRESHOLDS = {
+    'default': {'queries': 25, 'ms': 1000},
+    'list_budget_items_for_month': {'queries': 10},
+    'get_tabs': {'queries': 10},
+}
+
+# JSON renderer/parser for the API (budget/renderers.py): 'orjson' or 'json'.
+API_JSON_BACKEND = os.environ.get('API_JSON_BACKEND') or 'orjson'
+
+# Opt-in slow-query log (budget/slowlog.py): statements slower than this many
+# milliseconds are logged with their EXPLAIN QUERY PLAN and kept in the admin.
+SLOW_QUERY_MS = float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else None
+SLOW_QUERY_LOG_SIZE = 200
+
+# On-demand profiling (budget/profiling.py): staff add `?profile=1` (cProfile)
+# or `?profile=sample` to an /api/ request. Profiles are listed in the admin.
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR') or db_path.parent / 'profiles')
+PROFILE_KEEP = 50
+PROFILE_SAMPLE_INTERVAL = 0.001
+
+# Delta sync change log (budget/changelog.py): GET /api/changes/ pages through
+# at most CHANGE_LOG_PAGE_SIZE entries; `compact_changes` (run at boot) drops
+# entries older than CHANGE_LOG_RETENTION_DAYS.
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('CHANGE_LOG_RETENTION_DAYS') or 30)
+CHANGE_LOG_PAGE_SIZE = 500
+
+# Live updates (budget/events.py): how often each open /api/events/ stream
+# polls the change log, how long it may sit silent before a keepalive, and
+# how long a stream lives before the browser is made to reconnect.
+EVENTS_POLL_SECONDS = 1.0
+EVENTS_KEEPALIVE_SECONDS = 15.0
+EVENTS_MAX_SECONDS = 300.0
+
+# /api/health (budget/health.py): probe results are reused for this many
+# seconds (shallow / ?deep=1), and unauthenticated callers get
+# HEALTH_RATE_LIMIT requests a minute per client address. Requests arriving
+# from an address in HEALTH_TRUSTED_PROXIES (comma-separated, e.g. the Nginx
+# Proxy Manager in front of prod) are keyed on the client it forwarded for;
+# unset, everyone behind a proxy shares that proxy's allowance.
+HEALTH_CACHE_SECONDS = 5
+HEALTH_DEEP_CACHE_SECONDS = 30
+HEALTH_RATE_LIMIT = 60
+HEALTH_TRUSTED_PROXIES = [a.strip() for a in os.environ.get('HEALTH_TRUSTED_PROXIES', '').split(',') if a.strip()]
+
+# Create requests sent with an Idempotency-Key header (budget/idempotency.py)
+# replay their stored response to retries for this long.
+IDEMPOTENCY_KEY_TTL_HOURS = 24
+
+# Drop the item's redundant versions (budget/compaction.py) whenever its
+# values are saved. Off by default: compacting changes how far a later edit
+# of an earlier month reaches.
+COMPACT_VERSIONS_ON_WRITE = os.environ.get('COMPACT_VERSIONS_ON_WRITE', '') == '1'
+
+# Per-worker caches invalidated through stamp files here (budget/stamps.py).
+# Off under the test runner, whose rollbacks bypass the invalidating signals.
+CACHE_STAMP_DIR = Path(os.environ.get('CACHE_STAMP_DIR') or '/tmp/budgeter-stamps')
+CROSS_WORKER_CACHES = not _running_tests
+
+# Closed months' listings are frozen to JSON files here (budget/snapshots.py)
+# and, when SNAPSHOT_ACCEL_PREFIX is set, handed to nginx to send through an
+# internal location of that prefix (the Docker image sets it). That location
+# aliases NGINX_SNAPSHOT_DIR (nginx.conf), so with a prefix set SNAPSHOT_DIR
+# is not read from the environment. Off under the test runner, like the
+# worker caches.
+NGINX_SNAPSHOT_DIR = Path('/tmp/budgeter-snapshots')
+SNAPSHOT_ACCEL_PREFIX = os.environ.get('SNAPSHOT_ACCEL_PREFIX', '')
+if SNAPSHOT_ACCEL_PREFIX:
+    SNAPSHOT_DIR = NGINX_SNAPSHOT_DIR
+else:
+    SNAPSHOT_DIR = Path(os.environ.get('SNAPSHOT_DIR') or NGINX_SNAPSHOT_DIR)
+MONTH_SNAPSHOTS = not _running_tests
+
+# Prometheus metrics (budget/metrics.py). Workers share totals through files
+# here; /api/metrics is open to staff sessions or `Authorization: Bearer
+# $METRICS_TOKEN` (token access is disabled when it is unset).
+METRICS_DIR = Path(os.environ.get('METRICS_DIR') or '/tmp/budgeter-metrics')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One access line per request at INFO; the test run only wants warnings.
+        'budget': {
+            'handlers': ['console'],
+            'level': 'WARNING' if _running_tests else os.environ.get('BUDGET_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 # Allauth settings
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
@@ -15,10 +15,14 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from budget import events
 from budget.api import api
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # A plain async view ahead of the ninja router: it streams, and in
+    # production it is served by uvicorn rather than gunicorn (see run.sh).
+    path('api/events/', events.stream),
     path('api/', api.urls),
     path('accounts/', include('allauth.urls')),
 ]
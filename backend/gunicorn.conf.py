@@ -0,0 +1,142 @@
+"""Gunicorn settings, resolved from the GUNICORN_* variables in envars.yml.
+
+run.sh passes this file with `-c`. Every variable is optional: an empty or
+absent value falls back to a default derived from the CPUs the container may
+actually use, so the same image sizes itself on the homelab box and a laptop.
+Deliberately stdlib-only, and every resolver takes an explicit `environ` so
+tests/test_gunicorn_conf.py can exercise it without gunicorn installed.
+"""
+import logging
+import os
+import time
+
+WORKER_CLASSES = ("sync", "gthread")
+
+DEFAULT_WORKER_CLASS = "gthread"
+DEFAULT_THREADS = 4
+DEFAULT_MAX_REQUESTS = 1000
+DEFAULT_TIMEOUT = 60
+# SQLite serialises writers, so piling on processes past this buys nothing but
+# memory — each worker holds its own Django + allauth + ninja import.
+MAX_WORKERS = 8
+
+_log = logging.getLogger("gunicorn.error")
+_boot_started = time.monotonic()
+
+
+def _env(environ):
+    return os.environ if environ is None else environ
+
+
+def _int(environ, name, default):
+    """Read a positive int. Empty, "null" (what envars emits for an unset
+    value) and anything unparsable all fall back to the default rather than
+    refusing to boot the container."""
+    raw = _env(environ).get(name, "").strip()
+    try:
+        value = int(raw)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def container_cpus(cpu_max_path="/sys/fs/cgroup/cpu.max"):
+    """CPUs this process may use. os.cpu_count() reports the host's cores even
+    under `docker run --cpus`, so the cgroup v2 quota wins when one is set."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open(cpu_max_path) as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, max(1, -(-int(quota) // int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def resolve_worker_class(environ=None):
+    value = _env(environ).get("GUNICORN_WORKER_CLASS", "").strip()
+    return value if value in WORKER_CLASSES else DEFAULT_WORKER_CLASS
+
+
+def resolve_workers(environ=None, cpus=None):
+    """sync workers serve one request each, so they follow the classic
+    2 x CPUs + 1; gthread workers get their concurrency from threads, so one
+    per CPU (minimum two, so a recycling worker never leaves nobody serving)."""
+    cpus = container_cpus() if cpus is None else cpus
+    if resolve_worker_class(environ) == "sync":
+        default = 2 * cpus + 1
+    else:
+        default = max(2, cpus)
+    return _int(environ, "GUNICORN_WORKERS", min(default, MAX_WORKERS))
+
+
+def resolve_threads(environ=None):
+    if resolve_worker_class(environ) == "sync":
+        return 1
+    return _int(environ, "GUNICORN_THREADS", DEFAULT_THREADS)
+
+
+def resolve_max_requests(environ=None):
+    return _int(environ, "GUNICORN_MAX_REQUESTS", DEFAULT_MAX_REQUESTS)
+
+
+def resolve_preload(environ=None):
+    """On unless the value is exactly "false" — a stray "0" or "no" keeps the
+    default, matching how deploy_config treats its toggles."""
+    return _env(environ).get("GUNICORN_PRELOAD", "").strip() != "false"
+
+
+def resolve_timeout(environ=None):
+    return _int(environ, "GUNICORN_TIMEOUT", DEFAULT_TIMEOUT)
+
+
+bind = "unix:/tmp/gunicorn.sock"
+accesslog = "-"
+worker_class = resolve_worker_class()
+workers = resolve_workers()
+threads = resolve_threads()
+max_requests = resolve_max_requests()
+# Spread recycling out so the workers never all restart on the same request.
+max_requests_jitter = max_requests // 10
+preload_app = resolve_preload()
+timeout = resolve_timeout()
+
+
+def when_ready(server):
+    _log.info(
+        "Master ready in %.0f ms (worker_class=%s workers=%d threads=%d "
+        "max_requests=%d preload=%s)",
+        (time.monotonic() - _boot_started) * 1000,
+        worker_class, workers, threads, max_requests, preload_app,
+    )
+
+
+def pre_fork(server, worker):
+    # Set in the master, inherited by the child across fork().
+    worker.fork_started = time.monotonic()
+
+
+def post_fork(server, worker):
+    # With preload_app the master imported Django before forking. Nothing
+    # should have opened a database connection by then, but if something did,
+    # a SQLite handle shared across processes corrupts silently — drop it.
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    _log.info(
+        "Worker %d ready in %.0f ms",
+        worker.pid, (time.monotonic() - worker.fork_started) * 1000,
+    )
+
+
+def worker_exit(server, worker):
+    # Recycled workers hand their last second of metrics over before exiting.
+    from budget import metrics
+    metrics.flush(force=True)
@@ -94,9 +94,14 @@ const App = () => {
     const fetchData = useCallback(async (date) => {
         setIsLoading(true);
         try {
-            await apiService.createOrGetMonth(date);
-
-            const items = await apiService.getBudgetItemsForMonth(formatDate(date, 'YYYY-MM'));
+            const monthId = formatDate(date, 'YYYY-MM');
+            // Boot provisions the months ahead, so only a month outside that
+            // run (far back or far ahead) is created, on its first visit.
+            let items = await apiService.getBudgetItemsForMonth(monthId);
+            if (items === null) {
+                await apiService.createOrGetMonth(date);
+                items = await apiService.getBudgetItemsForMonth(monthId);
+            }
             setBudgetItems(items);
         } catch (error) {
             console.error(error);
@@ -66,6 +66,11 @@ const BudgetItemRow = ({ item, onEditCategory, onDelete, isEditingDisabled = fal
                             Weekly on {DAY_CHOICES[item.weekly_payment_day] || 'unknown day'}{item.occurrences != null ? ` · ${item.occurrences} occurrences` : ''}
                         </p>
                     )}
+                    {item.is_auto_extra && item.balanced_value != null && item.balanced_value !== value && (
+                        <p className="text-[11px] text-gray-400 mt-0.5">
+                            Joint income surplus brings it to £{item.balanced_value.toFixed(2)} this month
+                        </p>
+                    )}
                 </div>
                 <div className="relative flex-shrink-0 flex items-center justify-end">
                     <span className={`text-sm font-semibold num text-right ${amountColor} ${isClickable ? 'transition-opacity md:group-hover:opacity-0' : ''}`}>£{value.toFixed(2)}</span>
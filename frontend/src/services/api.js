@@ -23,6 +23,8 @@ const apiService = {
     },
     async getBudgetItemsForMonth(monthId) {
         const response = await fetch(`${API_BASE_URL}/months/${monthId}/items/`, { credentials: 'include' });
+        // No such month yet: the caller creates it with createOrGetMonth.
+        if (response.status === 404) return null;
         if (!response.ok) throw new Error('Failed to fetch budget items');
         return await response.json();
     },
@@ -0,0 +1,78 @@
+"""Bytes on the wire for one cold load of the app shell.
+
+Fetches index.html, every script, stylesheet, preload, icon and manifest it
+references, once per Accept-Encoding, and reports what actually came over
+the wire (urllib does not decompress, so the body length is the transfer
+size). Run it before and after a change to nginx.conf or the Docker build's
+precompression step:
+
+    python3 page_weight.py http://192.168.0.191:8081/
+
+Stdlib-only, like deploy_config, so tests/ can exercise it without invoke.
+"""
+import sys
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+ENCODINGS = ("identity", "gzip", "br")
+LINK_RELS = {"stylesheet", "modulepreload", "preload", "manifest", "icon", "apple-touch-icon"}
+
+
+class _AssetParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.paths = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script" and attrs.get("src"):
+            self.paths.append(attrs["src"])
+        elif tag == "link" and attrs.get("href") and LINK_RELS & set((attrs.get("rel") or "").split()):
+            self.paths.append(attrs["href"])
+
+
+def asset_urls(html, base_url):
+    """Absolute, de-duplicated URLs of the assets `html` makes the browser fetch."""
+    parser = _AssetParser()
+    parser.feed(html)
+    seen = []
+    for path in parser.paths:
+        url = urljoin(base_url, path)
+        if url not in seen:
+            seen.append(url)
+    return seen
+
+
+def fetch(url, encoding):
+    """(transfer bytes, Content-Encoding, Cache-Control) for one request."""
+    request = urllib.request.Request(url, headers={"Accept-Encoding": encoding})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        body = response.read()
+        return len(body), response.headers.get("Content-Encoding", ""), response.headers.get("Cache-Control", "")
+
+
+def measure(base_url, fetch=fetch):
+    """{encoding: [(url, bytes, content_encoding, cache_control), ...]} for the
+    shell page and its assets."""
+    request = urllib.request.Request(base_url, headers={"Accept-Encoding": "identity"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        html = response.read().decode("utf-8", "replace")
+    urls = [base_url] + asset_urls(html, base_url)
+    return {encoding: [(url, *fetch(url, encoding)) for url in urls] for encoding in ENCODINGS}
+
+
+def report(results):
+    lines = []
+    for encoding, rows in results.items():
+        lines.append(f"Accept-Encoding: {encoding}")
+        for url, size, content_encoding, cache_control in rows:
+            lines.append(f"  {size:>9}  {content_encoding or '-':<4}  {cache_control or '-':<40}  {url}")
+        lines.append(f"  {sum(row[1] for row in rows):>9}  total")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python3 page_weight.py <base url>")
+    print(report(measure(sys.argv[1])))
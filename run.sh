@@ -6,20 +6,30 @@ if [ -z "$ADDON_DOMAIN" ] || [ "$ADDON_DOMAIN" == "null" ]; then
     export ADDON_DOMAIN=$(hostname)
 fi
 
-echo "Running database migrations..."
-./manage.py migrate --no-input
+# One Django start-up for every pre-flight step: migrate only when the plan is
+# non-empty, then setup_oauth (which only writes rows that changed). Static
+# files were collected into the image at build time.
+./manage.py boot
 
-./manage.py setup_oauth
-
-echo "Collecting static files..."
-./manage.py collectstatic --no-input
+# Optional scheduled online backup (budget/backup.py); off unless
+# BACKUP_INTERVAL_HOURS is set. Destination, compression and retention come
+# from BACKUP_DIR / BACKUP_COMPRESS / BACKUP_KEEP.
+if [ -n "$BACKUP_INTERVAL_HOURS" ] && [ "$BACKUP_INTERVAL_HOURS" != "null" ]; then
+    echo "Scheduling database backups every ${BACKUP_INTERVAL_HOURS}h..."
+    (while sleep $((BACKUP_INTERVAL_HOURS * 3600)); do
+        ./manage.py backup_db || echo "Scheduled backup failed"
+    done) &
+fi
 
 echo "Starting Gunicorn..."
-gunicorn budgeter.wsgi:application \
-    --workers 2 \
-    --timeout 60 \
-    --bind unix:/tmp/gunicorn.sock \
-    --access-logfile - &
+# Worker class, counts, recycling and preload come from the GUNICORN_* vars in
+# envars.yml; see gunicorn.conf.py for the CPU-derived defaults.
+gunicorn budgeter.wsgi:application -c gunicorn.conf.py &
+
+echo "Starting Uvicorn..."
+# Serves only /api/events/ (nginx routes that one path here): long-lived SSE
+# streams are asyncio tasks in this process instead of gunicorn threads.
+uvicorn budgeter.asgi:application --uds /tmp/uvicorn.sock --lifespan off --no-access-log &
 
 echo "Starting Nginx..."
 nginx -g "daemon off;"
@@ -0,0 +1,100 @@
+"""Stdlib-only tests for backend/gunicorn.conf.py: `python3 -m unittest discover -s tests`.
+
+The config file has a dot in its name, so it is loaded by path rather than
+imported. Loading it never touches gunicorn itself.
+"""
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+
+_path = Path(__file__).resolve().parent.parent / "backend" / "gunicorn.conf.py"
+_spec = importlib.util.spec_from_file_location("gunicorn_conf", _path)
+gunicorn_conf = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(gunicorn_conf)
+
+
+class WorkerClassTests(unittest.TestCase):
+    def test_defaults_to_gthread(self):
+        self.assertEqual(gunicorn_conf.resolve_worker_class({}), "gthread")
+
+    def test_sync_override(self):
+        self.assertEqual(
+            gunicorn_conf.resolve_worker_class({"GUNICORN_WORKER_CLASS": "sync"}), "sync"
+        )
+
+    def test_unknown_class_falls_back(self):
+        # An async class would need a dependency the image does not have.
+        self.assertEqual(
+            gunicorn_conf.resolve_worker_class({"GUNICORN_WORKER_CLASS": "gevent"}), "gthread"
+        )
+
+
+class WorkerCountTests(unittest.TestCase):
+    def test_gthread_uses_one_worker_per_cpu(self):
+        self.assertEqual(gunicorn_conf.resolve_workers({}, cpus=4), 4)
+
+    def test_gthread_never_drops_below_two(self):
+        self.assertEqual(gunicorn_conf.resolve_workers({}, cpus=1), 2)
+
+    def test_sync_uses_two_per_cpu_plus_one(self):
+        env = {"GUNICORN_WORKER_CLASS": "sync"}
+        self.assertEqual(gunicorn_conf.resolve_workers(env, cpus=2), 5)
+
+    def test_default_is_capped(self):
+        env = {"GUNICORN_WORKER_CLASS": "sync"}
+        self.assertEqual(gunicorn_conf.resolve_workers(env, cpus=16), gunicorn_conf.MAX_WORKERS)
+
+    def test_explicit_count_wins_over_cap(self):
+        self.assertEqual(gunicorn_conf.resolve_workers({"GUNICORN_WORKERS": "12"}, cpus=1), 12)
+
+    def test_empty_and_null_fall_back(self):
+        # envars emits '' for a blank default and "null" for a missing one.
+        for raw in ("", "null", "0", "-3"):
+            self.assertEqual(gunicorn_conf.resolve_workers({"GUNICORN_WORKERS": raw}, cpus=3), 3)
+
+
+class ThreadsTests(unittest.TestCase):
+    def test_sync_is_always_single_threaded(self):
+        env = {"GUNICORN_WORKER_CLASS": "sync", "GUNICORN_THREADS": "8"}
+        self.assertEqual(gunicorn_conf.resolve_threads(env), 1)
+
+    def test_gthread_default_and_override(self):
+        self.assertEqual(gunicorn_conf.resolve_threads({}), gunicorn_conf.DEFAULT_THREADS)
+        self.assertEqual(gunicorn_conf.resolve_threads({"GUNICORN_THREADS": "8"}), 8)
+
+
+class PreloadTests(unittest.TestCase):
+    def test_enabled_by_default(self):
+        self.assertTrue(gunicorn_conf.resolve_preload({}))
+
+    def test_disabled_only_by_exact_false(self):
+        self.assertFalse(gunicorn_conf.resolve_preload({"GUNICORN_PRELOAD": "false"}))
+        self.assertTrue(gunicorn_conf.resolve_preload({"GUNICORN_PRELOAD": "0"}))
+
+
+class ContainerCpusTests(unittest.TestCase):
+    def _cpu_max(self, content):
+        f = tempfile.NamedTemporaryFile("w", delete=False)
+        f.write(content)
+        f.close()
+        self.addCleanup(Path(f.name).unlink)
+        return f.name
+
+    def test_cgroup_quota_limits_cpus(self):
+        # `docker run --cpus 1` writes "100000 100000".
+        self.assertEqual(gunicorn_conf.container_cpus(self._cpu_max("100000 100000\n")), 1)
+
+    def test_fractional_quota_rounds_up(self):
+        # `--cpus 0.5` still gets a worker's worth of CPU, never zero.
+        self.assertEqual(gunicorn_conf.container_cpus(self._cpu_max("50000 100000\n")), 1)
+
+    def test_unlimited_quota_and_missing_file_use_affinity(self):
+        unlimited = gunicorn_conf.container_cpus(self._cpu_max("max 100000\n"))
+        missing = gunicorn_conf.container_cpus("/nonexistent/cpu.max")
+        self.assertEqual(unlimited, missing)
+        self.assertGreaterEqual(missing, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
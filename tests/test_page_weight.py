@@ -0,0 +1,51 @@
+import io
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import page_weight
+
+INDEX = """<!doctype html><html><head>
+<link rel="icon" type="image/svg+xml" href="/favicon.svg" />
+<link rel="manifest" href="/manifest.webmanifest">
+<script type="module" crossorigin src="/assets/index-Ab12.js"></script>
+<link rel="modulepreload" crossorigin href="/assets/vendor-Cd34.js">
+<link rel="stylesheet" crossorigin href="/assets/index-Ef56.css">
+<link rel="canonical" href="https://example.org/">
+<script src="/assets/index-Ab12.js"></script>
+</head><body><div id="root"></div></body></html>"""
+
+
+class AssetUrlTests(unittest.TestCase):
+    def test_collects_fetched_assets_once_and_ignores_other_links(self):
+        self.assertEqual(page_weight.asset_urls(INDEX, "http://host:8081/"), [
+            "http://host:8081/favicon.svg",
+            "http://host:8081/manifest.webmanifest",
+            "http://host:8081/assets/index-Ab12.js",
+            "http://host:8081/assets/vendor-Cd34.js",
+            "http://host:8081/assets/index-Ef56.css",
+        ])
+
+
+class MeasureTests(unittest.TestCase):
+    def test_every_url_is_measured_per_encoding_and_totalled(self):
+        sizes = {"identity": 1000, "gzip": 300, "br": 250}
+
+        def fake_fetch(url, encoding):
+            return sizes[encoding], "" if encoding == "identity" else encoding, ""
+
+        with mock.patch("urllib.request.urlopen", return_value=io.BytesIO(INDEX.encode())):
+            results = page_weight.measure("http://host/", fetch=fake_fetch)
+        self.assertEqual(set(results), {"identity", "gzip", "br"})
+        self.assertEqual(len(results["gzip"]), 6)  # index.html + 5 assets
+        text = page_weight.report(results)
+        self.assertIn("     6000  total", text)
+        self.assertIn("     1800  total", text)
+        self.assertIn("     1500  total", text)
+
+
+if __name__ == "__main__":
+    unittest.main()